@@ -0,0 +1,83 @@
+"""
+자산 첨부(포스트/댓글 공용).
+
+요청한 자산을 select_for_update 조회 1번으로 잠그고 한꺼번에 검증해 자산 id 별 오류를 모은 뒤,
+오류가 없으면 UPDATE ... RETURNING 1번으로 연결한다(자산 수와 무관하게 쿼리 2번).
+잠금 덕분에 같은 자산을 동시에 첨부하려는 두 요청 중 하나만 성공한다.
+"""
+
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Asset, AssetStatus
+
+ERR_NOT_FOUND = "Not found or not owned by you."
+ERR_ATTACHED = "Asset already attached."
+
+_ATTACH_SQL = """
+UPDATE assets SET post_id = %s, comment_id = %s, updated_at = %s
+WHERE id = ANY(%s) AND post_id IS NULL AND comment_id IS NULL
+RETURNING id
+"""
+
+
+@dataclass
+class AttachResult:
+    attached: List[Asset] = field(default_factory=list)
+    errors: Dict[str, str] = field(default_factory=dict)  # 자산 id → 사유
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def _parse_ids(asset_ids: Sequence, errors: Dict[str, str]) -> List[uuid.UUID]:
+    ids = []
+    for aid in dict.fromkeys(str(a) for a in asset_ids):  # 중복 제거 + 순서 보존
+        try:
+            ids.append(uuid.UUID(aid))
+        except ValueError:
+            errors[aid] = ERR_NOT_FOUND
+    return ids
+
+
+def attach_assets(*, owner, asset_ids: Sequence, post=None, comment=None) -> AttachResult:
+    """
+    owner 의 자산들을 post 또는 comment 하나에 연결한다(전부 아니면 전무).
+    조건: 요청자 소유, READY 상태, 아직 post/comment 에 미연결. 하나라도 어긋나면 아무것도 연결하지 않고 errors 를 돌려준다.
+    바깥 트랜잭션 안에서 부르면 그 트랜잭션에 합류한다(세이브포인트 없음).
+    """
+    if (post is None) == (comment is None):
+        raise ValueError("Exactly one of post or comment is required")
+
+    errors: Dict[str, str] = {}
+    ids = _parse_ids(asset_ids, errors)
+    with transaction.atomic(savepoint=False):
+        rows = {a.id: a for a in Asset.objects.select_for_update().filter(id__in=ids, owner=owner)}
+        for aid in ids:
+            a = rows.get(aid)
+            if a is None:
+                errors[str(aid)] = ERR_NOT_FOUND
+            elif a.status != AssetStatus.READY:
+                errors[str(aid)] = f"Asset status must be READY (current={a.status})."
+            elif a.post_id or a.comment_id:
+                errors[str(aid)] = ERR_ATTACHED
+        if errors or not ids:
+            return AttachResult(errors=errors)
+
+        now = timezone.now()
+        post_id = post.id if post is not None else None
+        comment_id = comment.id if comment is not None else None
+        with connection.cursor() as cur:
+            cur.execute(_ATTACH_SQL, [post_id, comment_id, now, ids])
+            updated = {r[0] for r in cur.fetchall()}
+
+    # 잠근 행이라 전부 갱신된다. WHERE 의 미연결 조건은 잠금 없이 호출된 경우에 대비한 이중 방어
+    attached = [rows[aid] for aid in ids if aid in updated]
+    for a in attached:
+        a.post_id, a.comment_id, a.updated_at = post_id, comment_id, now
+    return AttachResult(attached=attached)
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:23
+
+from django.db import migrations, models
+
+# 기존 댓글 백필: 최상위부터 재귀적으로 path = 부모 path || '.' || 세그먼트(models.path_segment 와 같은 형식)
+BACKFILL_SQL = '''
+WITH RECURSIVE tree AS (
+    SELECT id, lpad(to_hex((extract(epoch FROM created_at) * 1000000)::bigint), 14, '0') || left(replace(id::text, '-', ''), 8) AS path
+    FROM comments_comment WHERE parent_id IS NULL
+    UNION ALL
+    SELECT c.id, tree.path || '.' || lpad(to_hex((extract(epoch FROM c.created_at) * 1000000)::bigint), 14, '0') || left(replace(c.id::text, '-', ''), 8)
+    FROM comments_comment AS c JOIN tree ON c.parent_id = tree.id
+)
+UPDATE comments_comment AS c SET path = tree.path FROM tree WHERE c.id = tree.id
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.TextField(db_collation='C', default='', editable=False),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='idx_comments_post_path'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['parent', '-created_at', '-id'], name='idx_comments_parent_keyset'),
+        ),
+    ]
@@ -1,8 +1,22 @@
 import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
+
+# 경로 구분자. 하위 트리 범위 조회는 [path, path + SEP_NEXT) 이므로 SEP_NEXT 는 SEP 다음 문자여야 한다(세그먼트 문자 0-9a-f 보다 작음).
+PATH_SEP = "."
+PATH_SEP_NEXT = "/"
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def path_segment(pk: uuid.UUID, at=None) -> str:
+    # 형제 간 작성 순 정렬이 되도록 생성 시각(마이크로초, 고정폭 16진수) + id 앞 8자리(동시각 tie-break)
+    at = at or timezone.now()
+    micros = (at - _EPOCH) // timedelta(microseconds=1)
+    return f"{micros:014x}{pk.hex[:8]}"
 
 
 class Comment(models.Model):
@@ -11,7 +25,11 @@ class Comment(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="comments")
     parent = models.ForeignKey("self", on_delete=models.CASCADE, null=True, blank=True, related_name="replies")
     content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    # materialized path: 조상 세그먼트를 PATH_SEP 로 이은 값(최상위는 세그먼트 1개). 삽입 시 한 번 정해지고 바뀌지 않는다.
+    # C collation 으로 바이트 순 비교 → path 정렬 = 깊이 우선(형제는 작성 순), 하위 트리 = 인덱스 범위 조회 1번
+    path = models.TextField(db_collation="C", default="", editable=False)
+    # auto_now_add 는 save 도중에 시각을 새로 찍으므로, path 세그먼트와 같은 값을 쓰도록 생성 시 기본값으로 정한다
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
@@ -19,6 +37,9 @@ class Comment(models.Model):
         indexes = [
             models.Index(fields=["post", "-created_at"]),
             models.Index(fields=["user", "created_at"]),
+            models.Index(fields=["post", "path"], name="idx_comments_post_path"),
+            # 대댓글 keyset 페이지네이션(parent, created_at desc, id desc)
+            models.Index(fields=["parent", "-created_at", "-id"], name="idx_comments_parent_keyset"),
         ]
 
     def clean(self):
@@ -26,5 +47,20 @@ class Comment(models.Model):
         if self.parent_id and self.parent.post_id != self.post_id:
             raise ValidationError({"parent": "Parent comment must belong to the same post."})
 
+    def save(self, *args, **kwargs):
+        if not self.path:
+            prefix = self.parent.path + PATH_SEP if self.parent_id else ""
+            # 0002 백필과 같은 기준: 세그먼트 시각 = created_at
+            self.path = prefix + path_segment(self.id, self.created_at)
+        super().save(*args, **kwargs)
+
+    @property
+    def depth(self) -> int:
+        return self.path.count(PATH_SEP)
+
+    def subtree_bounds(self) -> tuple:
+        # 자신 + 자손 전체: path 가 [self.path, self.path + SEP_NEXT) 범위(세그먼트가 고정폭이라 다른 댓글은 끼어들지 않음)
+        return self.path, self.path + PATH_SEP_NEXT
+
     def __str__(self):
         return f"Comment({self.id}) by {self.user_id} on post {self.post_id}"
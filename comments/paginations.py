@@ -0,0 +1,17 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CommentCursorPagination(CursorPagination):
+    # 최상위 댓글/대댓글 keyset 페이지네이션: (created_at desc, id desc), OFFSET 없이 댓글 수와 무관한 비용
+    page_size = 20
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class CommentTreePagination(CursorPagination):
+    # 하위 트리(스레드) 페이지네이션: path 순(깊이 우선, 형제는 작성 순)으로 이어서 읽기
+    page_size = 50
+    ordering = "path"
+    page_size_query_param = "page_size"
+    max_page_size = 200
@@ -98,3 +98,24 @@ class CommentSerializer(serializers.ModelSerializer):
             return instance
         except DjangoValidationError as e:
             raise serializers.ValidationError(e.message_dict) from None
+
+
+class CommentThreadSerializer(CommentSerializer):
+    """최상위 댓글 + 대댓글 수 + 앞쪽 대댓글 미리보기(comments.threads 로 주석/부착된 인스턴스 전용)."""
+
+    reply_count = serializers.IntegerField(read_only=True)
+    replies = CommentSerializer(source="reply_preview", many=True, read_only=True)
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ["reply_count", "replies"]
+        read_only_fields = CommentSerializer.Meta.read_only_fields + ["reply_count", "replies"]
+
+
+class CommentTreeSerializer(CommentSerializer):
+    """하위 트리 조회용: path 순 평탄 목록 + 깊이(최상위 = 0)."""
+
+    depth = serializers.IntegerField(read_only=True)
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ["depth"]
+        read_only_fields = CommentSerializer.Meta.read_only_fields + ["depth"]
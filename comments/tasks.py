@@ -48,9 +48,33 @@ def publish_event(event: str, payload: Dict[str, Any], key: Optional[str] = None
     log.info("[BUS][%s] %s", event, json.dumps(payload, ensure_ascii=False))
 
 
+def _bump_comment_count(comment_id: str, post_id: str, delta: int) -> None:
+    # 태스크는 autoretry 된다 → 댓글 id(+방향) 당 한 번만 반영. 표시는 캐시 add(원자적)로, 반영 실패 시 되돌린다
+    from django.core.cache import cache
+
+    marker = f"comments:counted:{comment_id}:{'+' if delta > 0 else '-'}"
+    try:
+        if not cache.add(marker, 1, getattr(settings, "COMMENT_COUNT_DEDUP_TTL_SEC", 86400)):
+            return
+    except Exception as e:
+        # 캐시 장애: 중복 반영 가능성보다 유실을 피한다(어긋남은 posts.counters.reconcile 가 바로잡음)
+        log.warning("comment counter dedup unavailable: %s", e)
+        marker = None
+    try:
+        from posts.counters import record
+
+        record({post_id: {"comment_count": delta}})
+    except Exception as e:
+        log.exception("comment counter update failed: %s", e)
+        if marker:
+            cache.delete(marker)
+
+
 # ---- Celery 태스크 ----
 @shared_task(bind=True, name="comments.tasks.on_comment_created", autoretry_for=(Exception,), retry_backoff=2, max_retries=5)
 def on_comment_created(self, comment_id: str, post_id: str, author_id: str, parent_id: str = "", post_author_id: str = "", parent_author_id: str = ""):
+    _bump_comment_count(comment_id, post_id, 1)
+
     # --- 이벤트 버스 발행 ---
     publish_event(
         "CommentCreated",
@@ -73,33 +97,22 @@ def on_comment_created(self, comment_id: str, post_id: str, author_id: str, pare
     if not recipients:
         return 0
 
-    # --- 알림 전송 (인앱 + 푸시) ---
+    # --- 알림 전송 (인앱 + 푸시): 수신자 전원을 태스크 하나로(설정/디바이스 조회와 저장이 수신자 수와 무관) ---
     try:
-        from notifications.tasks import single_user_push
+        from notifications.tasks import multi_user_push
     except Exception as e:
         log.exception("notifications integration missing: %s", e)
         return 0
 
-    sent_total = 0
-    for uid in recipients:
-        try:
-            sent = single_user_push.delay(
-                user_id=uid,
-                type_="comment",
-                title="New comment",
-                body="There is a new comment.",
-                data={
-                    "post_id": post_id,
-                    "comment_id": comment_id,
-                    "by": author_id,
-                    "parent_id": parent_id,
-                },
-            )
-            # ALWAYS_EAGER이면 숫자, 비동기면 AsyncResult라 합산은 생략 가능
-            sent_total += int(getattr(sent, "result", 0)) if hasattr(sent, "result") else 0
-        except Exception as e:
-            log.exception("single_user_push failed for uid=%s: %s", uid, e)
-    return sent_total
+    data = {"post_id": post_id, "comment_id": comment_id, "by": author_id, "parent_id": parent_id}
+    items = [{"user_id": uid, "type": "comment", "title": "New comment", "body": "There is a new comment.", "data": data} for uid in sorted(recipients)]
+    try:
+        sent = multi_user_push.delay(items)
+        # ALWAYS_EAGER이면 숫자, 비동기면 AsyncResult라 합산은 생략 가능
+        return int(getattr(sent, "result", 0) or 0) if hasattr(sent, "result") else 0
+    except Exception as e:
+        log.exception("multi_user_push failed for %s recipients: %s", len(items), e)
+        return 0
 
 
 @shared_task(bind=True, name="comments.tasks.on_comment_updated", autoretry_for=(Exception,), retry_backoff=2, max_retries=5)
@@ -118,6 +131,8 @@ def on_comment_updated(self, comment_id: str, post_id: str, author_id: str):
 
 @shared_task(bind=True, name="comments.tasks.on_comment_deleted", autoretry_for=(Exception,), retry_backoff=2, max_retries=5)
 def on_comment_deleted(self, comment_id: str, post_id: str, author_id: str):
+    _bump_comment_count(comment_id, post_id, -1)
+
     publish_event(
         "CommentDeleted",
         {
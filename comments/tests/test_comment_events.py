@@ -1,3 +1,5 @@
+import uuid
+
 import pytest
 from django.contrib.auth import get_user_model
 
@@ -119,3 +121,19 @@ class TestCommentUpdatedDeleted(BaseCommentEventTest):
         c.save(update_fields=["content"])
 
         assert any(e == "CommentUpdated" and d.get("comment_id") == str(c.id) for (e, d, _) in captured)
+
+    def test_retried_tasks_count_each_comment_once(self, users, post, monkeypatch):
+        from comments import tasks
+        from posts import counters
+
+        _, commenter, _ = users
+        recorded = []
+        monkeypatch.setattr(counters, "record", lambda deltas: recorded.append(deltas))
+        comment_id = str(uuid.uuid4())
+
+        # 재시도로 같은 댓글 태스크가 여러 번 실행돼도 델타는 방향별 1번만
+        for _ in range(2):
+            tasks.on_comment_created(comment_id, str(post.id), str(commenter.id))
+            tasks.on_comment_deleted(comment_id, str(post.id), str(commenter.id))
+
+        assert recorded == [{str(post.id): {"comment_count": 1}}, {str(post.id): {"comment_count": -1}}]
@@ -119,3 +119,116 @@ class TestCommentCRUD:
         url = reverse("post-comments-list", kwargs={"post_id": str(self.post.id)})
         res = self.client.post(url, {"content": "noauth"}, format="json")
         assert res.status_code in (401, 403)
+
+
+class TestCommentThreads:
+    def setup_method(self):
+        self.client = APIClient()
+        self.User = get_user_model()
+        self.author = self.User.objects.create()
+        self.post = Post.objects.create(author=self.author, content="thread")
+        self.client.force_authenticate(user=self.author)
+        self.url = reverse("post-comments-list", kwargs={"post_id": str(self.post.id)})
+
+    def _thread(self, parents: int, replies: int):
+        from profiles.models import Profile
+
+        out = []
+        for i in range(parents):
+            u = self.User.objects.create()
+            Profile.objects.create(user=u, nickname=f"p{parents}-{i}")
+            parent = Comment.objects.create(post=self.post, user=u, content=f"parent {i}")
+            for j in range(replies):
+                Comment.objects.create(post=self.post, user=u, parent=parent, content=f"reply {i}-{j}")
+            out.append(parent)
+        return out
+
+    def test_reply_count_and_bounded_preview(self, settings):
+        settings.COMMENT_REPLY_PREVIEW = 2
+        self._thread(parents=2, replies=5)
+        body = self.client.get(self.url).json()["results"]
+        assert len(body) == 2
+        for item in body:
+            assert item["reply_count"] == 5
+            # 오래된 순 앞쪽 2개만
+            assert [r["content"].split("-")[1] for r in item["replies"]] == ["0", "1"]
+            assert item["author"]["nickname"] and item["replies"][0]["author"]["nickname"] == item["author"]["nickname"]
+
+    def test_query_count_independent_of_thread_size(self, django_assert_num_queries):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self._thread(parents=1, replies=1)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url)
+        self._thread(parents=10, replies=8)
+
+        # post 조회, 최상위 댓글(+reply_count), 자산, 대댓글 윈도 쿼리, 대댓글 자산
+        with django_assert_num_queries(5):
+            res = self.client.get(self.url)
+        assert len(res.json()["results"]) == 11
+        assert len(small.captured_queries) == 5
+
+
+class TestCommentTree:
+    def setup_method(self):
+        self.client = APIClient()
+        self.User = get_user_model()
+        self.author = self.User.objects.create()
+        self.post = Post.objects.create(author=self.author, content="tree")
+        self.client.force_authenticate(user=self.author)
+
+    def _c(self, content, parent=None):
+        return Comment.objects.create(post=self.post, user=self.author, parent=parent, content=content)
+
+    def test_path_maintained_on_insert(self):
+        root = self._c("root")
+        child = self._c("child", root)
+        grandchild = self._c("grandchild", child)
+        assert root.depth == 0 and child.depth == 1 and grandchild.depth == 2
+        assert grandchild.path.startswith(child.path + ".") and child.path.startswith(root.path + ".")
+
+    def test_path_segment_uses_created_at(self):
+        from comments.models import path_segment
+
+        root = self._c("root")
+        child = self._c("child", root)
+        # 0002 마이그레이션 백필과 같은 값(created_at 기준)
+        assert root.path == path_segment(root.id, root.created_at)
+        assert child.path == root.path + "." + path_segment(child.id, Comment.objects.get(pk=child.pk).created_at)
+
+    def test_subtree_in_one_query_depth_first(self, django_assert_num_queries):
+        from comments import threads
+
+        root = self._c("r")
+        a = self._c("a", root)
+        a1 = self._c("a1", a)
+        b = self._c("b", root)
+        a2 = self._c("a2", a)
+        a1x = self._c("a1x", a1)
+        other_root = self._c("other")
+        self._c("other child", other_root)
+
+        with django_assert_num_queries(2):  # 범위 조회 + 자산 prefetch
+            rows = list(threads.subtree(root))
+        assert [c.content for c in rows] == ["r", "a", "a1", "a1x", "a2", "b"]
+        assert [c.id for c in threads.subtree(a)] == [a.id, a1.id, a1x.id, a2.id]
+        assert b.id not in {c.id for c in threads.subtree(a)}
+
+        res = self.client.get(reverse("comment-thread", kwargs={"pk": str(root.id)}), {"page_size": 4})
+        assert res.status_code == 200
+        body = res.json()
+        assert [(r["content"], r["depth"]) for r in body["results"]] == [("r", 0), ("a", 1), ("a1", 2), ("a1x", 3)]
+        rest = self.client.get(body["next"]).json()
+        assert [r["content"] for r in rest["results"]] == ["a2", "b"] and rest["next"] is None
+
+    def test_keyset_pages_do_not_overlap(self):
+        for i in range(7):
+            self._c(f"top {i}")
+        url = reverse("post-comments-list", kwargs={"post_id": str(self.post.id)})
+        seen, nxt = [], f"{url}?page_size=3"
+        while nxt:
+            body = self.client.get(nxt).json()
+            seen += [r["content"] for r in body["results"]]
+            nxt = body["next"]
+        assert seen == [f"top {i}" for i in reversed(range(7))]
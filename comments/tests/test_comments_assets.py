@@ -108,3 +108,26 @@ class TestCommentAssets:
         res = self.client.delete(url)
         assert res.status_code == 400
         assert "not attached to this comment" in res.content.decode().lower()
+
+    def test_bulk_attach_fixed_queries_and_error_map(self, django_assert_num_queries):
+        from assets.services import attach_assets
+
+        assets = [self._ready_asset(self.author) for _ in range(5)]
+        foreign = self._ready_asset(self.other)
+        bogus = "not-a-uuid"
+
+        # 오류가 있으면 아무것도 연결하지 않고 id 별 사유를 모두 돌려준다
+        res = attach_assets(owner=self.author, asset_ids=[str(a.id) for a in assets] + [str(foreign.id), bogus], comment=self.comment)
+        assert not res.ok and set(res.errors) == {str(foreign.id), bogus}
+        assert Asset.objects.filter(comment=self.comment).count() == 0
+
+        # 자산 수와 무관: 잠금 조회 + UPDATE ... RETURNING (바깥 트랜잭션에 합류, SAVEPOINT 없음)
+        with django_assert_num_queries(2):
+            res = attach_assets(owner=self.author, asset_ids=[str(a.id) for a in assets], comment=self.comment)
+        assert res.ok and [a.id for a in res.attached] == [a.id for a in assets]
+        assert Asset.objects.filter(comment=self.comment).count() == 5
+
+        # 같은 자산을 다른 곳에 다시 첨부 → 이미 연결됨
+        other_comment = Comment.objects.create(post=self.post, user=self.author, content="C2")
+        res = attach_assets(owner=self.author, asset_ids=[str(assets[0].id)], comment=other_comment)
+        assert res.errors == {str(assets[0].id): "Asset already attached."}
@@ -0,0 +1,60 @@
+"""
+댓글 스레드 일괄 조회(N+1 없음).
+
+- 최상위 댓글: reply_count 를 서브쿼리로 주석하고 작성자 프로필은 select_related, 첨부 자산은 prefetch
+- 하위 트리: materialized path 범위 조회 1번으로 깊이와 무관하게 스레드 전체를 path 순으로
+- 대댓글 미리보기: 페이지의 모든 부모에 대해 ROW_NUMBER() 윈도 쿼리 1번으로 부모별 앞쪽 N개만 가져온다
+  (대댓글이 수천 개인 부모가 있어도 페이지당 N * 부모 수 이상 읽지 않음)
+따라서 한 페이지의 쿼리 수는 댓글/대댓글 수와 무관하게 고정된다.
+"""
+
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+from django.db.models import Count, F, IntegerField, OuterRef, QuerySet, Subquery, Window
+from django.db.models.functions import Coalesce, RowNumber
+
+from .models import Comment
+
+
+def with_author(qs: QuerySet) -> QuerySet:
+    # 직렬화기의 author(닉네임)와 assets 를 위한 관계를 한 번에 적재
+    return qs.select_related("user__profile", "post").prefetch_related("assets")
+
+
+def top_level(post) -> QuerySet:
+    reply_count = Comment.objects.filter(parent=OuterRef("pk")).order_by().values("parent").annotate(n=Count("*")).values("n")
+    qs = Comment.objects.filter(post=post, parent__isnull=True).annotate(reply_count=Coalesce(Subquery(reply_count, output_field=IntegerField()), 0))
+    return with_author(qs)
+
+
+def subtree(root: Comment) -> QuerySet:
+    # 루트 + 모든 자손을 (post, path) 인덱스 범위 조회 1번으로(깊이와 무관)
+    lo, hi = root.subtree_bounds()
+    return with_author(Comment.objects.filter(post_id=root.post_id, path__gte=lo, path__lt=hi)).order_by("path")
+
+
+def reply_previews(parent_ids: Iterable, limit: int) -> Dict[str, List[Comment]]:
+    """부모 id → 오래된 순 앞쪽 limit 개 대댓글."""
+    parent_ids = list(parent_ids)
+    out: Dict[str, List[Comment]] = {str(pid): [] for pid in parent_ids}
+    if not parent_ids or limit <= 0:
+        return out
+    qs = (
+        Comment.objects.filter(parent_id__in=parent_ids)
+        .annotate(rn=Window(RowNumber(), partition_by=[F("parent_id")], order_by=[F("created_at").asc(), F("id").asc()]))
+        .filter(rn__lte=limit)
+        .order_by("parent_id", "rn")
+    )
+    for c in with_author(qs):
+        out[str(c.parent_id)].append(c)
+    return out
+
+
+def attach_replies(comments: Iterable[Comment], limit: int | None = None) -> None:
+    """Comment 인스턴스에 reply_preview 속성을 붙인다(CommentThreadSerializer 에서 그대로 사용)."""
+    comments = list(comments)
+    limit = settings.COMMENT_REPLY_PREVIEW if limit is None else limit
+    previews = reply_previews((c.id for c in comments), limit)
+    for c in comments:
+        c.reply_preview = previews[str(c.id)]
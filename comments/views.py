@@ -5,24 +5,30 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from assets.models import Asset, AssetStatus
+from assets.models import Asset
 from assets.serializers import AssetOut
+from assets.services import attach_assets
 from common.schema import AssetIdsIn, AttachErrorsOut, ErrorOut
 from posts.models import Post
 
+from . import threads
 from .models import Comment
+from .paginations import CommentCursorPagination, CommentTreePagination
 from .permissions import IsAuthorOrReadOnly
-from .serializers import CommentSerializer
+from .serializers import CommentSerializer, CommentThreadSerializer, CommentTreeSerializer
 
 
 @extend_schema_view(
     list=extend_schema(
         tags=["Comments"],
         summary="게시물의 최상위 댓글 목록",
-        description="지정한 게시물(post_id)의 **최상위 댓글(parent is null)** 목록을 반환합니다. 페이지네이션은 전역 DRF 설정을 따릅니다.",
+        description=(
+            "지정한 게시물(post_id)의 **최상위 댓글(parent is null)** 목록을 반환합니다. `(created_at, id)` 역순 커서 페이지네이션(`cursor`, `page_size`)입니다.\n"
+            "각 댓글에는 `reply_count`(전체 대댓글 수)와 `replies`(오래된 순 앞쪽 몇 개 미리보기)가 포함됩니다. 나머지는 `/comments/{id}/replies` 로 조회하세요."
+        ),
         operation_id="post_comments_list",
         parameters=[OpenApiParameter(name="post_id", location=OpenApiParameter.PATH, type=OpenApiTypes.UUID, description="대상 게시물 ID (UUID)")],
-        responses={200: OpenApiResponse(response=CommentSerializer), 401: ErrorOut, 404: ErrorOut},
+        responses={200: OpenApiResponse(response=CommentThreadSerializer), 401: ErrorOut, 404: ErrorOut},
     ),
     create=extend_schema(
         tags=["Comments"],
@@ -48,6 +54,7 @@ class PostCommentViewSet(mixins.ListModelMixin, mixins.CreateModelMixin, viewset
 
     permission_classes = [IsAuthenticated]
     serializer_class = CommentSerializer
+    pagination_class = CommentCursorPagination
 
     def get_post(self):
         return get_object_or_404(Post, id=self.kwargs["post_id"])
@@ -55,7 +62,22 @@ class PostCommentViewSet(mixins.ListModelMixin, mixins.CreateModelMixin, viewset
     def get_queryset(self):
         post = self.get_post()
         # 최신순 기본, 필요 시 created_at asc 정렬 옵션 쿼리파라미터 추가 가능
-        return Comment.objects.filter(post=post, parent__isnull=True).select_related("user", "post").prefetch_related("replies")
+        # reply_count 주석 + 작성자/자산 일괄 적재(대댓글 전체를 prefetch 하지 않음)
+        return threads.top_level(post)
+
+    def get_serializer_class(self):
+        if getattr(self, "action", None) == "list":
+            return CommentThreadSerializer
+        return CommentSerializer
+
+    def list(self, request, *args, **kwargs):
+        qs = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(qs)
+        comments = list(page if page is not None else qs)
+        # 대댓글 미리보기는 페이지 단위 윈도 쿼리 1번으로 일괄 부착
+        threads.attach_replies(comments)
+        ser = self.get_serializer(comments, many=True)
+        return self.get_paginated_response(ser.data) if page is not None else Response(ser.data)
 
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
@@ -102,11 +124,12 @@ class CommentViewSet(viewsets.ModelViewSet):
 
     permission_classes = [IsAuthenticated & IsAuthorOrReadOnly]
     serializer_class = CommentSerializer
-    queryset = Comment.objects.select_related("user", "post").all()
+    pagination_class = CommentCursorPagination
+    queryset = threads.with_author(Comment.objects.all())
 
     def get_permissions(self):
         # 읽기: 인증만, 수정/삭제: 작성자
-        if self.action in ["retrieve", "replies"]:
+        if self.action in ["retrieve", "replies", "thread"]:
             return [IsAuthenticated()]
         return [IsAuthenticated(), IsAuthorOrReadOnly()]
 
@@ -114,7 +137,7 @@ class CommentViewSet(viewsets.ModelViewSet):
         tags=["Comments"],
         summary="대댓글 목록/작성",
         description=(
-            "**GET**: 해당 댓글의 대댓글 목록을 반환합니다(페이지네이션 적용 가능).\n"
+            "**GET**: 해당 댓글의 대댓글 목록을 반환합니다(최신순 커서 페이지네이션).\n"
             "**POST**: 해당 댓글에 대댓글을 작성합니다. 요청 본문은 댓글 생성과 동일하며, 서버가 `parent`를 자동 지정합니다."
         ),
         operation_id="comments_replies",
@@ -133,7 +156,7 @@ class CommentViewSet(viewsets.ModelViewSet):
     def replies(self, request, pk=None):
         parent = self.get_object()
         if request.method.lower() == "get":
-            qs = parent.replies.select_related("user", "post")
+            qs = threads.with_author(parent.replies.all())
             page = self.paginate_queryset(qs)
             ser = self.get_serializer(page or qs, many=True)
             return self.get_paginated_response(ser.data) if page is not None else Response(ser.data)
@@ -145,6 +168,24 @@ class CommentViewSet(viewsets.ModelViewSet):
         out = self.get_serializer(obj).data
         return Response(out, status=status.HTTP_201_CREATED)
 
+    @extend_schema(
+        tags=["Comments"],
+        summary="댓글 하위 트리(스레드) 조회",
+        description=(
+            "해당 댓글과 모든 자손 댓글을 **path 순(깊이 우선, 형제는 작성 순)** 평탄 목록으로 반환합니다. 각 항목의 `depth`로 들여쓰기를 구성하세요.\n"
+            "깊이와 무관하게 한 번의 범위 조회로 읽으며, 큰 스레드는 커서(`cursor`, `page_size`)로 이어서 읽습니다."
+        ),
+        operation_id="comments_thread",
+        parameters=[OpenApiParameter(name="id", location=OpenApiParameter.PATH, type=OpenApiTypes.UUID, description="루트 댓글 ID (UUID)")],
+        responses={200: OpenApiResponse(response=CommentTreeSerializer(many=True), description="하위 트리"), 401: ErrorOut, 404: ErrorOut},
+    )
+    @action(detail=True, methods=["get"], url_path="thread")
+    def thread(self, request, pk=None):
+        root = self.get_object()
+        paginator = CommentTreePagination()
+        page = paginator.paginate_queryset(threads.subtree(root), request, view=self)
+        return paginator.get_paginated_response(CommentTreeSerializer(page, many=True, context=self.get_serializer_context()).data)
+
     @extend_schema(
         tags=["Comments"],
         summary="댓글에 자산 목록 조회/첨부",
@@ -179,30 +220,12 @@ class CommentViewSet(viewsets.ModelViewSet):
         if not isinstance(asset_ids, list) or not asset_ids:
             return Response({"asset_ids": ["This field is required and must be a non-empty list."]}, status=400)
 
-        attachable = []
-        errors = {}
-        for aid in asset_ids:
-            try:
-                a = Asset.objects.get(id=aid, owner=request.user)
-            except Asset.DoesNotExist:
-                errors[str(aid)] = "Not found or not owned by you."
-                continue
-            if a.status != AssetStatus.READY:
-                errors[str(aid)] = f"Asset status must be READY (current={a.status})."
-                continue
-            if a.post_id or a.comment_id:
-                errors[str(aid)] = "Asset already attached."
-                continue
-            attachable.append(a)
-
-        if errors:
-            return Response({"errors": errors}, status=400)
-
-        for a in attachable:
-            a.comment = comment
-            a.save(update_fields=["comment", "updated_at"])
-
-        return Response(AssetOut(attachable, many=True).data, status=201)
+        # 잠금 조회 1번 + 일괄 검증 + UPDATE ... RETURNING 1번(자산 수와 무관)
+        result = attach_assets(owner=request.user, asset_ids=asset_ids, comment=comment)
+        if not result.ok:
+            return Response({"errors": result.errors}, status=400)
+
+        return Response(AssetOut(result.attached, many=True).data, status=201)
 
     @extend_schema(
         tags=["Comments"],
@@ -5,3 +5,9 @@ class FeedPostOut(serializers.Serializer):
     post_id = serializers.UUIDField()
     author_id = serializers.UUIDField()
     created_at = serializers.CharField()
+    like_count = serializers.IntegerField(default=0)
+    comment_count = serializers.IntegerField(default=0)
+    repost_count = serializers.IntegerField(default=0)
+    my_liked = serializers.BooleanField(default=False)
+    my_bookmarked = serializers.BooleanField(default=False)
+    my_reposted = serializers.BooleanField(default=False)
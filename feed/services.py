@@ -90,10 +90,23 @@ def handle_user_follow_changed(evt: Dict):
     _cache.bump_following_ver([follower_id])
 
 
+def _with_counts(posts: List[Dict]) -> List[Dict]:
+    # 카운터는 자주 바뀌므로 캐시/피드 저장소 행에 굳히지 않고, 읽을 때 posts 컬럼에서 한 번에 병합(PK IN 조회 1회)
+    if not posts:
+        return posts
+    rows = Post.objects.filter(id__in=[p["post_id"] for p in posts]).values_list("id", "like_count", "comment_count", "repost_count")
+    counts = {str(pid): (lc, cc, rc) for pid, lc, cc, rc in rows}
+    out = []
+    for p in posts:
+        lc, cc, rc = counts.get(p["post_id"], (0, 0, 0))
+        out.append({**p, "like_count": lc, "comment_count": cc, "repost_count": rc})
+    return out
+
+
 def fetch_following_feed(user_id: uuid.UUID, page: int, size: int) -> List[Dict]:
     cached = _cache.get_following(user_id, page, size)
     if cached is not None:
-        return cached
+        return _with_counts(cached)
 
     author_ids = list(Follow.objects.filter(follower_id=user_id).values_list("following_id", flat=True))
 
@@ -105,15 +118,15 @@ def fetch_following_feed(user_id: uuid.UUID, page: int, size: int) -> List[Dict]
         posts = [{"post_id": str(p.id), "author_id": str(p.author_id), "created_at": p.created_at.isoformat()} for p in qs]
 
     _cache.set_following(user_id, page, size, posts)
-    return posts
+    return _with_counts(posts)
 
 
 def fetch_hashtag_feed(tag: str, page: int, size: int) -> List[Dict]:
     cached = _cache.get_hashtag(tag, page, size)
     if cached is not None:
-        return cached
+        return _with_counts(cached)
 
     repo = _get_repo()
     posts = repo.query_hashtag_posts(tag, page, size) if repo else []
     _cache.set_hashtag(tag, page, size, posts)
-    return posts
+    return _with_counts(posts)
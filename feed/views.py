@@ -7,6 +7,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from common.schema import ErrorOut
+from posts import viewer_state
 
 from .serializers import FeedPostOut
 from .services import fetch_following_feed, fetch_hashtag_feed
@@ -40,7 +41,7 @@ class FeedViewSet(viewsets.ViewSet):
         user_id = uuid.UUID(str(request.user.id))
         page = int(request.query_params.get("page", 0))
         size = int(request.query_params.get("size", 20))
-        items = fetch_following_feed(user_id, page, size)
+        items = viewer_state.annotate_rows(fetch_following_feed(user_id, page, size), request.user)
         return Response(FeedPostOut(items, many=True).data)
 
     @extend_schema(
@@ -63,5 +64,5 @@ class FeedViewSet(viewsets.ViewSet):
     def hashtag(self, request, tag: str):
         page = int(request.query_params.get("page", 0))
         size = int(request.query_params.get("size", 20))
-        items = fetch_hashtag_feed(tag, page, size)
+        items = viewer_state.annotate_rows(fetch_hashtag_feed(tag, page, size), request.user)
         return Response(FeedPostOut(items, many=True).data)
@@ -0,0 +1,75 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Sequence
+
+from django.core.management.base import BaseCommand
+
+from moderation.scoring import MicroBatcher
+
+
+class SimulatedScorer:
+    """
+    호출당 고정 지연 + 항목당 지연을 흉내내는 백엔드(추론 서버 비용 모델).
+    동시에 처리할 수 있는 호출 수(slots)가 제한되어 있어, 호출 수가 곧 대기열 길이가 된다.
+    """
+
+    name = "simulated"
+
+    def __init__(self, call_ms: float, item_ms: float, slots: int):
+        self.call_ms = call_ms
+        self.item_ms = item_ms
+        self.slots = threading.Semaphore(slots)
+        self.calls = 0
+
+    def score_batch(self, texts: Sequence[str]) -> List[float]:
+        with self.slots:
+            self.calls += 1
+            time.sleep((self.call_ms + self.item_ms * len(texts)) / 1000.0)
+        return [0.0] * len(texts)
+
+
+class Command(BaseCommand):
+    help = "Benchmark the moderation scorer with a simulated-latency backend: one call per request vs micro-batched calls."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=64)
+        parser.add_argument("--call-ms", type=float, default=20.0, help="Fixed latency per backend call.")
+        parser.add_argument("--item-ms", type=float, default=0.2, help="Extra latency per text in a call.")
+        parser.add_argument("--slots", type=int, default=4, help="Concurrent calls the simulated backend can serve.")
+        parser.add_argument("--max-batch", type=int, default=32)
+        parser.add_argument("--max-wait-ms", type=float, default=5.0)
+
+    def handle(self, *args, **opts):
+        for mode in ("single", "batched"):
+            self._run(mode, opts)
+
+    def _run(self, mode, opts):
+        n = opts["requests"]
+        backend = SimulatedScorer(opts["call_ms"], opts["item_ms"], opts["slots"])
+        if mode == "single":
+
+            def call(text):
+                return backend.score_batch([text])[0]
+
+        else:
+            batcher = MicroBatcher(backend, opts["max_batch"], opts["max_wait_ms"])
+
+            def call(text):
+                return batcher.submit(text).result()
+
+        def timed(i):
+            t0 = time.perf_counter()
+            call(f"text {i}")
+            return time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=opts["concurrency"]) as pool:
+            latencies = sorted(pool.map(timed, range(n)))
+        elapsed = time.perf_counter() - t0
+
+        p50 = statistics.median(latencies) * 1000
+        p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+        self.stdout.write(f"{mode}: {n} requests in {elapsed:.2f}s ({n / elapsed:.0f} req/s), backend calls={backend.calls}, p50={p50:.1f}ms p99={p99:.1f}ms")
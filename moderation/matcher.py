@@ -0,0 +1,106 @@
+"""
+규칙 스냅샷을 한 번 컴파일해 프로세스 메모리에 두는 매처.
+
+- 금칙어: Aho–Corasick 오토마톤(트라이 + 실패 링크) → 텍스트 길이에 비례하는 한 번의 스캔으로 모든 키워드 매칭
+- 정규식: 규칙별로 한 번만 컴파일(잘못된 패턴은 건너뜀)
+- 버전: 규칙이 바뀌면 Redis 의 버전 스탬프만 바꾼다. 각 프로세스는 스탬프가 달라졌을 때만 다시 컴파일한다.
+"""
+
+import re
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class KeywordAutomaton:
+    """대소문자 무시 부분 문자열 매칭(`w.lower() in text.lower()` 와 동일한 결과)."""
+
+    def __init__(self, words: Sequence[str]):
+        self.words = list(words)
+        goto: List[Dict[str, int]] = [{}]
+        out: List[List[int]] = [[]]
+        for idx, w in enumerate(self.words):
+            w = w.lower()
+            if not w:
+                continue
+            s = 0
+            for ch in w:
+                nxt = goto[s].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[s][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                s = nxt
+            out[s].append(idx)
+
+        # BFS 로 실패 링크 계산(얕은 상태부터 → 실패 대상의 출력이 먼저 완성됨)
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            r = queue.popleft()
+            for ch, s in goto[r].items():
+                f = fail[r]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[s] = goto[f].get(ch, 0)
+                out[s] = out[s] + out[fail[s]]
+                queue.append(s)
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def search(self, text: str) -> List[str]:
+        goto, fail, out = self._goto, self._fail, self._out
+        s = 0
+        found = set()
+        for ch in text.lower():
+            while s and ch not in goto[s]:
+                s = fail[s]
+            s = goto[s].get(ch, 0)
+            if out[s]:
+                found.update(out[s])
+        # 규칙 순서(스냅샷 순서)대로 반환
+        return [self.words[i] for i in sorted(found)]
+
+
+class CompiledMatcher:
+    """규칙 스냅샷 1개(= 규칙 버전 1개)에 대한 컴파일 결과."""
+
+    def __init__(self, snapshot: Dict, version: Optional[str] = None):
+        self.version = version
+        self.keywords = KeywordAutomaton(snapshot.get("deny_keywords", []))
+        self.regexes: List[re.Pattern] = []
+        for p in snapshot.get("deny_regexes", []):
+            try:
+                self.regexes.append(re.compile(p, re.IGNORECASE | re.UNICODE))
+            except re.error:
+                # 잘못된 정규식은 안전하게 skip (운영자가 수정)
+                continue
+
+    def scan(self, content: str) -> Tuple[List[str], List[str]]:
+        """(키워드 매칭, 정규식 매칭) 패턴 목록."""
+        return self.keywords.search(content), [rx.pattern for rx in self.regexes if rx.search(content)]
+
+
+class MatcherHolder:
+    """프로세스당 하나. 버전 스탬프가 같으면 컴파일된 매처를 그대로 재사용한다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._matcher: Optional[CompiledMatcher] = None
+
+    def get(self, version: str, load_snapshot) -> CompiledMatcher:
+        m = self._matcher
+        if m is not None and m.version == version:
+            return m
+        with self._lock:
+            m = self._matcher
+            if m is None or m.version != version:
+                m = CompiledMatcher(load_snapshot(), version)
+                self._matcher = m
+            return m
+
+    def clear(self) -> None:
+        with self._lock:
+            self._matcher = None
@@ -0,0 +1,153 @@
+"""
+기존 콘텐츠 재검사(규칙 변경 후 백필).
+
+- 대상(post/comment)을 id 순 keyset 으로 스트리밍한다(iterator(chunk_size) → PostgreSQL 서버 사이드 커서).
+- 검사는 현재 규칙 스냅샷으로 컴파일한 매처를 프로세스 풀의 각 워커에 한 번씩 만들어 두고 배치 단위로 돌린다.
+- 결과는 배치마다 ModerationReport bulk_create, 그 직후 체크포인트(마지막 id)를 캐시에 남긴다.
+  중단 후 다시 실행하면 체크포인트 다음 id 부터 이어간다(마지막 배치는 최대 한 번 중복 기록될 수 있음).
+"""
+
+import logging
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from django.core.cache import cache
+
+from . import scoring
+from .matcher import CompiledMatcher
+from .models import ModerationReport
+from .services import evaluate, get_matcher, load_rules_snapshot
+from .verdicts import normalize
+
+log = logging.getLogger(__name__)
+
+CHECKPOINT_KEY = "moderation:rescan:checkpoint:{target}"
+
+Row = Tuple[str, str]  # (target_id, content)
+Verdict = Tuple[str, str, List[str], float, List[dict]]  # (target_id, verdict, labels, score, matches)
+
+
+def _targets() -> Dict[str, object]:
+    from comments.models import Comment
+    from posts.models import Post
+
+    return {"post": Post, "comment": Comment}
+
+
+TARGETS = ("post", "comment")
+
+
+@dataclass
+class RescanStats:
+    target: str
+    scanned: int = 0
+    reported: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def docs_per_sec(self) -> float:
+        return self.scanned / self.elapsed if self.elapsed else 0.0
+
+
+# ---- 워커(프로세스 풀) ----
+_worker_matcher: Optional[CompiledMatcher] = None
+
+
+def _init_worker(snapshot: Dict) -> None:
+    # 워커당 한 번 컴파일(배치마다 스냅샷을 주고받지 않음)
+    global _worker_matcher
+    _worker_matcher = CompiledMatcher(snapshot)
+
+
+def _scan_batch(rows: List[Row], include_allowed: bool, matcher: Optional[CompiledMatcher] = None) -> List[Verdict]:
+    matcher = matcher or _worker_matcher
+    texts = [normalize(content) for _, content in rows]
+    out = []
+    for (target_id, _), text, ml in zip(rows, texts, scoring.score_many(texts), strict=True):
+        res = evaluate(matcher, text, ml)
+        if res.verdict == "allow" and not include_allowed:
+            continue
+        out.append((target_id, res.verdict if res.allowed else "block", res.labels, res.score, res.matches))
+    return out
+
+
+# ---- 오케스트레이션 ----
+def get_checkpoint(target: str) -> Optional[str]:
+    return cache.get(CHECKPOINT_KEY.format(target=target))
+
+
+def reset_checkpoint(target: str) -> None:
+    cache.delete(CHECKPOINT_KEY.format(target=target))
+
+
+def _stream(target: str, after: Optional[str], chunk_size: int) -> Iterator[List[Row]]:
+    qs = _targets()[target].objects.order_by("id")
+    if after:
+        qs = qs.filter(id__gt=after)
+    batch: List[Row] = []
+    for pk, content in qs.values_list("id", "content").iterator(chunk_size=chunk_size):
+        batch.append((str(pk), content))
+        if len(batch) >= chunk_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _store(target: str, rows: List[Row], verdicts: List[Verdict]) -> int:
+    if verdicts:
+        ModerationReport.objects.bulk_create(
+            [ModerationReport(target_type=target, target_id=tid, verdict=v, labels=labels, score=score, matched=matches) for tid, v, labels, score, matches in verdicts],
+            batch_size=1000,
+        )
+    cache.set(CHECKPOINT_KEY.format(target=target), rows[-1][0], None)
+    return len(verdicts)
+
+
+def rescan(
+    target: str,
+    *,
+    chunk_size: int = 1000,
+    workers: int = 0,
+    include_allowed: bool = False,
+    reset: bool = False,
+    progress: Optional[Callable[[RescanStats], None]] = None,
+) -> RescanStats:
+    """
+    target('post'|'comment') 전체를 체크포인트 이후부터 재검사한다.
+    workers <= 1 이면 현재 프로세스에서, 아니면 워커 N개의 프로세스 풀에서 검사한다(DB 읽기/쓰기는 항상 현재 프로세스).
+    """
+    if reset:
+        reset_checkpoint(target)
+    stats = RescanStats(target=target)
+    batches = _stream(target, get_checkpoint(target), chunk_size)
+    t0 = time.perf_counter()
+
+    def done(rows: List[Row], verdicts: List[Verdict]) -> None:
+        stats.reported += _store(target, rows, verdicts)
+        stats.scanned += len(rows)
+        stats.elapsed = time.perf_counter() - t0
+        if progress:
+            progress(stats)
+
+    if workers <= 1:
+        matcher = get_matcher()
+        for rows in batches:
+            done(rows, _scan_batch(rows, include_allowed, matcher))
+        return stats
+
+    # 진행 중 배치 수를 제한해 메모리를 일정하게 유지하고, 결과는 제출 순서대로 반영(체크포인트 단조 증가)
+    inflight: deque = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(load_rules_snapshot(),)) as pool:
+        for rows in batches:
+            inflight.append((rows, pool.submit(_scan_batch, rows, include_allowed)))
+            if len(inflight) >= workers * 2:
+                r, fut = inflight.popleft()
+                done(r, fut.result())
+        while inflight:
+            r, fut = inflight.popleft()
+            done(r, fut.result())
+    return stats
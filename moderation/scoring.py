@@ -0,0 +1,211 @@
+"""
+ML(NSFW 등) 스코어링 서브시스템.
+
+- 백엔드(ScorerBackend): texts → scores 를 배치로 계산. MODERATION_SCORER 로 선택
+  - keyword(기본): ML 호출 없음 → check_text 는 기존 금칙어 휴리스틱만 사용
+  - http: MODERATION_SCORER_URL 에 {"texts": [...]} POST → {"scores": [...]}
+  - 그 외 문자열은 dotted path 로 import(로컬 CPU 모델, 테스트용 스텁 등)
+- MicroBatcher: 동시 요청에서 들어온 텍스트를 모아(최대 MAX_BATCH 개 또는 MAX_WAIT_MS) 백엔드를 한 번 호출하고,
+  결과를 각 호출자에게 돌려준다. 호출자는 DEADLINE_MS 까지만 기다리고, 넘기면 금칙어 점수로 대체한다.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from queue import Empty, Queue
+from typing import List, Optional, Protocol, Sequence, Tuple
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+log = logging.getLogger(__name__)
+
+
+class ScorerBackend(Protocol):
+    name: str
+
+    def score_batch(self, texts: Sequence[str]) -> List[float]:
+        """texts 와 같은 길이의 0.0~1.0 점수 목록"""
+
+
+class HttpScorer:
+    """외부 추론 서버(HF Inference, 내부 모델 서버 등) 배치 호출."""
+
+    name = "http"
+
+    def __init__(self, url: Optional[str] = None, timeout: Optional[float] = None):
+        import requests
+
+        self.url = url or settings.MODERATION_SCORER_URL
+        self.timeout = timeout or getattr(settings, "MODERATION_SCORER_HTTP_TIMEOUT_SEC", 2.0)
+        self.session = requests.Session()
+
+    def score_batch(self, texts: Sequence[str]) -> List[float]:
+        res = self.session.post(self.url, json={"texts": list(texts)}, timeout=self.timeout)
+        res.raise_for_status()
+        scores = res.json()["scores"]
+        if len(scores) != len(texts):
+            raise ValueError(f"scorer returned {len(scores)} scores for {len(texts)} texts")
+        return [float(s) for s in scores]
+
+
+def get_backend() -> Optional[ScorerBackend]:
+    # None 이면 ML 스코어링 비활성(금칙어 휴리스틱만)
+    name = getattr(settings, "MODERATION_SCORER", "keyword")
+    if not name or name == "keyword":
+        return None
+    if name == "http":
+        return HttpScorer()
+    try:
+        return import_string(name)()
+    except Exception:
+        log.exception("Failed to load moderation scorer '%s'; fallback to keyword heuristic.", name)
+        return None
+
+
+class MicroBatcher:
+    def __init__(self, backend: ScorerBackend, max_batch: int, max_wait_ms: float):
+        self.backend = backend
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self._q: Queue = Queue()
+        # 포크된 자식 프로세스(Celery prefork 등)에는 이 스레드가 없다 → _get_batcher 가 pid 로 판별해 새로 만든다
+        self.pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name="moderation-scorer", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        fut: Future = Future()
+        self._q.put((text, fut))
+        return fut
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        # 첫 항목은 기다렸다가, 이후는 max_wait 안에서 max_batch 까지 모은다
+        batch = [self._q.get()]
+        until = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = until - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._q.get(timeout=remaining))
+            except Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self._dispatch(self._collect())
+            except Exception:
+                # 어떤 오류에도 스레드는 살아 있어야 한다(죽으면 이후 호출이 모두 데드라인까지 대기)
+                log.exception("moderation scorer batcher loop failed")
+
+    def _dispatch(self, batch: List[Tuple[str, Future]]) -> None:
+        # 이미 데드라인이 지나 포기한 호출자의 항목은 보내지 않는다
+        batch = [(t, f) for t, f in batch if f.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            scores = self.backend.score_batch([t for t, _ in batch])
+            # 결과를 하나라도 넘기기 전에 길이부터 확인(일부만 채운 뒤 실패하지 않게)
+            if len(scores) != len(batch):
+                raise ValueError(f"scorer returned {len(scores)} scores for {len(batch)} texts")
+        except Exception as e:
+            log.warning("moderation scorer batch failed (%s items): %s", len(batch), e)
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for (_, fut), score in zip(batch, scores, strict=True):
+            if not fut.done():
+                fut.set_result(score)
+
+
+_UNSET = object()
+_backend = _UNSET
+_batcher: Optional[MicroBatcher] = None
+_lock = threading.Lock()
+
+
+def _get_backend() -> Optional[ScorerBackend]:
+    global _backend
+    if _backend is _UNSET:
+        with _lock:
+            if _backend is _UNSET:
+                _backend = get_backend()
+    return _backend
+
+
+def _get_batcher() -> Optional[MicroBatcher]:
+    global _batcher
+    backend = _get_backend()
+    if backend is None:
+        return None
+    pid = os.getpid()
+    if _batcher is None or _batcher.pid != pid:
+        with _lock:
+            if _batcher is None or _batcher.pid != pid:
+                _batcher = MicroBatcher(backend, batch_size(), getattr(settings, "MODERATION_SCORER_MAX_WAIT_MS", 5))
+    return _batcher
+
+
+def batch_size() -> int:
+    return max(1, getattr(settings, "MODERATION_SCORER_MAX_BATCH", 32))
+
+
+def reset() -> None:
+    """설정 변경 후 백엔드를 다시 고르게 한다(테스트/관리 명령용). 이전 배처 스레드는 대기열이 비어 있으므로 그대로 쉰다."""
+    global _backend, _batcher
+    with _lock:
+        _backend, _batcher = _UNSET, None
+
+
+def enabled() -> bool:
+    return _get_backend() is not None
+
+
+def tag() -> str:
+    # 결과 캐시 키에 들어가는 스코어러 식별자(백엔드가 바뀌면 이전 판정을 재사용하지 않음)
+    backend = _get_backend()
+    if backend is None:
+        return "keyword"
+    return getattr(backend, "name", type(backend).__name__)
+
+
+def score(text: str) -> Optional[float]:
+    """
+    ML 점수. 비활성/데드라인 초과/백엔드 오류면 None(호출 측이 금칙어 점수로 대체).
+    여러 스레드의 동시 호출이 한 번의 배치 호출로 묶인다.
+    """
+    batcher = _get_batcher()
+    if batcher is None:
+        return None
+    fut = batcher.submit(text)
+    try:
+        return fut.result(timeout=getattr(settings, "MODERATION_SCORER_DEADLINE_MS", 50) / 1000.0)
+    except FutureTimeout:
+        fut.cancel()
+        log.warning("moderation scorer deadline exceeded; using keyword score")
+    except Exception as e:
+        log.warning("moderation scorer failed; using keyword score: %s", e)
+    return None
+
+
+def score_many(texts: Sequence[str]) -> List[Optional[float]]:
+    """배치 재검사용: 배처를 거치지 않고 MAX_BATCH 단위로 백엔드를 직접 호출(실패한 묶음은 None)."""
+    backend = _get_backend()
+    if backend is None:
+        return [None] * len(texts)
+    out: List[Optional[float]] = []
+    size = batch_size()
+    for i in range(0, len(texts), size):
+        chunk = texts[i : i + size]
+        try:
+            out += backend.score_batch(chunk)
+        except Exception as e:
+            log.warning("moderation scorer batch failed (%s items): %s", len(chunk), e)
+            out += [None] * len(chunk)
+    return out
@@ -1,14 +1,19 @@
-import re
-from dataclasses import dataclass
-from typing import Dict, List
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, Iterator, List
 
 from django.core.cache import cache
 from django.db import transaction
 
+from . import scoring, verdicts
+from .matcher import CompiledMatcher, MatcherHolder
 from .models import ModerationRule, RuleType
 
 RULES_CACHE_KEY = "moderation:rules:v1"
 RULES_CACHE_TTL_SECONDS = 300
+RULES_VERSION_KEY = "moderation:rules:version"
+
+_matcher = MatcherHolder()
 
 
 @dataclass
@@ -20,17 +25,6 @@ class CheckResult:
     matches: List[dict]
 
 
-def _compile_regexes(patterns: List[str]) -> List[re.Pattern]:
-    compiled = []
-    for p in patterns:
-        try:
-            compiled.append(re.compile(p, re.IGNORECASE | re.UNICODE))
-        except re.error:
-            # 잘못된 정규식은 안전하게 skip (운영자가 수정)
-            continue
-    return compiled
-
-
 def _to_snapshot(rows: List[ModerationRule]) -> Dict:
     deny_kw = [r.pattern for r in rows if r.rule_type == RuleType.DENY_KEYWORD and r.is_active]
     deny_rx = [r.pattern for r in rows if r.rule_type == RuleType.DENY_REGEX and r.is_active]
@@ -52,44 +46,45 @@ def load_rules_snapshot(force_reload: bool = False) -> Dict:
     return snapshot
 
 
-def invalidate_rules_cache():
+def rules_version() -> str:
+    # 규칙 버전 스탬프(임의 토큰). Redis 초기화 등으로 사라지면 새 토큰을 만들어 모든 프로세스가 다시 컴파일하게 한다.
+    version = cache.get(RULES_VERSION_KEY)
+    if version is None:
+        cache.add(RULES_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(RULES_VERSION_KEY)
+    return version
+
+
+def _invalidate_now():
     cache.delete(RULES_CACHE_KEY)
+    cache.set(RULES_VERSION_KEY, uuid.uuid4().hex, None)
 
 
-def _keyword_hit(content: str, words: List[str]) -> List[str]:
-    content_lc = content.lower()
-    hits = []
-    for w in words:
-        if w.lower() in content_lc:
-            hits.append(w)
-    return hits
+def invalidate_rules_cache():
+    # 스냅샷 삭제 + 버전 스탬프 교체 → 각 프로세스는 다음 검사 때 스탬프 비교만으로 재컴파일 여부를 안다
+    _invalidate_now()
+    if transaction.get_connection().in_atomic_block:
+        # 커밋 전에 다른 프로세스가 옛 규칙을 다시 적재했을 수 있으므로 커밋 후 한 번 더 무효화
+        transaction.on_commit(_invalidate_now)
 
 
-def _regex_hit(content: str, regexes: List[re.Pattern]) -> List[str]:
-    hits = []
-    for rx in regexes:
-        if rx.search(content):
-            hits.append(rx.pattern)
-    return hits
+def get_matcher() -> CompiledMatcher:
+    """현재 규칙 버전의 컴파일된 매처(프로세스 메모리). 버전이 같으면 Redis GET 1회로 끝난다."""
+    return _matcher.get(rules_version(), load_rules_snapshot)
 
 
-def _simple_nsfw_score(text: str) -> float:
+def _simple_nsfw_score(text: str, kw_hits: List[str] | None = None) -> float:
     # 외부 ML API 연동 지점, 실제 서비스에선 여기서 HTTP 호출(HF Inference, 내부 모델 등)을 수행하나 현재는 간단한 휴리스틱(금칙어 가중치)로 대체해 인터페이스만 동일하게 유지.
-    snapshot = load_rules_snapshot()
-    deny_kw = snapshot.get("deny_keywords", [])
-    kw_hits = _keyword_hit(text, deny_kw)
+    # check_text 가 이미 스캔한 키워드 매칭(kw_hits)을 넘기면 다시 스캔하지 않는다.
+    if kw_hits is None:
+        kw_hits = get_matcher().keywords.search(text)
     base = min(len(kw_hits) * 0.2, 1.0)
     return base
 
 
-def check_text(content: str) -> CheckResult:
-    # 텍스트 기반 모더레이션: 키워드/정규식 + (대체)NSFW 스코어링
-    snapshot = load_rules_snapshot()
-    deny_kw = snapshot.get("deny_keywords", [])
-    deny_rx = _compile_regexes(snapshot.get("deny_regexes", []))
-
-    kw_hits = _keyword_hit(content, deny_kw)
-    rx_hits = _regex_hit(content, deny_rx)
+def evaluate(matcher: CompiledMatcher, content: str, ml_score: float | None = None) -> CheckResult:
+    # 텍스트 기반 모더레이션: 키워드/정규식 + (대체)NSFW 스코어링. 컴파일된 매처로 텍스트를 한 번만 스캔한다.
+    kw_hits, rx_hits = matcher.scan(content)
 
     labels = []
     matches = []
@@ -105,7 +100,8 @@ def check_text(content: str) -> CheckResult:
         matches += [{"type": "regex", "pattern": p, "severity": 2} for p in rx_hits]
         score += min(len(rx_hits) * 0.4, 1.0)
 
-    nsfw = _simple_nsfw_score(content)
+    # ML 스코어러(moderation.scoring)가 점수를 주면 그것을, 아니면(비활성/데드라인 초과) 금칙어 휴리스틱
+    nsfw = ml_score if ml_score is not None else _simple_nsfw_score(content, kw_hits)
     if nsfw >= 0.5:
         labels.append("nsfw")
     score = min(score + nsfw, 1.0)
@@ -124,6 +120,52 @@ def check_text(content: str) -> CheckResult:
     return CheckResult(allowed=allowed, verdict=verdict, labels=sorted(set(labels)), score=score, matches=matches)
 
 
+def check_text(content: str) -> CheckResult:
+    """
+    정규화 텍스트 해시 + 규칙 버전으로 결과를 캐시한다(moderation.verdicts).
+    같은 문구의 반복 제출은 매칭 없이 캐시 조회로 끝난다.
+    """
+    version = rules_version()
+    text = verdicts.normalize(content)
+    key = verdicts.digest(text)
+    cache_version = f"{version}:{scoring.tag()}"
+    hit = verdicts.get(cache_version, key)
+    if hit is not None:
+        return CheckResult(**hit)
+    # ML 점수는 동시 요청과 묶여 배치로 계산되며, 데드라인을 넘기면 None → 금칙어 점수로 대체
+    ml = scoring.score(text)
+    result = evaluate(_matcher.get(version, load_rules_snapshot), text, ml)
+    if ml is not None or not scoring.enabled():
+        # 대체 점수로 낸 판정은 캐시하지 않는다(다음 제출에서 ML 점수로 다시 판정)
+        verdicts.put(cache_version, key, asdict(result))
+    return result
+
+
+def check_texts(contents: Iterable[str]) -> Iterator[CheckResult]:
+    """
+    배치 검사(백필/재검사용). 규칙 버전 확인과 매처 조회를 한 번만 하고 입력 순서대로 결과를 흘려보낸다.
+    입력을 모두 메모리에 올리지 않으므로 큰 이터레이터에도 쓸 수 있다.
+    """
+    # 대량 재검사는 대부분 서로 다른 문서이므로 결과 캐시를 거치지 않는다(캐시 오염 방지)
+    # ML 점수는 배처를 거치지 않고 MAX_BATCH 단위로 직접 배치 호출
+    matcher = get_matcher()
+    for chunk in _chunks(contents, scoring.batch_size()):
+        texts = [verdicts.normalize(c) for c in chunk]
+        for text, ml in zip(texts, scoring.score_many(texts), strict=True):
+            yield evaluate(matcher, text, ml)
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[List]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
 @transaction.atomic
 def upsert_rule(rule_type: str, pattern: str, lang: str = "*", severity: int = 1, description: str = "") -> ModerationRule:
     obj, _ = ModerationRule.objects.update_or_create(
@@ -0,0 +1,69 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from comments.models import Comment
+from moderation import rescan
+from moderation.models import ModerationReport, ModerationRule, RuleType
+from moderation.services import check_texts, invalidate_rules_cache
+from posts.models import Post
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def _rules():
+    ModerationRule.objects.all().delete()
+    ModerationRule.objects.create(rule_type=RuleType.DENY_KEYWORD, pattern="scamword", lang="*")
+    invalidate_rules_cache()
+    for t in rescan.TARGETS:
+        rescan.reset_checkpoint(t)
+    yield
+    for t in rescan.TARGETS:
+        rescan.reset_checkpoint(t)
+
+
+@pytest.fixture
+def posts():
+    author = User.objects.create()
+    return [Post.objects.create(author=author, content=("scamword inside" if i % 3 == 0 else f"clean text {i}")) for i in range(9)]
+
+
+class TestCheckTexts:
+    def test_results_in_input_order(self):
+        res = list(check_texts(["clean", "a scamword here", "", None]))
+        assert [r.verdict for r in res] == ["allow", "block", "allow", "allow"]
+
+
+class TestRescan:
+    def test_reports_only_violations_and_checkpoints(self, posts):
+        stats = rescan.rescan("post", chunk_size=2)
+        assert stats.scanned == 9 and stats.reported == 3
+        assert ModerationReport.objects.filter(target_type="post", verdict="block").count() == 3
+        assert rescan.get_checkpoint("post") == str(max(p.id for p in posts))
+
+        # 체크포인트 이후 새 문서가 없으면 아무것도 다시 보지 않음
+        assert rescan.rescan("post").scanned == 0
+        assert rescan.rescan("post", reset=True).scanned == 9
+
+    def test_resume_from_checkpoint(self, posts):
+        ordered = sorted(posts, key=lambda p: p.id)
+        rescan.cache.set(rescan.CHECKPOINT_KEY.format(target="post"), str(ordered[3].id), None)
+        stats = rescan.rescan("post", include_allowed=True)
+        assert stats.scanned == 5
+        assert set(ModerationReport.objects.values_list("target_id", flat=True)) == {p.id for p in ordered[4:]}
+
+    def test_process_pool(self, posts):
+        stats = rescan.rescan("post", chunk_size=2, workers=2)
+        assert stats.scanned == 9 and stats.reported == 3
+
+    def test_command_covers_comments(self, posts):
+        Comment.objects.create(post=posts[1], user=posts[1].author, content="scamword reply")
+        out = StringIO()
+        call_command("rescan_content", "--target", "all", stdout=out)
+        assert ModerationReport.objects.filter(target_type="comment").count() == 1
+        assert "docs/s" in out.getvalue()
@@ -0,0 +1,74 @@
+"""
+검사 결과(verdict) 캐시: 정규화한 텍스트의 해시 + 규칙 버전 → CheckResult.
+
+- 1차: 프로세스 메모리 LRU(MODERATION_VERDICT_LOCAL_SIZE 개로 제한)
+- 2차: Redis(django cache), TTL MODERATION_VERDICT_TTL_SEC
+키에 규칙 버전 스탬프가 들어가므로 upsert_rule 등으로 버전이 바뀌는 즉시 이전 결과는 조회되지 않는다(남은 키는 TTL 로 정리).
+같은 문구가 반복되는 스팸/복붙 물결은 첫 검사 이후 해시 계산 + 조회만으로 끝난다.
+"""
+
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERDICT_KEY = "moderation:verdict:{version}:{digest}"
+
+
+def normalize(content: str) -> str:
+    # 판정은 정규화된 텍스트로 하므로 같은 정규형이면 결과도 같다(캐시 공유가 안전).
+    # NFC: 조합형/분해형 한글·악센트 차이 제거, strip: 앞뒤 공백 차이 제거
+    return unicodedata.normalize("NFC", content or "").strip()
+
+
+def digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class LocalLRU:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[Dict]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value: Dict) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_local = LocalLRU(getattr(settings, "MODERATION_VERDICT_LOCAL_SIZE", 10000))
+
+
+def get(version: str, key: str) -> Optional[Dict]:
+    hit = _local.get((version, key))
+    if hit is not None:
+        return hit
+    hit = cache.get(VERDICT_KEY.format(version=version, digest=key))
+    if hit is not None:
+        _local.set((version, key), hit)
+    return hit
+
+
+def put(version: str, key: str, verdict: Dict) -> None:
+    _local.set((version, key), verdict)
+    cache.set(VERDICT_KEY.format(version=version, digest=key), verdict, getattr(settings, "MODERATION_VERDICT_TTL_SEC", 3600))
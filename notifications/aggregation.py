@@ -0,0 +1,120 @@
+"""
+알림 집계(접기): 인기 게시물의 좋아요/리포스트처럼 같은 대상에 몰리는 이벤트를
+(수신자, 종류, 대상, 시간 창) 단위로 Notification 한 행에 모은다.
+
+- 시간 창: floor(epoch / NOTIFICATION_AGGREGATE_WINDOW_SEC). group_key = "{kind}:{target}:{window}"
+- 기록: INSERT ... ON CONFLICT (user_id, group_key) DO UPDATE 한 문장으로 count 누적 + 행위자 표본(앞쪽 N명) 보충 + 다시 안 읽음 처리
+  (새 행이거나 읽었던 행이 다시 안 읽음이 되면 안 읽은 수 카운터 +1)
+- 푸시: 창의 첫 이벤트(행이 새로 만들어진 경우)만 push_aggregate 를 NOTIFICATION_AGGREGATE_PUSH_DELAY_SEC 뒤로 예약한다.
+  예약된 푸시는 그 시점의 누적 수로 "Alice and 1,203 others liked your post." 를 보낸다 → 창마다 푸시 최대 1번.
+"""
+
+import json
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from . import broadcast, preferences, unread
+from .models import Notification
+
+
+@dataclass(frozen=True)
+class Kind:
+    type: str  # Notification.type(설정 키)
+    title: str
+    one: str
+    many: str
+
+
+KINDS: Dict[str, Kind] = {
+    "like": Kind("like", "New like", "{actor} liked your post.", "{actor} and {others:,} others liked your post."),
+    # 리포스트는 기존 설정 키셋을 유지하기 위해 'post' 타입으로 매핑
+    "repost": Kind("post", "Reposted", "{actor} reposted your post.", "{actor} and {others:,} others reposted your post."),
+}
+
+# prev: 문장 시작 시점의 기존 행 읽음 여부(CTE 는 INSERT 전 스냅샷을 본다) → 읽었던 집계 행이 다시 안 읽음이 됐는지 판단
+# actors: 기존 표본 뒤에 새 행위자를 이어 붙이되 처음 나온 순서로 중복을 지우고 sample 명까지만 남긴다
+_UPSERT_SQL = """
+WITH prev AS (SELECT is_read FROM notifications WHERE user_id = %(user_id)s AND group_key = %(group_key)s)
+INSERT INTO notifications (id, user_id, type, payload, is_read, created_at, updated_at, group_key, count, actors)
+VALUES (%(id)s, %(user_id)s, %(type)s, %(payload)s, false, %(now)s, %(now)s, %(group_key)s, %(count)s, %(actors)s)
+ON CONFLICT (user_id, group_key) WHERE group_key <> '' DO UPDATE SET
+    count = notifications.count + EXCLUDED.count,
+    actors = CASE WHEN jsonb_array_length(notifications.actors) >= %(sample)s THEN notifications.actors ELSE (
+        SELECT COALESCE(jsonb_agg(a ORDER BY pos), '[]'::jsonb) FROM (
+            SELECT a, min(ord) AS pos FROM jsonb_array_elements(notifications.actors || EXCLUDED.actors) WITH ORDINALITY AS e(a, ord)
+            GROUP BY a ORDER BY pos LIMIT %(sample)s
+        ) AS firsts
+    ) END,
+    payload = EXCLUDED.payload,
+    is_read = false,
+    updated_at = EXCLUDED.updated_at
+RETURNING id, (xmax = 0) AS inserted, COALESCE((SELECT is_read FROM prev), false) AS was_read, created_at, count, actors
+"""
+
+
+def window_key(kind: str, target: str, at=None) -> str:
+    window = max(1, settings.NOTIFICATION_AGGREGATE_WINDOW_SEC)
+    at = at or timezone.now()
+    return f"{kind}:{target}:{int(at.timestamp()) // window}"
+
+
+def record(*, user_id, kind: str, target: str, actor_ids: Sequence[str], data: Dict) -> Optional[str]:
+    """
+    이벤트 len(actor_ids) 개를 집계 행에 더한다. 수신 거부면 None.
+    창의 첫 기록이면 지연 푸시를 예약하고 알림 id 를 돌려준다(이후 기록도 같은 id).
+    """
+    spec = KINDS[kind]
+    if not actor_ids or not preferences.allowed(user_id, spec.type):
+        return None
+
+    sample = settings.NOTIFICATION_AGGREGATE_SAMPLE
+    actors = list(dict.fromkeys(str(a) for a in actor_ids))[:sample]
+    now = timezone.now()
+    params = {
+        "id": uuid.uuid4(),
+        "user_id": user_id,
+        "type": spec.type,
+        "payload": json.dumps({**data, "kind": kind, "target": target}),
+        "now": now,
+        "group_key": window_key(kind, target, now),
+        "count": len(actor_ids),
+        "actors": json.dumps(actors),
+        "sample": sample,
+    }
+    with connection.cursor() as cur:
+        cur.execute(_UPSERT_SQL, params)
+        notification_id, inserted, was_read, created_at, count, sampled = cur.fetchone()
+    if inserted or was_read:
+        unread.add([user_id])
+    # 열린 소켓에는 갱신된 행을 바로 보낸다(푸시와 달리 창마다 1번으로 제한하지 않음)
+    note = Notification(
+        id=notification_id,
+        user_id=user_id,
+        type=spec.type,
+        payload=json.loads(params["payload"]),
+        created_at=created_at,
+        updated_at=now,
+        count=count,
+        actors=json.loads(sampled) if isinstance(sampled, str) else sampled,
+    )
+    broadcast.publish([note])
+
+    if inserted:
+        from .tasks import push_aggregate
+
+        # 지연 동안 들어온 이벤트까지 합친 수로 보낸다(eager 모드에서는 즉시 실행)
+        push_aggregate.apply_async(args=(str(notification_id),), countdown=max(0, settings.NOTIFICATION_AGGREGATE_PUSH_DELAY_SEC))
+    return str(notification_id)
+
+
+def render(kind: str, count: int, actor_names: Sequence[str]) -> tuple:
+    """(title, body). 첫 행위자 이름 + 나머지 수."""
+    spec = KINDS[kind]
+    actor = actor_names[0] if actor_names else "Someone"
+    body = spec.one.format(actor=actor) if count <= 1 else spec.many.format(actor=actor, others=count - 1)
+    return spec.title, body
@@ -0,0 +1,97 @@
+"""
+인앱 알림 실시간 전달: FeedConsumer 가 잡고 있는 사용자 소켓에 `notification.new` 메시지로 다중화한다.
+
+- publish(notes): 만들어지거나(집계 행은) 갱신된 알림을 사용자별로 묶어 그룹(user_feed_group)마다 group_send 1번.
+  전체 전송은 이벤트 루프 진입 1번(async_to_sync)으로 끝낸다. 트랜잭션 안이면 커밋 후에 보낸다.
+- 메시지: {"items": [NotificationOut, ...], "cursor": "..."}.
+  cursor 는 (updated_at, id) 위치다. 재연결한 클라이언트가 마지막 cursor 로 `notifications.resume` 을 보내면
+  since() 가 그 이후 변경분을 오래된 순으로 돌려준다(has_more 면 받은 cursor 로 다시 요청).
+- 채널 레이어 장애는 알림 저장/푸시를 막지 않는다(로그만 남김, 클라이언트는 resume 으로 따라잡음).
+"""
+
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from realtime.groups import user_feed_group
+
+from .models import Notification
+from .serializers import NotificationOut
+
+log = logging.getLogger(__name__)
+
+MESSAGE_TYPE = "notification.new"
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MICRO = timedelta(microseconds=1)
+
+
+def make_cursor(updated_at: datetime, pk) -> str:
+    # 마이크로초 정수(부동소수 변환 없이) + id: DB 의 (updated_at, id) 와 정확히 같은 위치
+    return f"{(updated_at - _EPOCH) // _MICRO}:{pk}"
+
+
+def parse_cursor(cursor: str) -> Optional[Tuple[datetime, uuid.UUID]]:
+    try:
+        micros, pk = cursor.split(":", 1)
+        return _EPOCH + int(micros) * _MICRO, uuid.UUID(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _batch(notes: List[Notification]) -> Dict:
+    last = max(notes, key=lambda n: (n.updated_at, str(n.id)))
+    return {"items": [dict(item) for item in NotificationOut(notes, many=True).data], "cursor": make_cursor(last.updated_at, last.id)}
+
+
+def _send_all(messages: Dict[str, Dict]) -> None:
+    layer = get_channel_layer()
+    if layer is None or not messages:
+        return
+
+    async def send():
+        for user_id, payload in messages.items():
+            await layer.group_send(user_feed_group(user_id), {"type": MESSAGE_TYPE, "payload": payload})
+
+    try:
+        async_to_sync(send)()
+    except Exception as e:
+        log.warning("notification websocket publish failed for %s users: %s", len(messages), e)
+
+
+def publish(notes: Iterable[Notification]) -> None:
+    if not getattr(settings, "NOTIFICATION_WS_ENABLED", True):
+        return
+    by_user: Dict[str, List[Notification]] = defaultdict(list)
+    for n in notes:
+        by_user[str(n.user_id)].append(n)
+    if not by_user:
+        return
+    messages = {user_id: _batch(user_notes) for user_id, user_notes in by_user.items()}
+    transaction.on_commit(lambda: _send_all(messages))
+
+
+def since(user_id, cursor: Optional[str], limit: Optional[int] = None) -> Dict:
+    """cursor 이후 생성/갱신된 알림(오래된 순, 최대 limit 개). cursor 가 없거나 잘못되면 최신 limit 개."""
+    limit = max(1, limit or getattr(settings, "NOTIFICATION_WS_RESUME_LIMIT", 100))
+    qs = Notification.objects.filter(user_id=user_id)
+    pos = parse_cursor(cursor) if cursor else None
+    if pos is None:
+        notes = list(qs.order_by("-updated_at", "-id")[:limit])[::-1]
+        has_more = False
+    else:
+        at, pk = pos
+        notes = list(qs.filter(Q(updated_at__gt=at) | Q(updated_at=at, id__gt=pk)).order_by("updated_at", "id")[: limit + 1])
+        has_more = len(notes) > limit
+        notes = notes[:limit]
+    if not notes:
+        return {"items": [], "cursor": cursor or "", "has_more": False}
+    return {**_batch(notes), "has_more": has_more}
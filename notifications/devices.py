@@ -0,0 +1,113 @@
+"""
+디바이스 토큰 레지스트리 캐시(푸시 경로에서 devices 테이블 조회 제거).
+
+- Redis 해시 notif:devices:{user} : 플랫폼 → 활성 토큰 JSON 목록, 채움 표시 "_f"(토큰이 없는 사용자도 캐시).
+- tokens_for(user_ids): 사용자 묶음 전체를 파이프라인 HMGET 한 번으로 읽고, 미스난 사용자만 DB 한 번 조회 후 채운다.
+- 무효화: 토큰이 등록/비활성화되는 곳(DeviceViewSet.perform_create/destroy, 공급자 피드백의 deliver)에서 해당 사용자 키를 지운다.
+  지금 한 번, 커밋 후 한 번 더(그 사이 이전 값으로 다시 채워진 경우 대비). 나머지 어긋남은 TTL 로 정리.
+Redis 장애 시 DB 로 대체.
+"""
+
+import json
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+import redis
+from django.conf import settings
+from django.db import transaction
+
+from .models import Device
+
+log = logging.getLogger(__name__)
+
+PLATFORMS = tuple(Device.Platform.values)
+FILLED = "_f"
+
+Tokens = List[Tuple[str, str]]  # [(platform, token)]
+
+
+class DeviceCache:
+    KEY = "notif:devices:{user}"
+
+    def __init__(self, url: str):
+        self.r = redis.Redis.from_url(url, decode_responses=True)
+
+    @property
+    def ttl(self) -> int:
+        return getattr(settings, "NOTIFICATION_DEVICE_CACHE_TTL_SEC", 86400)
+
+    def get_many(self, user_ids: List[str]) -> Dict[str, Tokens]:
+        """캐시에 있는 사용자만 담아 돌려준다(없는 사용자 = 미스)."""
+        pipe = self.r.pipeline(transaction=False)
+        for uid in user_ids:
+            pipe.hmget(self.KEY.format(user=uid), *PLATFORMS, FILLED)
+        out: Dict[str, Tokens] = {}
+        for uid, values in zip(user_ids, pipe.execute(), strict=True):
+            if values[-1] is None:
+                continue
+            out[uid] = [(platform, t) for platform, raw in zip(PLATFORMS, values[:-1], strict=True) if raw for t in json.loads(raw)]
+        return out
+
+    def set_many(self, tokens: Dict[str, Tokens]) -> None:
+        pipe = self.r.pipeline(transaction=False)
+        for uid, pairs in tokens.items():
+            by_platform: Dict[str, List[str]] = defaultdict(list)
+            for platform, token in pairs:
+                by_platform[platform].append(token)
+            key = self.KEY.format(user=uid)
+            pipe.delete(key)
+            pipe.hset(key, mapping={**{p: json.dumps(t) for p, t in by_platform.items()}, FILLED: 1})
+            pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def delete(self, user_ids: Iterable[str]) -> None:
+        keys = [self.KEY.format(user=uid) for uid in user_ids]
+        if keys:
+            self.r.delete(*keys)
+
+
+_cache = DeviceCache(settings.REDIS_URL)
+
+
+def _load(user_ids: Iterable[str]) -> Dict[str, Tokens]:
+    out: Dict[str, Tokens] = {uid: [] for uid in user_ids}
+    for uid, platform, token in Device.objects.filter(user_id__in=list(out), is_active=True).values_list("user_id", "platform", "device_token"):
+        out[str(uid)].append((platform, token))
+    return out
+
+
+def tokens_for(user_ids: Iterable) -> Dict[str, Tokens]:
+    """사용자 → 활성 [(platform, token)]. 모두 캐시에 있으면 DB 조회 없음."""
+    ids = list(dict.fromkeys(str(u) for u in user_ids))
+    if not ids:
+        return {}
+    try:
+        found = _cache.get_many(ids)
+    except redis.RedisError as e:
+        log.warning("device token cache unavailable, reading DB: %s", e)
+        return _load(ids)
+    missing = [uid for uid in ids if uid not in found]
+    if missing:
+        loaded = _load(missing)
+        try:
+            _cache.set_many(loaded)
+        except redis.RedisError as e:
+            log.warning("device token cache fill failed: %s", e)
+        found.update(loaded)
+    return found
+
+
+def invalidate(user_ids: Iterable) -> None:
+    ids = {str(u) for u in user_ids}
+    if not ids:
+        return
+
+    def _drop():
+        try:
+            _cache.delete(ids)
+        except redis.RedisError as e:
+            log.warning("device token cache invalidation failed for %s users: %s", len(ids), e)
+
+    _drop()
+    transaction.on_commit(_drop)
@@ -0,0 +1,143 @@
+"""
+로컬 가짜 푸시 서버(벤치마크/테스트용). 둘 다 HTTP/2 평문(h2c, prior knowledge)만 말한다.
+
+- FakeApnsServer: POST /3/device/{token}. invalid_prefix 로 시작하는 토큰은 410 Unregistered.
+- FakeFcmServer : POST /v1/projects/{project}/messages:send (FCM HTTP v1). invalid_prefix 토큰은 404 UNREGISTERED.
+
+요청마다 지연(latency_ms) 후 응답하며 스트림은 연결 안에서 동시에 처리한다(HTTP/2 다중화).
+connections(연결 수), requests(요청 수), max_streams(한 연결에서 동시에 열린 스트림 최댓값)로
+클라이언트의 연결 재사용과 스트림 다중화 여부가 드러난다.
+"""
+
+import json
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Tuple
+
+import h2.config
+import h2.connection
+import h2.events
+import h2.exceptions
+
+
+class _FakeH2Server(ABC):
+    def __init__(self, latency_ms: float = 5.0, invalid_prefix: str = "bad-", workers: int = 256):
+        self.latency = latency_ms / 1000.0
+        self.invalid_prefix = invalid_prefix
+        self.requests = 0
+        self.connections = 0
+        self.max_streams = 0
+        self._lock = threading.Lock()
+        self._workers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fake-push")
+        self._sock = socket.create_server(("127.0.0.1", 0))
+        self._closed = False
+        self._thread = threading.Thread(target=self._accept, daemon=True)
+
+    @abstractmethod
+    def respond(self, path: str, body: bytes) -> Tuple[int, Dict]:
+        """(상태 코드, JSON 본문)"""
+
+    @property
+    def url(self) -> str:
+        host, port = self._sock.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._closed = True
+        self._sock.close()
+        self._workers.shutdown(wait=False, cancel_futures=True)
+
+    def _accept(self) -> None:
+        while not self._closed:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            with self._lock:
+                self.connections += 1
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, sock: socket.socket) -> None:
+        conn = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+        send_lock = threading.Lock()
+        streams: Dict[int, Tuple[str, bytearray]] = {}
+        in_flight = [0]
+
+        def flush() -> None:
+            data = conn.data_to_send()
+            if data:
+                sock.sendall(data)
+
+        def reply(stream_id: int, path: str, body: bytes) -> None:
+            time.sleep(self.latency)
+            status, payload = self.respond(path, body)
+            raw = json.dumps(payload).encode()
+            with self._lock:
+                self.requests += 1
+            with send_lock:
+                in_flight[0] -= 1
+                try:
+                    conn.send_headers(stream_id, [(":status", str(status)), ("content-type", "application/json"), ("content-length", str(len(raw)))])
+                    conn.send_data(stream_id, raw, end_stream=True)
+                    flush()
+                except (OSError, h2.exceptions.H2Error):
+                    pass
+
+        with send_lock:
+            conn.initiate_connection()
+            flush()
+        try:
+            while True:
+                data = sock.recv(65535)
+                if not data:
+                    return
+                with send_lock:
+                    events = conn.receive_data(data)
+                    for event in events:
+                        if isinstance(event, h2.events.RequestReceived):
+                            headers = {k.decode() if isinstance(k, bytes) else k: v.decode() if isinstance(v, bytes) else v for k, v in event.headers}
+                            streams[event.stream_id] = (headers[":path"], bytearray())
+                        elif isinstance(event, h2.events.DataReceived):
+                            streams[event.stream_id][1].extend(event.data)
+                            conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                        elif isinstance(event, h2.events.StreamEnded):
+                            path, body = streams.pop(event.stream_id)
+                            in_flight[0] += 1
+                            with self._lock:
+                                self.max_streams = max(self.max_streams, in_flight[0])
+                            self._workers.submit(reply, event.stream_id, path, bytes(body))
+                        elif isinstance(event, h2.events.ConnectionTerminated):
+                            flush()
+                            return
+                    flush()
+        except (OSError, h2.exceptions.H2Error):
+            return
+        finally:
+            sock.close()
+
+
+class FakeApnsServer(_FakeH2Server):
+    def respond(self, path, body):
+        token = path.rsplit("/", 1)[-1]
+        if token.startswith(self.invalid_prefix):
+            return 410, {"reason": "Unregistered"}
+        return 200, {}
+
+
+class FakeFcmServer(_FakeH2Server):
+    def respond(self, path, body):
+        project = path.split("/")[3] if path.count("/") >= 4 else ""
+        token = json.loads(body or b"{}").get("message", {}).get("token", "")
+        if token.startswith(self.invalid_prefix):
+            error = {"code": 404, "status": "NOT_FOUND", "details": [{"@type": "type.googleapis.com/google.firebase.fcm.v1.FcmError", "errorCode": "UNREGISTERED"}]}
+            return 404, {"error": error}
+        with self._lock:
+            n = self.requests
+        return 200, {"name": f"projects/{project}/messages/{n}"}
@@ -0,0 +1,63 @@
+import time
+
+import httpx
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from notifications.fake_push_server import FakeApnsServer, FakeFcmServer
+from notifications.providers import ApnsProvider, FcmProvider, reset_providers
+
+# 공급자별 (가짜 서버, 공급자, 토큰 → 요청 경로, 플랫폼)
+SERVERS = {
+    "apns": (FakeApnsServer, ApnsProvider, lambda t: f"/3/device/{t}", "ios"),
+    "fcm": (FakeFcmServer, FcmProvider, lambda t: "/v1/projects/local/messages:send", "android"),
+}
+
+
+class Command(BaseCommand):
+    help = "Benchmark APNs/FCM delivery against a local fake HTTP/2 server: client-per-call serial sends vs the pooled, multiplexed provider."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--provider", choices=sorted(SERVERS), default="apns")
+        parser.add_argument("--tokens", type=int, default=2000)
+        parser.add_argument("--batch", type=int, default=500, help="Tokens per send_batch call.")
+        parser.add_argument("--latency-ms", type=float, default=5.0, help="Fake server latency per request.")
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--pool-size", type=int, default=8)
+        parser.add_argument("--invalid-ratio", type=float, default=0.05, help="Share of tokens answered as unregistered (APNs 410 / FCM UNREGISTERED).")
+
+    def handle(self, *args, **opts):
+        n = opts["tokens"]
+        step = max(1, int(1 / opts["invalid_ratio"])) if opts["invalid_ratio"] > 0 else 0
+        tokens = [f"bad-{i}" if step and i % step == 0 else f"tok-{i}" for i in range(n)]
+        batches = [tokens[i : i + opts["batch"]] for i in range(0, n, opts["batch"])]
+
+        server_cls, provider_cls, path, platform = SERVERS[opts["provider"]]
+        with server_cls(latency_ms=opts["latency_ms"]) as server:
+            # 이전 방식: 호출마다 새 클라이언트 + 토큰 직렬 전송(HTTP/2 지만 스트림 1개씩)
+            t0 = time.perf_counter()
+            ok = 0
+            for batch in batches:
+                with httpx.Client(http1=False, http2=True) as client:
+                    for t in batch:
+                        ok += client.post(server.url + path(t), json={"message": {"token": t}}).status_code == 200
+            self._report("serial", n, ok, time.perf_counter() - t0, server)
+
+            # 영구 연결 풀 + 동시 전송(연결당 여러 스트림)
+            server.connections = server.max_streams = 0
+            with override_settings(PUSH_CONCURRENCY=opts["concurrency"], PUSH_POOL_SIZE=opts["pool_size"], APNS_AUTH_KEY_PATH=""):
+                reset_providers()
+                provider = provider_cls(endpoint=server.url)
+                t0 = time.perf_counter()
+                ok = invalid = 0
+                for batch in batches:
+                    res = provider.send_batch(platform, batch, "title", "body", {})
+                    ok += res.success
+                    invalid += len(res.invalid_tokens)
+                elapsed = time.perf_counter() - t0
+                provider.close()
+                reset_providers()
+            self._report("pooled", n, ok, elapsed, server, f" invalid={invalid}")
+
+    def _report(self, mode, n, ok, elapsed, server, extra=""):
+        self.stdout.write(f"{mode}: {n} tokens in {elapsed:.2f}s ({n / elapsed:.0f} tokens/s), ok={ok}, connections={server.connections} max_streams={server.max_streams}{extra}")
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from notifications.retention import sweep
+
+
+class Command(BaseCommand):
+    help = "Delete notifications older than NOTIFICATION_RETENTION_DAYS in bounded batches, optionally archiving them to gzip JSON Lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None, help="Retention in days (default: NOTIFICATION_RETENTION_DAYS).")
+        parser.add_argument("--batch-size", type=int, default=None, help="Rows per DELETE (default: NOTIFICATION_RETENTION_BATCH).")
+        parser.add_argument("--max-batches", type=int, default=None, help="Stop after N batches (default: until nothing is left).")
+        parser.add_argument("--archive-dir", default=None, help="Write each deleted batch to <dir>/notifications-YYYY-MM-<id>.jsonl.gz (default: NOTIFICATION_ARCHIVE_DIR).")
+
+    def handle(self, *args, **opts):
+        def progress(stats):
+            self.stdout.write(f"deleted={stats.deleted} batches={stats.batches} ({stats.elapsed:.1f}s)")
+
+        stats = sweep(days=opts["days"], batch=opts["batch_size"], max_batches=opts["max_batches"], archive_dir=opts["archive_dir"], progress=progress)
+        archived = f" Archived to {', '.join(stats.archived)}." if stats.archived else ""
+        self.stdout.write(self.style.SUCCESS(f"Purged {stats.deleted} old notifications in {stats.batches} batches.{archived}"))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:40
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_notification_inbox_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['created_at'], name='brin_notifications_created'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 import uuid
 
 from django.conf import settings
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
 from django.utils import timezone
 
@@ -49,7 +50,24 @@ class Notification(models.Model):
     payload = models.JSONField()
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(default=timezone.now)
+    # 집계 알림(notifications.aggregation): 같은 (수신자, 종류, 대상, 시간 창)의 이벤트를 한 행으로 접는다.
+    # group_key 가 빈 문자열이면 일반(비집계) 알림
+    group_key = models.CharField(max_length=200, default="", blank=True)
+    count = models.PositiveIntegerField(default=1)
+    actors = models.JSONField(default=list, blank=True)  # 앞쪽 행위자 id 표본(최대 NOTIFICATION_AGGREGATE_SAMPLE)
+    updated_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         db_table = "notifications"
-        indexes = [models.Index(fields=["user", "is_read", "-created_at"])]
+        indexes = [
+            models.Index(fields=["user", "is_read", "-created_at"]),
+            # 읽음 필터 없는 알림함 목록(커서 페이지네이션 정렬과 동일)
+            models.Index(fields=["user", "-created_at", "-id"], name="idx_notifications_user_inbox"),
+            # 보존 기간 스윕(notifications.retention): created_at 은 삽입 순서와 거의 같아 BRIN 이 작고 쓰기 비용도 낮다
+            BrinIndex(fields=["created_at"], name="brin_notifications_created"),
+            # WebSocket 재연결 따라잡기(notifications.broadcast.since): (updated_at, id) 이후 변경분
+            models.Index(fields=["user", "updated_at", "id"], name="idx_notifications_user_updated"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["user", "group_key"], condition=~models.Q(group_key=""), name="uq_notifications_user_group"),
+        ]
@@ -0,0 +1,9 @@
+from rest_framework.pagination import CursorPagination
+
+
+class NotificationCursorPagination(CursorPagination):
+    # 알림함 keyset 페이지네이션: (user, is_read, -created_at) 인덱스를 따라 OFFSET 없이 이어서 읽기
+    page_size = 20
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
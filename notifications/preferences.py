@@ -0,0 +1,114 @@
+"""
+알림 설정(타입별 수신 여부) 조회.
+
+- 여러 사용자: SQL 한 번. 사용자 ⟕ notification_settings LEFT JOIN 에 COALESCE(플래그, 기본값) 를 걸어 허용된 id 만 values_list 로 받는다.
+  설정 행이 없는 사용자는 모델 기본값(True)을 따른다.
+- 한 사용자: Redis 해시 notif:settings:{user} (플래그 → "1"/"0") 를 먼저 보고, 없을 때만 DB 에서 채운다.
+  NotificationSettingViewSet.update 가 커밋 후 해시를 지운다. Redis 장애 시 DB 로 대체.
+"""
+
+import logging
+from typing import Dict, Iterable, List
+
+import redis
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import BooleanField, F, QuerySet, Value
+from django.db.models.functions import Coalesce
+
+from .models import NotificationSetting
+
+log = logging.getLogger(__name__)
+
+User = get_user_model()
+
+FLAGS = ("follow", "post", "comment", "like")
+
+
+def _default(flag: str) -> bool:
+    return NotificationSetting._meta.get_field(flag).default
+
+
+def filter_allowed(qs: QuerySet, user_path: str, notif_type: str) -> QuerySet:
+    """
+    qs 를 해당 타입 알림을 허용한 사용자로 좁힌다(LEFT JOIN + COALESCE).
+    user_path: qs 모델에서 사용자까지의 경로(User 자신이면 "", 팔로우의 팔로워면 "follower__").
+    """
+    if notif_type not in FLAGS:
+        return qs.none()
+    allowed = Coalesce(F(f"{user_path}notificationsetting__{notif_type}"), Value(_default(notif_type)), output_field=BooleanField())
+    return qs.alias(_allowed=allowed).filter(_allowed=True)
+
+
+def eligible_user_ids(user_ids: Iterable, notif_type: str) -> List[str]:
+    ids = {str(u) for u in user_ids}
+    if not ids:
+        return []
+    return [str(u) for u in filter_allowed(User.objects.filter(id__in=ids), "", notif_type).values_list("id", flat=True)]
+
+
+class PreferenceCache:
+    KEY = "notif:settings:{user}"
+
+    def __init__(self, url: str):
+        self.r = redis.Redis.from_url(url, decode_responses=True)
+
+    @property
+    def ttl(self) -> int:
+        return getattr(settings, "NOTIFICATION_SETTINGS_CACHE_TTL_SEC", 3600)
+
+    def get(self, user_id: str) -> Dict[str, bool] | None:
+        raw = self.r.hgetall(self.KEY.format(user=user_id))
+        return {f: raw[f] == "1" for f in FLAGS if f in raw} if raw else None
+
+    def set(self, user_id: str, flags: Dict[str, bool]) -> None:
+        key = self.KEY.format(user=user_id)
+        pipe = self.r.pipeline()
+        pipe.hset(key, mapping={f: "1" if v else "0" for f, v in flags.items()})
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def delete(self, user_id: str) -> None:
+        self.r.delete(self.KEY.format(user=user_id))
+
+
+_cache = PreferenceCache(settings.REDIS_URL)
+
+
+def _load(user_id: str) -> Dict[str, bool]:
+    row = NotificationSetting.objects.filter(user_id=user_id).values(*FLAGS).first()
+    return row or {f: _default(f) for f in FLAGS}
+
+
+def flags_for(user_id) -> Dict[str, bool]:
+    user_id = str(user_id)
+    try:
+        flags = _cache.get(user_id)
+        if flags is not None:
+            return flags
+    except redis.RedisError as e:
+        log.warning("notification settings cache unavailable, reading DB: %s", e)
+        return _load(user_id)
+    flags = _load(user_id)
+    try:
+        _cache.set(user_id, flags)
+    except redis.RedisError as e:
+        log.warning("notification settings cache fill failed: %s", e)
+    return flags
+
+
+def allowed(user_id, notif_type: str) -> bool:
+    return notif_type in FLAGS and flags_for(user_id).get(notif_type, _default(notif_type))
+
+
+def invalidate(user_id) -> None:
+    def _drop():
+        try:
+            _cache.delete(str(user_id))
+        except redis.RedisError as e:
+            log.warning("notification settings cache invalidation failed for %s: %s", user_id, e)
+
+    # 지금 지우고, 커밋 후 한 번 더(그 사이 이전 값으로 다시 채워진 경우 대비)
+    _drop()
+    transaction.on_commit(_drop)
@@ -1,78 +1,264 @@
-from typing import Dict, Iterable, Protocol, Tuple
+"""
+푸시 전송 엔진.
+
+- 공급자 인스턴스는 프로세스당 하나(get_provider)라 HTTP 연결 풀/인증 토큰을 호출 사이에 재사용한다.
+  두 공급자 모두 httpx HTTP/2 전용 클라이언트(영구 연결, 토큰마다 스트림 1개)로 보낸다.
+  https 는 ALPN h2, 평문 엔드포인트(로컬 가짜 서버 notifications.fake_push_server)는 h2c prior knowledge.
+  - APNs: POST /3/device/{token}. 인증은 ES256 provider token(50분마다 갱신)
+  - FCM: HTTP v1 POST /v1/projects/{project}/messages:send. 인증은 firebase_admin 앱 자격 증명의 OAuth2 access token
+- 동시 전송은 공용 스레드 풀(PUSH_CONCURRENCY)로 제한한다.
+- 결과는 토큰 단위(PushResult). 공급자가 "등록 해제/잘못된 토큰"으로 답한 토큰은 deliver() 가 Device.is_active=False 로 일괄 비활성화
+  (해당 사용자의 토큰 캐시도 무효화).
+"""
+
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Protocol, Sequence, Tuple
+
+from django.conf import settings
+
+log = logging.getLogger(__name__)
+
+APNS_INVALID_REASONS = {"BadDeviceToken", "Unregistered", "DeviceTokenNotForTopic"}
+FCM_INVALID_ERRORS = {"UNREGISTERED", "SENDER_ID_MISMATCH"}  # 재전송해도 소용없는 토큰 오류
+FCM_SCOPE = "https://www.googleapis.com/auth/firebase.messaging"
+
+
+@dataclass
+class PushResult:
+    success: int = 0
+    failure: int = 0
+    invalid_tokens: List[str] = field(default_factory=list)  # 다시 보내면 안 되는 토큰(비활성화 대상)
+
+    def merge(self, other: "PushResult") -> "PushResult":
+        self.success += other.success
+        self.failure += other.failure
+        self.invalid_tokens += other.invalid_tokens
+        return self
 
 
 class PushProvider(Protocol):
-    def send_multicast(self, platform: str, tokens: Iterable[str], title: str, body: str, data: Dict) -> Tuple[int, int]:
+    def send_batch(self, platform: str, tokens: Sequence[str], title: str, body: str, data: Dict) -> PushResult:
+        """토큰별 전송 결과를 합친 PushResult"""
+
+
+class BaseProvider(ABC):
+    @abstractmethod
+    def send_batch(self, platform: str, tokens: Sequence[str], title: str, body: str, data: Dict) -> PushResult:
+        """토큰별 전송 결과를 합친 PushResult"""
+
+    def send_multicast(self, platform, tokens: Iterable[str], title, body, data) -> Tuple[int, int]:
         """returns (success_count, failure_count)"""
+        res = self.send_batch(platform, list(tokens), title, body, data)
+        return res.success, res.failure
 
 
-def get_provider() -> PushProvider:
-    # settings 또는 환경변수로 선택 (default: Dummy)
-    from django.conf import settings
+# ---- 공용 동시성 풀 / 공급자 캐시 ----
+_lock = threading.Lock()
+_pool: ThreadPoolExecutor | None = None
+_providers: Dict[str, PushProvider] = {}
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=max(1, getattr(settings, "PUSH_CONCURRENCY", 32)), thread_name_prefix="push")
+    return _pool
 
+
+def get_provider() -> PushProvider:
+    # settings 또는 환경변수로 선택 (default: Dummy). 공급자별로 한 번만 만들어 연결 풀을 유지한다.
     name = getattr(settings, "PUSH_PROVIDER", "dummy")
+    provider = _providers.get(name)
+    if provider is None:
+        with _lock:
+            provider = _providers.get(name)
+            if provider is None:
+                provider = {"fcm": FcmProvider, "apns": ApnsProvider}.get(name, DummyProvider)()
+                _providers[name] = provider
+    return provider
+
+
+def reset_providers() -> None:
+    """설정 변경 후 공급자/풀을 다시 만들게 한다(테스트/관리 명령용)."""
+    global _pool
+    with _lock:
+        for p in _providers.values():
+            close = getattr(p, "close", None)
+            if close:
+                close()
+        _providers.clear()
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+            _pool = None
+
+
+def _http2_client():
+    # HTTP/2 전용(http1=False): APNs/FCM 모두 h2 를 말하고, 평문 주소로는 h2c prior knowledge 로 붙는다
+    import httpx
+
+    size = max(1, getattr(settings, "PUSH_POOL_SIZE", 4))
+    return httpx.Client(
+        http1=False,
+        http2=True,
+        timeout=getattr(settings, "PUSH_TIMEOUT_SEC", 10.0),
+        limits=httpx.Limits(max_connections=size, max_keepalive_connections=size),
+    )
+
 
-    if name == "fcm":
-        return FcmProvider()
-    elif name == "apns":
-        return ApnsProvider()
-    else:
-        return DummyProvider()
+def deliver(provider: PushProvider, platform: str, tokens: Sequence[str], title: str, body: str, data: Dict) -> int:
+    """전송 후 무효 토큰을 일괄 비활성화하고 성공 수를 돌려준다."""
+    if not tokens:
+        return 0
+    res = provider.send_batch(platform, tokens, title, body, data)
+    if res.invalid_tokens:
+        from . import devices
+        from .models import Device
 
+        stale = Device.objects.filter(device_token__in=res.invalid_tokens, is_active=True)
+        devices.invalidate(stale.values_list("user_id", flat=True))
+        stale.update(is_active=False)
+        log.info("deactivated %s unregistered %s tokens", len(res.invalid_tokens), platform)
+    return res.success
 
-class DummyProvider:
-    def send_multicast(self, platform, tokens, title, body, data):
+
+class DummyProvider(BaseProvider):
+    def send_batch(self, platform, tokens, title, body, data):
         # 테스트/개발용: 아무것도 보내지 않고 성공 카운트만 반환
-        tokens = list(tokens)
-        return len(tokens), 0
+        return PushResult(success=len(tokens))
 
 
-class FcmProvider:
-    def __init__(self):
-        try:
-            from firebase_admin import initialize_app, messaging  # type: ignore
+class FcmProvider(BaseProvider):
+    """FCM HTTP v1 직접 호출(영구 연결 + 스트림 다중화). 메시지는 토큰마다 1건."""
 
-            self.messaging = messaging
+    def __init__(self, endpoint: str | None = None):
+        endpoint = endpoint or getattr(settings, "FCM_ENDPOINT", "")
+        self.endpoint = (endpoint or "https://fcm.googleapis.com").rstrip("/")
+        self.project = getattr(settings, "FCM_PROJECT_ID", "")
+        self._credential = None
+        if not endpoint:
+            # 실제 FCM: firebase_admin 앱(서비스 계정/ADC)의 자격 증명과 프로젝트를 쓴다. 엔드포인트를 바꾼 경우(가짜 서버)는 인증 없음
+            try:
+                import firebase_admin  # type: ignore
+            except ImportError as e:
+                raise RuntimeError("FCM provider requires firebase_admin") from e
             try:
-                initialize_app()
+                app = firebase_admin.get_app()
             except ValueError:
-                # 이미 초기화된 경우
-                pass
-        except Exception as e:
-            raise RuntimeError("FCM provider requires firebase_admin") from e
+                app = firebase_admin.initialize_app()
+            self._credential = app.credential.get_credential()
+            self.project = self.project or app.project_id
+        self.url = f"{self.endpoint}/v1/projects/{self.project or 'local'}/messages:send"
+        self.client = _http2_client()
+        self._token_lock = threading.Lock()
+
+    def close(self) -> None:
+        self.client.close()
 
-    def send_multicast(self, platform, tokens, title, body, data):
-        tokens = list(tokens)
-        if not tokens:
-            return 0, 0
-        message = self.messaging.MulticastMessage(notification=self.messaging.Notification(title=title, body=body), data={k: str(v) for k, v in data.items()}, tokens=tokens)
-        resp = self.messaging.send_multicast(message, dry_run=False)
-        return resp.success_count, resp.failure_count
+    def _auth_header(self) -> Dict[str, str]:
+        if self._credential is None:
+            return {}
+        with self._token_lock:
+            if not self._credential.valid:
+                from google.auth.transport.requests import Request
 
+                if getattr(self._credential, "requires_scopes", False):
+                    self._credential = self._credential.with_scopes([FCM_SCOPE])
+                self._credential.refresh(Request())
+            return {"authorization": f"Bearer {self._credential.token}"}
 
-class ApnsProvider:
-    def __init__(self):
+    def _send_one(self, token: str, message: Dict, headers: Dict[str, str]) -> Tuple[str, int, str]:
         try:
-            from apns2.client import APNsClient  # type: ignore
-            from apns2.payload import Payload  # type: ignore
+            res = self.client.post(self.url, json={"message": {**message, "token": token}}, headers=headers)
+        except Exception as e:
+            log.warning("FCM send failed: %s", e)
+            return token, 0, ""
+        code = ""
+        if res.status_code != 200:
+            try:
+                details = res.json().get("error", {}).get("details", [])
+                code = next((d.get("errorCode", "") for d in details if d.get("errorCode")), "")
+            except ValueError:
+                pass
+        return token, res.status_code, code
+
+    def send_batch(self, platform, tokens, title, body, data):
+        message = {"notification": {"title": title, "body": body}, "data": {k: str(v) for k, v in data.items()}}
+        headers = self._auth_header()
+        result = PushResult()
+        for token, status, code in _executor().map(lambda t: self._send_one(t, message, headers), tokens):
+            if status == 200:
+                result.success += 1
+                continue
+            result.failure += 1
+            if code in FCM_INVALID_ERRORS:
+                result.invalid_tokens.append(token)
+        return result
 
-            self.APNsClient = APNsClient
-            self.Payload = Payload
+
+class ApnsProvider(BaseProvider):
+    """APNs HTTP/2 provider API 직접 호출(영구 연결 + 스트림 다중화)."""
+
+    TOKEN_TTL_SEC = 50 * 60  # Apple 권장: 20~60분 사이 갱신
+
+    def __init__(self, endpoint: str | None = None):
+        sandbox = getattr(settings, "APNS_USE_SANDBOX", False)
+        default = "https://api.sandbox.push.apple.com" if sandbox else "https://api.push.apple.com"
+        self.endpoint = (endpoint or getattr(settings, "APNS_ENDPOINT", "") or default).rstrip("/")
+        self.topic = getattr(settings, "APNS_TOPIC", "")
+        self.client = _http2_client()
+        self._token: Tuple[str, float] | None = None
+        self._token_lock = threading.Lock()
+
+    def close(self) -> None:
+        self.client.close()
+
+    def _auth_header(self) -> Dict[str, str]:
+        key_path = getattr(settings, "APNS_AUTH_KEY_PATH", "")
+        if not key_path:
+            # 인증 없는 엔드포인트(로컬 가짜 서버 등)
+            return {}
+        with self._token_lock:
+            if self._token is None or time.time() - self._token[1] > self.TOKEN_TTL_SEC:
+                import jwt
+
+                with open(key_path) as f:
+                    key = f.read()
+                now = time.time()
+                token = jwt.encode({"iss": settings.APNS_TEAM_ID, "iat": int(now)}, key, algorithm="ES256", headers={"kid": settings.APNS_KEY_ID})
+                self._token = (token, now)
+            return {"authorization": f"bearer {self._token[0]}"}
+
+    def _send_one(self, token: str, payload: bytes, headers: Dict[str, str]) -> Tuple[str, int, str]:
+        try:
+            res = self.client.post(f"{self.endpoint}/3/device/{token}", content=payload, headers=headers)
         except Exception as e:
-            raise RuntimeError("APNs provider requires apns2") from e
-
-    def send_multicast(self, platform, tokens, title, body, data):
-        # 실제 APNs 멀티캐스트는 반복 전송로 구현 (간소화)
-        tokens = list(tokens)
-        if not tokens:
-            return 0, 0
-        client = self.APNsClient(credentials="path/to/cert_or_token", use_sandbox=False)
-        payload = self.Payload(alert={"title": title, "body": body}, custom=data)
-        ok, fail = 0, 0
-        for t in tokens:
+            log.warning("APNs send failed: %s", e)
+            return token, 0, ""
+        reason = ""
+        if res.status_code != 200:
             try:
-                client.send_notification(t, payload, topic="com.example.app")
-                ok += 1
-            except Exception:
-                fail += 1
-        return ok, fail
+                reason = res.json().get("reason", "")
+            except ValueError:
+                pass
+        return token, res.status_code, reason
+
+    def send_batch(self, platform, tokens, title, body, data):
+        payload = json.dumps({"aps": {"alert": {"title": title, "body": body}}, **data}).encode()
+        headers = {"apns-topic": self.topic, "apns-push-type": "alert", **self._auth_header()}
+        result = PushResult()
+        for token, status, reason in _executor().map(lambda t: self._send_one(t, payload, headers), tokens):
+            if status == 200:
+                result.success += 1
+                continue
+            result.failure += 1
+            if status == 410 or reason in APNS_INVALID_REASONS:
+                result.invalid_tokens.append(token)
+        return result
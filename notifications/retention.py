@@ -0,0 +1,124 @@
+"""
+알림 보존 기간 관리(TTL 스위퍼 + 아카이브).
+
+- 보존 기간: NOTIFICATION_RETENTION_DAYS. 알림함 목록은 cutoff 이후 행만 조회한다(만료됐지만 아직 안 지운 행은 읽지 않음).
+- 스윕: created_at < cutoff 인 행을 NOTIFICATION_RETENTION_BATCH 개씩 지운다.
+  DELETE ... WHERE id IN (SELECT ... LIMIT n FOR UPDATE SKIP LOCKED) RETURNING * 한 문장이 배치 1개
+  → 트랜잭션/잠금이 짧고, 스위퍼를 여러 개 돌려도 같은 행을 다투지 않는다. created_at 은 BRIN 인덱스로 찾는다.
+- 아카이브: archive_dir 가 있으면 지운 행을 배치·월별 파일 notifications-YYYY-MM-{배치 최소 id}.jsonl.gz 에 JSON Lines 로 쓴다.
+  DELETE 트랜잭션 안에서 .tmp 로 쓰고(쓰기 실패 → DELETE 롤백) 커밋된 뒤에 이름을 바꾼다
+  → 커밋이 실패하면 임시 파일만 지우므로 다음 스윕이 같은 행을 다시 아카이브해도 중복 행이 남지 않는다.
+- 만료 행은 안 읽은 수에 들어가지 않으므로(unread 도 cutoff 기준) 카운터에서 빼지 않고, 지운 행의 사용자만 보정 대상으로 남긴다.
+"""
+
+import gzip
+import json
+import os
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import unread
+
+COLUMNS = ("id", "user_id", "type", "payload", "is_read", "created_at", "updated_at", "group_key", "count", "actors")
+
+_DELETE_SQL = f"""
+DELETE FROM notifications WHERE id IN (
+    SELECT id FROM notifications WHERE created_at < %s LIMIT %s FOR UPDATE SKIP LOCKED
+)
+RETURNING {", ".join(COLUMNS)}
+"""
+
+
+@dataclass
+class SweepStats:
+    deleted: int = 0
+    batches: int = 0
+    archived: List[str] = field(default_factory=list)  # 쓴 아카이브 파일 경로
+    elapsed: float = 0.0
+
+
+def cutoff(days: Optional[int] = None) -> datetime:
+    days = getattr(settings, "NOTIFICATION_RETENTION_DAYS", 90) if days is None else days
+    return timezone.now() - timedelta(days=days)
+
+
+def _archive(archive_dir: str, rows: List[Dict], staged: List[Tuple[str, str]]) -> None:
+    # staged 에 (임시 경로, 최종 경로)를 쓰기 전에 남긴다(중간 실패 시 호출 측이 정리). 최종 이름은 배치의 최소 id
+    by_month: Dict[str, List[Dict]] = defaultdict(list)
+    for row in rows:
+        by_month[row["created_at"].strftime("%Y-%m")].append(row)
+    os.makedirs(archive_dir, exist_ok=True)
+    for month, month_rows in sorted(by_month.items()):
+        path = os.path.join(archive_dir, f"notifications-{month}-{min(str(row['id']) for row in month_rows)}.jsonl.gz")
+        tmp = f"{path}.tmp"
+        staged.append((tmp, path))
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            for row in month_rows:
+                f.write(json.dumps(row, default=str, ensure_ascii=False) + "\n")
+
+
+def _sweep_batch(before: datetime, batch: int, archive_dir: str) -> tuple:
+    staged: List[Tuple[str, str]] = []
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cur:
+                cur.execute(_DELETE_SQL, [before, batch])
+                rows = [dict(zip(COLUMNS, r, strict=True)) for r in cur.fetchall()]
+            for row in rows:
+                # raw 커서의 jsonb 는 드라이버/설정에 따라 문자열로 올 수 있다
+                for k in ("payload", "actors"):
+                    if isinstance(row[k], str):
+                        row[k] = json.loads(row[k])
+            if archive_dir and rows:
+                _archive(archive_dir, rows, staged)
+    except Exception:
+        # 쓰기/커밋 실패로 DELETE 가 롤백됐으므로 임시 파일도 버린다(다음 스윕이 다시 아카이브)
+        for tmp, _ in staged:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        raise
+    # 커밋된 배치만 확정
+    for tmp, path in staged:
+        os.replace(tmp, path)
+    unread.refresh({row["user_id"] for row in rows if not row["is_read"]})
+    return len(rows), [path for _, path in staged]
+
+
+def sweep(
+    *,
+    days: Optional[int] = None,
+    batch: Optional[int] = None,
+    max_batches: Optional[int] = None,
+    archive_dir: Optional[str] = None,
+    progress: Optional[Callable[[SweepStats], None]] = None,
+) -> SweepStats:
+    """
+    보존 기간이 지난 알림을 배치 단위로 (아카이브 후) 삭제한다.
+    max_batches 가 있으면 그만큼만 돌고 멈춘다(주기 작업 1회 실행 시간 제한). 남은 행은 다음 실행에서 이어서 지운다.
+    """
+    before = cutoff(days)
+    batch = max(1, batch or getattr(settings, "NOTIFICATION_RETENTION_BATCH", 5000))
+    archive_dir = getattr(settings, "NOTIFICATION_ARCHIVE_DIR", "") if archive_dir is None else archive_dir
+    stats = SweepStats()
+    t0 = time.perf_counter()
+    while max_batches is None or stats.batches < max_batches:
+        deleted, paths = _sweep_batch(before, batch, archive_dir)
+        if not deleted:
+            break
+        stats.deleted += deleted
+        stats.batches += 1
+        stats.archived += [p for p in paths if p not in stats.archived]
+        stats.elapsed = time.perf_counter() - t0
+        if progress:
+            progress(stats)
+        if deleted < batch:
+            break
+    stats.elapsed = time.perf_counter() - t0
+    return stats
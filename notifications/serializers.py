@@ -31,8 +31,12 @@ class NotificationSettingIn(serializers.Serializer):
 class NotificationOut(serializers.ModelSerializer):
     class Meta:
         model = Notification
-        fields = ("id", "type", "payload", "is_read", "created_at")
+        fields = ("id", "type", "payload", "count", "actors", "is_read", "created_at")
 
 
 class MarkReadIn(serializers.Serializer):
     ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False)
+
+
+class MarkAllReadIn(serializers.Serializer):
+    until = serializers.UUIDField(required=False, help_text="이 알림까지(포함, 최신순 기준 그 아래 전부) 읽음 처리. 생략 시 전체")
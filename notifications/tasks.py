@@ -1,18 +1,23 @@
-from typing import Dict, Iterable, List
+import json
+import uuid
+from collections import defaultdict
+from typing import Dict, List
 
 from celery import shared_task
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import transaction
+from django.core.cache import cache
 from django.utils import timezone
 
 from relations.models import Follow
 
-from .models import Device, Notification, NotificationSetting
-from .providers import get_provider
+from . import broadcast, devices, preferences, unread
+from .models import Notification
+from .providers import deliver, get_provider
 
 User = get_user_model()
 
-BATCH_SIZE = 500  # FCM 멀티캐스트 권장 범위에 맞춰 배치
+BATCH_SIZE = 500  # 전송 1회(deliver)당 토큰 수. 공급자가 내부에서 다시 묶음/동시 전송
 
 
 def _chunk(seq: List[str], size: int):
@@ -20,65 +25,218 @@ def _chunk(seq: List[str], size: int):
         yield seq[i : i + size]
 
 
-def _eligible_user_ids(user_ids: Iterable[str], notif_type: str) -> List[str]:
-    # 설정 필터링: 해당 타입이 True인 사용자만
-    qs = NotificationSetting.objects.filter(user_id__in=user_ids)
-    flag = {"post": "post", "comment": "comment", "like": "like", "follow": "follow"}[notif_type]
-    allowed = [str(s.user_id) for s in qs if getattr(s, flag)]
-    return allowed
+FANOUT_PROGRESS_KEY = "notifications:fanout:{post_id}"
+FANOUT_PROGRESS_FIELDS = ("chunks", "done", "recipients", "sent")
+
+
+def _progress_key(post_id: str, field: str) -> str:
+    return f"{FANOUT_PROGRESS_KEY.format(post_id=post_id)}:{field}"
+
+
+def _progress_incr(post_id: str, field: str, delta: int) -> None:
+    key = _progress_key(post_id, field)
+    cache.add(key, 0, settings.NOTIFICATION_FANOUT_PROGRESS_TTL_SEC)
+    cache.incr(key, delta)
+
+
+def fanout_progress(post_id: str) -> Dict[str, int]:
+    """팬아웃 진행 상황: 예약된 청크 수, 끝난 청크 수, 알림 저장 수, 푸시 성공 수, 청크 예약 완료 여부."""
+    keys = {f: _progress_key(post_id, f) for f in (*FANOUT_PROGRESS_FIELDS, "enqueued")}
+    values = cache.get_many(keys.values())
+    out = {f: int(values.get(k) or 0) for f, k in keys.items()}
+    out["enqueued"] = bool(out["enqueued"])
+    return out
+
+
+def _follower_bounds(author_id: str, after: str, chunk: int, limit: int) -> List[str]:
+    # (following, follower) 인덱스에서 keyset 으로 청크 경계(각 청크의 마지막 follower_id)만 읽는다 → 메모리는 경계 수에 비례
+    bounds = []
+    qs = Follow.objects.filter(following_id=author_id).order_by("follower_id").values_list("follower_id", flat=True)
+    while len(bounds) < limit:
+        page = qs.filter(follower_id__gt=after) if after else qs
+        last = list(page[chunk - 1 : chunk])
+        if not last:
+            # 마지막(채워지지 않은) 청크: 남은 팔로워가 있으면 상한 없이 한 청크
+            if page.exists():
+                bounds.append("")
+            break
+        after = str(last[0])
+        bounds.append(after)
+    return bounds
 
 
 @shared_task(name="notifications.tasks.fanout_post_created", autoretry_for=(Exception,), retry_backoff=2, max_retries=5)
-def fanout_post_created(author_id: str, post_id: str, title: str, body: str):
-    # 1) 대상 선정: author의 followers
-    follower_ids = list(Follow.objects.filter(following_id=author_id).values_list("follower_id", flat=True))
-    if not follower_ids:
-        return 0
+def fanout_post_created(author_id: str, post_id: str, title: str, body: str, after: str = ""):
+    """
+    팔로워 팬아웃 조정자. 팔로워를 follower_id 순 keyset 청크로 나눠 청크마다 fanout_post_chunk 를 예약한다.
+    한 번에 NOTIFICATION_FANOUT_MAX_CHUNKS_PER_RUN 개까지만 예약하고 나머지는 자신을 다시 예약(태스크 시간 제한 회피).
+    진행 상황은 fanout_progress(post_id). 반환값은 지금까지의 푸시 성공 수(eager 실행이면 최종값).
+    """
+    chunk = settings.NOTIFICATION_FANOUT_CHUNK
+    limit = settings.NOTIFICATION_FANOUT_MAX_CHUNKS_PER_RUN
+    bounds = _follower_bounds(author_id, after, chunk, limit + 1)
+    more = len(bounds) > limit
+    bounds = bounds[:limit]
+
+    lower = after
+    for upper in bounds:
+        # 재시도(autoretry)로 같은 경계를 다시 돌아도 청크는 한 번만 예약(표시는 예약 실패 시 되돌림)
+        marker = _progress_key(post_id, f"chunk:{lower}")
+        if cache.add(marker, 1, settings.NOTIFICATION_FANOUT_PROGRESS_TTL_SEC):
+            try:
+                fanout_post_chunk.delay(author_id, post_id, title, body, lower, upper)
+            except Exception:
+                cache.delete(marker)
+                raise
+            _progress_incr(post_id, "chunks", 1)
+        lower = upper
+
+    if more:
+        fanout_post_created.delay(author_id, post_id, title, body, lower)
+    else:
+        cache.set(_progress_key(post_id, "enqueued"), 1, settings.NOTIFICATION_FANOUT_PROGRESS_TTL_SEC)
+    return fanout_progress(post_id)["sent"]
+
+
+def fanout_notification_id(post_id: str, user_id) -> uuid.UUID:
+    # 팬아웃 알림 id: (포스트, 수신자)마다 고정 → 청크 재실행이 같은 행을 다시 만들지 않는다
+    return uuid.uuid5(uuid.NAMESPACE_URL, f"veilgram:notifications:post-fanout:{post_id}:{user_id}")
+
+
+@shared_task(name="notifications.tasks.fanout_post_chunk", autoretry_for=(Exception,), retry_backoff=2, max_retries=5)
+def fanout_post_chunk(author_id: str, post_id: str, title: str, body: str, after: str, upto: str):
+    # 팔로워 청크 (after, upto] (빈 문자열 = 경계 없음)
+    followers = Follow.objects.filter(following_id=author_id)
+    if after:
+        followers = followers.filter(follower_id__gt=after)
+    if upto:
+        followers = followers.filter(follower_id__lte=upto)
+
+    # 1) 설정 필터: 팔로우 ⟕ 알림 설정 LEFT JOIN 1번(설정 행이 없으면 기본값)
+    eligible = preferences.filter_allowed(followers, "follower__", "post")
+    user_ids = list(eligible.values_list("follower_id", flat=True))
+    sent = 0
+    if user_ids:
+        # 2) 인앱 Notification 저장: 한정된 크기로 나눠 bulk insert.
+        #    id 는 (포스트, 수신자)로 정해지는 uuid5 → 재시도 때 이미 저장된 행은 건너뛰고, 새로 저장한 행만 안 읽은 수/WS 에 반영
+        now = timezone.now()
+        payload = {"post_id": post_id, "author_id": author_id}
+        ids = {fanout_notification_id(post_id, uid): uid for uid in user_ids}
+        existing = set(Notification.objects.filter(id__in=list(ids)).values_list("id", flat=True))
+        notes = [Notification(id=nid, user_id=uid, type=Notification.Type.POST, payload=payload, created_at=now, updated_at=now) for nid, uid in ids.items() if nid not in existing]
+        Notification.objects.bulk_create(notes, batch_size=settings.NOTIFICATION_FANOUT_INSERT_BATCH, ignore_conflicts=True)
+        unread.add(n.user_id for n in notes)
+        broadcast.publish(notes)
+
+        # 3) 디바이스 토큰: 청크 전체를 토큰 캐시에서 파이프라인 HMGET 한 번으로(미스난 사용자만 DB)
+        tokens = [pair for pairs in devices.tokens_for(user_ids).values() for pair in pairs]
+
+        # 4) 플랫폼별 멀티캐스트. 재시도 때 이미 보낸 배치는 다시 보내지 않는다(배치별 완료 표시)
+        provider = get_provider()
+        for platform in ("android", "ios", "web"):
+            platform_tokens = [t for p, t in tokens if p == platform]
+            for i, batch in enumerate(_chunk(platform_tokens, BATCH_SIZE)):
+                marker = _progress_key(post_id, f"pushed:{after}:{platform}:{i}")
+                if cache.get(marker):
+                    continue
+                sent += deliver(provider, platform, batch, title, body, {"type": "post", "post_id": post_id, "author_id": author_id})
+                cache.set(marker, 1, settings.NOTIFICATION_FANOUT_PROGRESS_TTL_SEC)
+
+    _progress_incr(post_id, "recipients", len(user_ids))
+    _progress_incr(post_id, "sent", sent)
+    _progress_incr(post_id, "done", 1)
+    return sent
+
 
-    # 2) 설정 필터
-    user_ids = _eligible_user_ids(follower_ids, "post")
+def _push_many(items: List[Dict]) -> int:
+    """
+    items: [{"user_id", "type", "title", "body", "data"}, ...]
+    수신자 수와 무관하게 설정 조회 1번, Notification bulk insert 1번, 디바이스 토큰 캐시 조회 1번.
+    푸시는 같은 내용(type/title/body/data)끼리 플랫폼별 멀티캐스트로 묶어 보낸다.
+    """
+    user_ids = {str(it["user_id"]) for it in items}
     if not user_ids:
         return 0
 
-    # 3) 디바이스 토큰 수집
-    tokens = list(Device.objects.filter(user_id__in=user_ids, is_active=True).values_list("platform", "device_token"))
+    # 1) 설정 필터: 한 명이면 설정 캐시(Redis), 여러 명이면 타입별 LEFT JOIN 쿼리 1번(설정 행이 없으면 기본값)
+    if len(user_ids) == 1:
+        items = [it for it in items if preferences.allowed(it["user_id"], it["type"])]
+    else:
+        allowed = {t: set(preferences.eligible_user_ids(user_ids, t)) for t in {it["type"] for it in items}}
+        items = [it for it in items if str(it["user_id"]) in allowed[it["type"]]]
+    if not items:
+        return 0
 
-    # 4) 인앱 Notification 저장 + 푸시 전송
+    # 2) 인앱 저장
     now = timezone.now()
-    with transaction.atomic():
-        Notification.objects.bulk_create(
-            [Notification(user_id=uid, type=Notification.Type.POST, payload={"post_id": post_id, "author_id": author_id}, created_at=now) for uid in user_ids],
-            ignore_conflicts=True,
-        )
+    notes = Notification.objects.bulk_create([Notification(user_id=it["user_id"], type=it["type"], payload=it["data"], created_at=now, updated_at=now) for it in items])
+    unread.add(it["user_id"] for it in items)
+    broadcast.publish(notes)
+
+    return _send_pushes(items)
+
+
+def _send_pushes(items: List[Dict]) -> int:
+    """items 의 수신자 디바이스로 푸시만 보낸다(설정 필터/인앱 저장은 호출 측 책임). 토큰은 캐시에서(미스만 DB)."""
+    # 디바이스 토큰: 사용자 → [(platform, token)]
+    tokens_by_user = devices.tokens_for(it["user_id"] for it in items)
+
+    # 같은 메시지끼리 플랫폼별로 토큰을 모아 멀티캐스트
+    groups: Dict[tuple, Dict[str, List[str]]] = defaultdict(lambda: defaultdict(list))
+    for it in items:
+        key = (it["title"], it["body"], json.dumps(it["data"], sort_keys=True, default=str))
+        for platform, token in tokens_by_user.get(str(it["user_id"]), ()):
+            groups[key][platform].append(token)
 
-    # 5) 플랫폼별 멀티캐스트
     provider = get_provider()
     sent = 0
-    for platform in ("android", "ios", "web"):
-        platform_tokens = [t for p, t in tokens if p == platform]
-        for batch in _chunk(platform_tokens, BATCH_SIZE):
-            ok, _ = provider.send_multicast(platform=platform, tokens=batch, title=title, body=body, data={"type": "post", "post_id": post_id, "author_id": author_id})
-            sent += ok
+    for (title, body, data), by_platform in groups.items():
+        data = json.loads(data)
+        for platform in ("android", "ios", "web"):
+            for batch in _chunk(by_platform.get(platform, []), BATCH_SIZE):
+                sent += deliver(provider, platform, batch, title, body, data)
     return sent
 
 
+@shared_task(name="notifications.tasks.multi_user_push", autoretry_for=(Exception,), retry_backoff=2, max_retries=5)
+def multi_user_push(items: List[Dict]):
+    # 여러 수신자/타입을 태스크 하나로(댓글 알림 등). items 원소: user_id, type, title, body, data
+    return _push_many(items)
+
+
 @shared_task(name="notifications.tasks.single_user_push", autoretry_for=(Exception,), retry_backoff=2, max_retries=5)
 def single_user_push(user_id: str, type_: str, title: str, body: str, data: Dict):
-    # 공용 싱글 유저 태스크(댓글, 좋아요, 팔로우 등)
-    # 1) 설정 필터
-    if str(user_id) not in _eligible_user_ids([user_id], type_):
+    # 공용 싱글 유저 태스크(좋아요, 팔로우 등). 수신자가 여럿이면 multi_user_push 사용
+    return _push_many([{"user_id": user_id, "type": type_, "title": title, "body": body, "data": data}])
+
+
+@shared_task(name="notifications.tasks.push_aggregate", autoretry_for=(Exception,), retry_backoff=2, max_retries=5)
+def push_aggregate(notification_id: str):
+    # 집계 알림 1건의 푸시(창마다 1번, notifications.aggregation.record 가 예약). 그 시점의 누적 수로 문구를 만든다.
+    from profiles.models import Profile
+
+    from .aggregation import render
+
+    n = Notification.objects.filter(id=notification_id).values("user_id", "payload", "count", "actors").first()
+    if n is None:
         return 0
+    names = list(Profile.objects.filter(user_id__in=n["actors"][:1]).values_list("nickname", flat=True))
+    title, body = render(n["payload"]["kind"], n["count"], names)
+    data = {k: str(v) for k, v in n["payload"].items()}
+    data["count"] = str(n["count"])
+    return _send_pushes([{"user_id": str(n["user_id"]), "type": "", "title": title, "body": body, "data": data}])
 
-    # 2) 인앱 저장
-    Notification.objects.create(user_id=user_id, type=type_, payload=data)
 
-    # 3) 푸시
-    provider = get_provider()
-    tokens = list(Device.objects.filter(user_id=user_id, is_active=True).values_list("platform", "device_token"))
-    sent = 0
-    for platform in ("android", "ios", "web"):
-        platform_tokens = [t for p, t in tokens if p == platform]
-        for batch in _chunk(platform_tokens, BATCH_SIZE):
-            ok, _ = provider.send_multicast(platform, batch, title, body, data)
-            sent += ok
-    return sent
+@shared_task(name="notifications.tasks.reconcile_unread_counters")
+def reconcile_unread_counters(limit: int | None = None):
+    # celery beat 주기 작업: 카운터가 바뀐 사용자의 안 읽은 수를 DB 기준으로 덮어써 어긋남을 정리
+    return unread.reconcile(limit)
+
+
+@shared_task(name="notifications.tasks.sweep_expired_notifications")
+def sweep_expired_notifications(max_batches: int | None = None):
+    # celery beat 주기 작업: 보존 기간이 지난 알림을 배치 단위로 아카이브 후 삭제(1회 실행당 배치 수 제한)
+    from .retention import sweep
+
+    stats = sweep(max_batches=max_batches or settings.NOTIFICATION_RETENTION_MAX_BATCHES_PER_RUN)
+    return stats.deleted
@@ -137,8 +137,168 @@ class TestNotificationsAPI:
         r_read = client.get(url, {"read": "true"})
         assert r_unread.status_code == 200 and r_read.status_code == 200
 
-        assert all(item["is_read"] is False for item in r_unread.json())
-        assert all(item["is_read"] is True for item in r_read.json())
+        assert [item["is_read"] for item in r_unread.json()["results"]] == [False]
+        assert [item["is_read"] for item in r_read.json()["results"]] == [True]
+
+
+@pytest.fixture
+def fake_unread(monkeypatch):
+    import fakeredis
+
+    from notifications import unread
+
+    c = unread.UnreadCounter.__new__(unread.UnreadCounter)
+    c.r = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(unread, "_counter", c)
+    return c
+
+
+@pytest.mark.usefixtures("fake_unread")
+class TestNotificationInbox:
+    url = "/api/v1/notifications/"
+
+    def _make(self, u, n):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        now = timezone.now()
+        return Notification.objects.bulk_create([Notification(user=u, type="post", payload={"i": i}, created_at=now - timedelta(seconds=i)) for i in range(n)])
+
+    def test_cursor_pages_walk_newest_first(self, auth_client):
+        client, u = auth_client
+        self._make(u, 5)
+
+        seen, url, params = [], self.url, {"page_size": 2}
+        while url:
+            body = client.get(url, params).json()
+            seen += [item["payload"]["i"] for item in body["results"]]
+            url, params = body["next"], None
+        assert seen == [0, 1, 2, 3, 4]
+
+    def test_unread_count_tracks_inserts_and_mark_read(self, auth_client, settings):
+        from notifications.tasks import single_user_push
+
+        settings.PUSH_PROVIDER = "dummy"
+        client, u = auth_client
+        assert client.get(self.url + "unread_count/").json() == {"unread": 0}
+
+        for _ in range(3):
+            single_user_push(user_id=str(u.id), type_="like", title="T", body="B", data={})
+        assert client.get(self.url + "unread_count/").json() == {"unread": 3}
+
+        ids = list(Notification.objects.filter(user=u).values_list("id", flat=True))
+        client.post(self.url + "mark_read/", data={"ids": [str(ids[0])]}, format="json")
+        # 이미 읽은 알림을 다시 보내도 두 번 빠지지 않는다
+        r = client.post(self.url + "mark_read/", data={"ids": [str(ids[0])]}, format="json")
+        assert r.json()["updated"] == 0
+        assert client.get(self.url + "unread_count/").json() == {"unread": 2}
+
+    def test_mark_all_read_until_is_single_update(self, auth_client, django_assert_num_queries):
+        client, u = auth_client
+        notes = self._make(u, 5)  # notes[0] 이 최신
+
+        with django_assert_num_queries(1):
+            r = client.post(self.url + "mark_all_read/", data={"until": str(notes[2].id)}, format="json")
+        assert r.json()["updated"] == 3
+        assert set(Notification.objects.filter(user=u, is_read=False).values_list("id", flat=True)) == {notes[0].id, notes[1].id}
+
+        r = client.post(self.url + "mark_all_read/", data={}, format="json")
+        assert r.json()["updated"] == 2
+        assert client.get(self.url + "unread_count/").json() == {"unread": 0}
+
+    def test_reconcile_repairs_drift(self, users, fake_unread):
+        from notifications.unread import add, count, reconcile
+
+        a, _, _ = users
+        assert count(a.id) == 0
+        # DB 밖에서 어긋난 증감(예: 롤백된 insert)
+        add([a.id], 5)
+        assert count(a.id) == 5
+        assert reconcile() == 1
+        assert count(a.id) == 0
+
+
+@pytest.mark.usefixtures("fake_unread")
+class TestNotificationRetention:
+    def _aged(self, u, days, n=1, is_read=False):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        at = timezone.now() - timedelta(days=days)
+        return Notification.objects.bulk_create([Notification(user=u, type="post", payload={"d": days}, is_read=is_read, created_at=at) for _ in range(n)])
+
+    def test_sweep_deletes_in_batches_and_archives(self, users, settings, tmp_path):
+        import gzip
+        import json
+
+        from notifications.retention import sweep
+        from notifications.unread import count
+
+        a, _, _ = users
+        settings.NOTIFICATION_RETENTION_DAYS = 30
+        self._aged(a, 40, n=5)
+        self._aged(a, 50, n=2, is_read=True)
+        fresh = self._aged(a, 1, n=1)
+        # 만료 행(스윕 전)은 알림함과 같이 안 읽은 수에서도 빠진다
+        assert count(a.id) == 1
+
+        stats = sweep(batch=3, archive_dir=str(tmp_path))
+        assert (stats.deleted, stats.batches) == (7, 3)
+        assert list(Notification.objects.filter(user=a).values_list("id", flat=True)) == [fresh[0].id]
+        assert count(a.id) == 1
+
+        lines = []
+        for path in stats.archived:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                lines += [json.loads(line) for line in f]
+        assert len(lines) == 7
+        assert {row["payload"]["d"] for row in lines} == {40, 50}
+        assert not list(tmp_path.glob("*.tmp"))
+
+    def test_failed_batch_leaves_no_archive(self, users, settings, tmp_path, monkeypatch):
+        import gzip
+        import json
+        from types import SimpleNamespace
+
+        from notifications import retention
+
+        a, _, _ = users
+        settings.NOTIFICATION_RETENTION_DAYS = 30
+        self._aged(a, 40, n=2)
+
+        def boom(*args, **kwargs):
+            raise OSError("disk full")
+
+        # 아카이브 도중 실패 → DELETE 롤백 + 임시 파일 정리. 재시도는 같은 행을 한 번만 아카이브
+        monkeypatch.setattr(retention, "json", SimpleNamespace(dumps=boom, loads=json.loads))
+        with pytest.raises(OSError):
+            retention.sweep(archive_dir=str(tmp_path))
+        assert Notification.objects.filter(user=a).count() == 2
+        assert not list(tmp_path.iterdir())
+
+        monkeypatch.setattr(retention, "json", json)
+        stats = retention.sweep(archive_dir=str(tmp_path))
+        assert stats.deleted == 2 and len(stats.archived) == 1
+        with gzip.open(stats.archived[0], "rt", encoding="utf-8") as f:
+            assert len(f.readlines()) == 2
+
+    def test_max_batches_bounds_one_run(self, users):
+        from notifications.retention import sweep
+
+        a, _, _ = users
+        self._aged(a, 200, n=5)
+        assert sweep(batch=2, max_batches=1, archive_dir="").deleted == 2
+        assert Notification.objects.filter(user=a).count() == 3
+
+    def test_inbox_hides_expired_rows(self, auth_client, settings):
+        client, u = auth_client
+        settings.NOTIFICATION_RETENTION_DAYS = 30
+        self._aged(u, 40)
+        self._aged(u, 1)
+        body = client.get("/api/v1/notifications/").json()
+        assert [item["payload"]["d"] for item in body["results"]] == [1]
 
 
 # =======================
@@ -176,6 +336,46 @@ class TestNotificationTasks:
         assert sent == 0
         assert not Notification.objects.filter(user=a, type="post").exists()
 
+    def test_fanout_chunked_with_progress(self, settings):
+        from notifications.tasks import fanout_progress
+        from relations.models import Follow
+
+        settings.NOTIFICATION_FANOUT_CHUNK = 3
+        settings.NOTIFICATION_FANOUT_MAX_CHUNKS_PER_RUN = 2  # 2청크마다 조정자 재예약
+        author = User.objects.create()
+        followers = [User.objects.create() for _ in range(8)]
+        for i, f in enumerate(followers):
+            Follow.objects.create(follower=f, following=author)
+            NotificationSetting.objects.create(user=f, post=i != 0)  # 한 명은 수신 거부
+            Device.objects.create(user=f, platform="web", device_token=f"tok-f{i}")
+
+        post_id = str(uuid.uuid4())
+        sent = fanout_post_created(author_id=str(author.id), post_id=post_id, title="T", body="B")
+        assert sent == 7
+        assert Notification.objects.filter(type="post", payload__post_id=post_id).count() == 7
+        assert fanout_progress(post_id) == {"chunks": 3, "done": 3, "recipients": 7, "sent": 7, "enqueued": True}
+
+    def test_chunk_retry_does_not_duplicate(self, fake_unread):
+        from notifications.tasks import fanout_notification_id, fanout_post_chunk
+        from notifications.unread import count
+        from relations.models import Follow
+
+        author = User.objects.create()
+        followers = [User.objects.create() for _ in range(3)]
+        for i, f in enumerate(followers):
+            Follow.objects.create(follower=f, following=author)
+            Device.objects.create(user=f, platform="web", device_token=f"tok-r{i}")
+
+        post_id = str(uuid.uuid4())
+        args = (str(author.id), post_id, "T", "B", "", "")
+        assert fanout_post_chunk(*args) == 3
+        # 같은 청크를 다시 실행(autoretry): 행/안 읽은 수/푸시 모두 그대로
+        assert fanout_post_chunk(*args) == 0
+        notes = Notification.objects.filter(type="post", payload__post_id=post_id)
+        assert notes.count() == 3
+        assert {n.id for n in notes} == {fanout_notification_id(post_id, f.id) for f in followers}
+        assert [count(f.id) for f in followers] == [1, 1, 1]
+
     def test_single_user_push_generic(self, users):
         # 개별 유저에게 단일 타입 푸시/인앱 저장
         a, _, _ = users
@@ -187,3 +387,306 @@ class TestNotificationTasks:
 
         saved = Notification.objects.filter(user=a, type="like").first()
         assert saved and saved.payload.get("post_id") == "p1"
+
+    def test_multi_user_push_constant_queries(self, monkeypatch, django_assert_num_queries):
+        from notifications.tasks import multi_user_push
+
+        recipients = [User.objects.create() for _ in range(6)]
+        for i, u in enumerate(recipients):
+            NotificationSetting.objects.create(user=u, comment=i != 0)  # 첫 사용자는 댓글 알림 끔
+            Device.objects.create(user=u, platform="android" if i % 2 else "ios", device_token=f"tok-m{i}")
+        items = [{"user_id": str(u.id), "type": "comment", "title": "New comment", "body": "B", "data": {"post_id": "p1"}} for u in recipients]
+
+        sent = []
+
+        from notifications.providers import PushResult
+
+        class Recording:
+            def send_batch(self, platform, tokens, title, body, data):
+                sent.append((platform, sorted(tokens)))
+                return PushResult(success=len(tokens))
+
+        monkeypatch.setattr("notifications.tasks.get_provider", Recording)
+        # 설정 조회 + bulk insert + 디바이스 조회(수신자 수와 무관)
+        with django_assert_num_queries(3):
+            assert multi_user_push(items) == 5
+
+        # 같은 메시지는 플랫폼별 멀티캐스트 1번씩
+        assert sorted(sent) == [("android", ["tok-m1", "tok-m3", "tok-m5"]), ("ios", ["tok-m2", "tok-m4"])]
+        assert Notification.objects.filter(type="comment", user__in=recipients).count() == 5
+
+
+@pytest.fixture
+def fake_prefs(monkeypatch):
+    import fakeredis
+
+    from notifications import preferences
+
+    c = preferences.PreferenceCache.__new__(preferences.PreferenceCache)
+    c.r = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(preferences, "_cache", c)
+    return c
+
+
+@pytest.fixture
+def fake_devices(monkeypatch):
+    import fakeredis
+
+    from notifications import devices
+
+    c = devices.DeviceCache.__new__(devices.DeviceCache)
+    c.r = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(devices, "_cache", c)
+    return c
+
+
+@pytest.mark.usefixtures("fake_prefs", "fake_devices")
+class TestNotificationPreferences:
+    @pytest.fixture(autouse=True)
+    def _dummy_provider(self, settings):
+        settings.PUSH_PROVIDER = "dummy"
+        settings.CELERY_TASK_ALWAYS_EAGER = True
+
+    def test_missing_settings_row_uses_defaults(self, users):
+        from notifications.preferences import eligible_user_ids
+
+        a, b, c = users
+        NotificationSetting.objects.create(user=b, like=False)
+        # a, c 는 설정 행 없음 → 기본값(True)
+        assert sorted(eligible_user_ids([a.id, b.id, c.id], "like")) == sorted([str(a.id), str(c.id)])
+        assert sorted(eligible_user_ids([a.id, b.id], "post")) == sorted([str(a.id), str(b.id)])
+
+    def test_fanout_reaches_followers_without_settings_row(self, users, follow):
+        a, b = follow
+        sent = fanout_post_created(author_id=str(b.id), post_id=str(uuid.uuid4()), title="T", body="B")
+        assert sent == 0  # 디바이스 없음
+        assert Notification.objects.filter(user=a, type="post").exists()
+
+    def test_single_user_push_reads_settings_from_cache(self, users, django_assert_num_queries):
+        a, _, _ = users
+        NotificationSetting.objects.create(user=a)
+        single_user_push(user_id=str(a.id), type_="like", title="T", body="B", data={})
+        # 두 번째부터 설정/디바이스 토큰은 Redis 에서: 알림 insert 만
+        with django_assert_num_queries(1):
+            single_user_push(user_id=str(a.id), type_="like", title="T", body="B", data={})
+
+    def test_settings_update_invalidates_cache(self, auth_client, fake_prefs):
+        from notifications.preferences import allowed
+
+        client, u = auth_client
+        assert allowed(u.id, "like") is True
+        assert fake_prefs.get(str(u.id)) == {"follow": True, "post": True, "comment": True, "like": True}
+
+        r = client.put("/api/v1/notifications/settings", data={"like": False}, format="json")
+        assert r.status_code == 200
+        assert fake_prefs.get(str(u.id)) is None
+        assert allowed(u.id, "like") is False
+
+
+@pytest.mark.usefixtures("fake_prefs")
+class TestDeviceTokenCache:
+    @pytest.fixture(autouse=True)
+    def _dummy(self, settings):
+        settings.PUSH_PROVIDER = "dummy"
+        settings.CELERY_TASK_ALWAYS_EAGER = True
+
+    def test_chunk_lookup_hits_cache_without_db(self, users, fake_devices, django_assert_num_queries):
+        from notifications.devices import tokens_for
+
+        a, b, c = users
+        Device.objects.create(user=a, platform="android", device_token="tok-a")
+        Device.objects.create(user=a, platform="ios", device_token="tok-a2")
+        Device.objects.create(user=b, platform="web", device_token="tok-b")
+        ids = [a.id, b.id, c.id]
+
+        with django_assert_num_queries(1):
+            first = tokens_for(ids)
+        with django_assert_num_queries(0):
+            assert tokens_for(ids) == first
+        assert sorted(first[str(a.id)]) == [("android", "tok-a"), ("ios", "tok-a2")]
+        assert first[str(c.id)] == []  # 토큰 없는 사용자도 캐시
+
+    def test_register_and_destroy_invalidate(self, auth_client, fake_devices):
+        from notifications.devices import tokens_for
+
+        client, u = auth_client
+        assert tokens_for([u.id]) == {str(u.id): []}
+
+        r = client.post("/api/v1/notifications/devices/", data={"platform": "android", "device_token": "tok-new"}, format="json")
+        assert r.status_code == 201
+        assert tokens_for([u.id]) == {str(u.id): [("android", "tok-new")]}
+
+        assert client.delete(f"/api/v1/notifications/devices/{r.json()['id']}/").status_code == 204
+        assert tokens_for([u.id]) == {str(u.id): []}
+
+    def test_provider_feedback_invalidates(self, users, fake_devices):
+        from notifications.devices import tokens_for
+        from notifications.providers import PushResult, deliver
+
+        a, _, _ = users
+        Device.objects.create(user=a, platform="ios", device_token="bad-gone")
+        assert tokens_for([a.id]) == {str(a.id): [("ios", "bad-gone")]}
+
+        class Rejecting:
+            def send_batch(self, platform, tokens, title, body, data):
+                return PushResult(failure=len(tokens), invalid_tokens=list(tokens))
+
+        deliver(Rejecting(), "ios", ["bad-gone"], "T", "B", {})
+        assert tokens_for([a.id]) == {str(a.id): []}
+
+
+@pytest.mark.usefixtures("fake_prefs")
+class TestNotificationAggregation:
+    @pytest.fixture(autouse=True)
+    def _eager(self, settings, monkeypatch):
+        settings.PUSH_PROVIDER = "dummy"
+        settings.CELERY_TASK_ALWAYS_EAGER = True
+        self.pushed = []
+        monkeypatch.setattr("notifications.tasks._send_pushes", lambda items: self.pushed.extend(items) or len(items))
+
+    def test_likes_collapse_into_one_row_with_single_push(self, users):
+        from notifications.aggregation import record
+        from profiles.models import Profile
+
+        a, b, c = users
+        Profile.objects.create(user=b, nickname="alice")
+        ids = {record(user_id=a.id, kind="like", target="post:p1", actor_ids=[str(b.id)], data={"post_id": "p1"})}
+        for _ in range(3):
+            ids.add(record(user_id=a.id, kind="like", target="post:p1", actor_ids=[str(c.id), str(uuid.uuid4())], data={"post_id": "p1"}))
+
+        assert len(ids) == 1
+        n = Notification.objects.get(user=a, type="like")
+        assert n.count == 7
+        assert n.actors == [str(b.id), str(c.id), n.actors[2]]  # 앞쪽 표본만 유지
+        # 창의 첫 이벤트에서 푸시 1번(eager 라 즉시 실행 → 그 시점의 수)
+        assert len(self.pushed) == 1
+        assert self.pushed[0]["body"] == "alice liked your post."
+
+    def test_actor_sample_is_deduped_and_truncated(self, users, settings):
+        from notifications.aggregation import record
+
+        a, b, c = users
+        settings.NOTIFICATION_AGGREGATE_SAMPLE = 3
+        d, e = str(uuid.uuid4()), str(uuid.uuid4())
+        record(user_id=a.id, kind="like", target="post:p1", actor_ids=[str(b.id)], data={"post_id": "p1"})
+        record(user_id=a.id, kind="like", target="post:p1", actor_ids=[str(b.id), str(c.id)], data={"post_id": "p1"})
+        record(user_id=a.id, kind="like", target="post:p1", actor_ids=[str(c.id), d, e], data={"post_id": "p1"})
+
+        n = Notification.objects.get(user=a, type="like")
+        assert n.count == 6
+        assert n.actors == [str(b.id), str(c.id), d]
+
+    def test_push_body_uses_current_count(self, users):
+        from notifications.aggregation import record
+        from notifications.tasks import push_aggregate
+
+        a, b, _ = users
+        nid = record(user_id=a.id, kind="like", target="post:p1", actor_ids=[str(b.id)] + [str(uuid.uuid4()) for _ in range(1203)], data={"post_id": "p1"})
+        push_aggregate(nid)
+        assert self.pushed[-1]["body"] == "Someone and 1,203 others liked your post."
+        assert self.pushed[-1]["data"]["count"] == "1204"
+
+    def test_new_window_starts_new_row(self, users, settings, monkeypatch):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from notifications.aggregation import record
+
+        a, b, _ = users
+        settings.NOTIFICATION_AGGREGATE_WINDOW_SEC = 60
+        now = timezone.now()
+        record(user_id=a.id, kind="repost", target="post:p1", actor_ids=[str(b.id)], data={"post_id": "p1"})
+        monkeypatch.setattr("notifications.aggregation.timezone.now", lambda: now + timedelta(seconds=61))
+        record(user_id=a.id, kind="repost", target="post:p1", actor_ids=[str(b.id)], data={"post_id": "p1"})
+
+        assert Notification.objects.filter(user=a, type="post").count() == 2
+        assert len(self.pushed) == 2
+
+    def test_disabled_setting_skips(self, users):
+        from notifications.aggregation import record
+
+        a, b, _ = users
+        NotificationSetting.objects.create(user=a, like=False)
+        assert record(user_id=a.id, kind="like", target="post:p1", actor_ids=[str(b.id)], data={}) is None
+        assert not Notification.objects.filter(user=a).exists()
+
+
+class TestPushProviders:
+    def test_apns_pooled_sends_and_deactivates_unregistered(self, users, settings):
+        from notifications.fake_push_server import FakeApnsServer
+        from notifications.providers import ApnsProvider, deliver, reset_providers
+
+        a, b, _ = users
+        Device.objects.create(user=a, platform="ios", device_token="tok-ok")
+        Device.objects.create(user=b, platform="ios", device_token="bad-gone")
+        settings.PUSH_CONCURRENCY = 4
+        settings.APNS_AUTH_KEY_PATH = ""
+        reset_providers()
+
+        with FakeApnsServer(latency_ms=1) as server:
+            provider = ApnsProvider(endpoint=server.url)
+            try:
+                res = provider.send_batch("ios", ["tok-ok", "bad-gone", "tok-2"], "T", "B", {"post_id": "p1"})
+                assert (res.success, res.failure, res.invalid_tokens) == (2, 1, ["bad-gone"])
+
+                assert deliver(provider, "ios", ["tok-ok", "bad-gone"], "T", "B", {}) == 1
+                # 영구 연결 재사용: 요청 수보다 연결 수가 적다
+                assert server.requests == 5 and server.connections <= 4
+            finally:
+                provider.close()
+                reset_providers()
+
+        assert Device.objects.get(device_token="bad-gone").is_active is False
+        assert Device.objects.get(device_token="tok-ok").is_active is True
+
+    def test_http2_streams_are_multiplexed(self, settings):
+        from notifications.fake_push_server import FakeApnsServer, FakeFcmServer
+        from notifications.providers import ApnsProvider, FcmProvider, reset_providers
+
+        settings.PUSH_CONCURRENCY = 8
+        settings.PUSH_POOL_SIZE = 1
+        settings.APNS_AUTH_KEY_PATH = ""
+        reset_providers()
+        tokens = [f"tok-{i}" for i in range(16)]
+        for server_cls, provider_cls in ((FakeApnsServer, ApnsProvider), (FakeFcmServer, FcmProvider)):
+            with server_cls(latency_ms=20) as server:
+                provider = provider_cls(endpoint=server.url)
+                try:
+                    assert provider.send_batch("ios", tokens, "T", "B", {}).success == 16
+                finally:
+                    provider.close()
+                # h2c 연결 하나에 여러 스트림이 동시에 열린다
+                assert server.connections == 1 and server.max_streams > 1
+        reset_providers()
+
+    def test_fcm_deactivates_unregistered(self, users, settings):
+        from notifications.fake_push_server import FakeFcmServer
+        from notifications.providers import FcmProvider, deliver, reset_providers
+
+        a, b, _ = users
+        Device.objects.create(user=a, platform="android", device_token="tok-ok")
+        Device.objects.create(user=b, platform="android", device_token="bad-gone")
+        settings.PUSH_CONCURRENCY = 4
+        reset_providers()
+
+        with FakeFcmServer(latency_ms=1) as server:
+            provider = FcmProvider(endpoint=server.url)
+            try:
+                res = provider.send_batch("android", ["tok-ok", "bad-gone", "tok-2"], "T", "B", {"post_id": "p1"})
+                assert (res.success, res.failure, res.invalid_tokens) == (2, 1, ["bad-gone"])
+                assert deliver(provider, "android", ["tok-ok", "bad-gone"], "T", "B", {}) == 1
+            finally:
+                provider.close()
+                reset_providers()
+
+        assert Device.objects.get(device_token="bad-gone").is_active is False
+        assert Device.objects.get(device_token="tok-ok").is_active is True
+
+    def test_provider_instance_is_reused(self, settings):
+        from notifications.providers import get_provider, reset_providers
+
+        settings.PUSH_PROVIDER = "dummy"
+        reset_providers()
+        assert get_provider() is get_provider()
+        assert get_provider().send_multicast("android", ["t1", "t2"], "T", "B", {}) == (2, 0)
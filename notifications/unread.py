@@ -0,0 +1,140 @@
+"""
+안 읽은 알림 수(배지) 카운터.
+
+키
+- notif:unread:{user} : 해시 {"n": 안 읽은 수, "_f": 채움 표시}. TTL NOTIFICATION_UNREAD_TTL_SEC
+- notif:unread:dirty  : 카운터가 바뀐 사용자 id 집합(주기 보정 대상)
+
+쓰기: 알림 insert / 읽음 처리가 DB 에 반영된 뒤 HINCRBY 로 델타만 더한다(O(1)).
+  채움 표시가 없는 해시(만료/미생성)에 더해진 델타는 읽을 때 무시되고 DB 에서 다시 센다.
+읽기: "_f" 가 있으면 "n" 을 그대로, 없으면 (user, is_read, -created_at) 인덱스로 COUNT 한 뒤 채운다.
+  알림함과 같이 보존 기간(retention.cutoff) 안의 행만 센다(만료됐지만 아직 스윕 전인 행 제외).
+보정: reconcile() 이 dirty 사용자를 꺼내 GROUP BY 한 번으로 DB 기준 값을 덮어쓴다
+  (바깥 트랜잭션 롤백, 채우기와 증감이 엇갈린 경우 등).
+Redis 장애 시 읽기는 DB 로, 증감은 건너뛴다(다음 보정/만료 때 맞춰진다).
+"""
+
+import logging
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+import redis
+from django.conf import settings
+from django.db.models import Count
+
+from .models import Notification
+
+log = logging.getLogger(__name__)
+
+FILLED = "_f"
+
+
+class UnreadCounter:
+    KEY = "notif:unread:{user}"
+    DIRTY = "notif:unread:dirty"
+
+    def __init__(self, url: str):
+        self.r = redis.Redis.from_url(url, decode_responses=True)
+
+    @property
+    def ttl(self) -> int:
+        return getattr(settings, "NOTIFICATION_UNREAD_TTL_SEC", 86400)
+
+    def read(self, user_id: str) -> Optional[int]:
+        raw = self.r.hgetall(self.KEY.format(user=user_id))
+        if FILLED not in raw:
+            return None
+        return max(0, int(raw.get("n", 0)))
+
+    def fill(self, counts: Dict[str, int]) -> None:
+        pipe = self.r.pipeline(transaction=True)
+        for user_id, n in counts.items():
+            key = self.KEY.format(user=user_id)
+            pipe.delete(key)
+            pipe.hset(key, mapping={"n": n, FILLED: 1})
+            pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def incr(self, deltas: Dict[str, int]) -> None:
+        pipe = self.r.pipeline(transaction=False)
+        for user_id, d in deltas.items():
+            key = self.KEY.format(user=user_id)
+            pipe.hincrby(key, "n", d)
+            pipe.expire(key, self.ttl)
+        pipe.sadd(self.DIRTY, *deltas)
+        pipe.execute()
+
+    def touch(self, user_ids: List[str]) -> None:
+        self.r.sadd(self.DIRTY, *user_ids)
+
+    def drain(self, limit: int) -> List[str]:
+        return self.r.spop(self.DIRTY, limit) or []
+
+
+_counter = UnreadCounter(settings.REDIS_URL)
+
+
+def _db_counts(user_ids: Iterable[str]) -> Dict[str, int]:
+    from .retention import cutoff
+
+    user_ids = [str(u) for u in user_ids]
+    out = dict.fromkeys(user_ids, 0)
+    rows = Notification.objects.filter(user_id__in=user_ids, is_read=False, created_at__gte=cutoff()).order_by().values_list("user_id").annotate(n=Count("id"))
+    out.update({str(uid): n for uid, n in rows})
+    return out
+
+
+def count(user_id) -> int:
+    """안 읽은 알림 수. 캐시 미스면 DB 에서 한 번 세어 채운다."""
+    user_id = str(user_id)
+    try:
+        cached = _counter.read(user_id)
+        if cached is not None:
+            return cached
+    except redis.RedisError as e:
+        log.warning("unread counter unavailable, counting in DB: %s", e)
+        return _db_counts([user_id])[user_id]
+    fresh = _db_counts([user_id])
+    try:
+        _counter.fill(fresh)
+    except redis.RedisError as e:
+        log.warning("unread counter fill failed: %s", e)
+    return fresh[user_id]
+
+
+def add(user_ids: Iterable, delta: int = 1) -> None:
+    """user_ids 의 각 원소마다 delta 를 더한다(같은 사용자가 여러 번 나오면 그만큼)."""
+    deltas = Counter()
+    for uid in user_ids:
+        deltas[str(uid)] += delta
+    deltas = {uid: d for uid, d in deltas.items() if d}
+    if not deltas:
+        return
+    try:
+        _counter.incr(deltas)
+    except redis.RedisError as e:
+        log.warning("unread counter update failed for %s users: %s", len(deltas), e)
+
+
+def refresh(user_ids: Iterable) -> None:
+    """user_ids 의 카운터를 다음 보정(reconcile)에서 DB 기준으로 다시 세게 한다(보존 기간이 지나 빠진 행 반영)."""
+    user_ids = [str(u) for u in user_ids]
+    if not user_ids:
+        return
+    try:
+        _counter.touch(user_ids)
+    except redis.RedisError as e:
+        log.warning("unread counter refresh failed for %s users: %s", len(user_ids), e)
+
+
+def reconcile(limit: Optional[int] = None) -> int:
+    """카운터가 바뀐 사용자를 최대 limit 명 꺼내 DB 기준으로 덮어쓴다. 처리한 사용자 수."""
+    limit = limit or getattr(settings, "NOTIFICATION_UNREAD_RECONCILE_BATCH", 1000)
+    try:
+        user_ids = _counter.drain(limit)
+        if user_ids:
+            _counter.fill(_db_counts(user_ids))
+    except redis.RedisError as e:
+        log.warning("unread counter reconcile skipped: %s", e)
+        return 0
+    return len(user_ids)
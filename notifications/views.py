@@ -1,3 +1,4 @@
+from django.db.models import Q, Subquery
 from django.utils import timezone
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, OpenApiResponse, OpenApiTypes, extend_schema, extend_schema_view, inline_serializer
 from rest_framework import mixins, serializers, status, viewsets
@@ -7,8 +8,11 @@ from rest_framework.response import Response
 
 from common.schema import ErrorOut
 
+from . import devices, preferences, unread
 from .models import Device, Notification, NotificationSetting
-from .serializers import DeviceIn, DeviceOut, MarkReadIn, NotificationOut, NotificationSettingIn, NotificationSettingOut
+from .paginations import NotificationCursorPagination
+from .retention import cutoff
+from .serializers import DeviceIn, DeviceOut, MarkAllReadIn, MarkReadIn, NotificationOut, NotificationSettingIn, NotificationSettingOut
 
 
 @extend_schema_view(
@@ -49,7 +53,10 @@ class DeviceViewSet(mixins.ListModelMixin, mixins.CreateModelMixin, mixins.Destr
     def perform_create(self, serializer):
         # 같은 token이 다른 유저에 등록되어 있다면 소유권 이전 or 비활성화 정책 선택 가능
         token = serializer.validated_data["device_token"]
-        Device.objects.filter(device_token=token).exclude(user=self.request.user).update(is_active=False)
+        previous = Device.objects.filter(device_token=token).exclude(user=self.request.user)
+        # 푸시 경로의 토큰 캐시(notifications.devices): 이전 소유자와 현재 사용자 모두 무효화
+        devices.invalidate([self.request.user.id, *previous.values_list("user_id", flat=True)])
+        previous.update(is_active=False)
         serializer.save(user=self.request.user, is_active=True)
 
     def create(self, request, *args, **kwargs):
@@ -63,6 +70,7 @@ class DeviceViewSet(mixins.ListModelMixin, mixins.CreateModelMixin, mixins.Destr
         obj = self.get_object()
         obj.is_active = False
         obj.save(update_fields=["is_active"])
+        devices.invalidate([obj.user_id])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -107,6 +115,8 @@ class NotificationSettingViewSet(viewsets.ViewSet):
             setattr(obj, k, v)
         obj.updated_at = timezone.now()
         obj.save()
+        # 푸시 경로의 설정 캐시(notifications.preferences) 무효화
+        preferences.invalidate(request.user.id)
         return Response(NotificationSettingOut(obj).data)
 
 
@@ -114,10 +124,17 @@ class NotificationSettingViewSet(viewsets.ViewSet):
     list=extend_schema(
         tags=["Notifications"],
         summary="내 알림 목록",
-        description=("현재 사용자에게 발송된 알림을 최신순으로 반환합니다.\n" "- `read` 쿼리: `true` → 읽은 것만, `false` → 읽지 않은 것만, 생략 시 전체"),
+        description=(
+            "현재 사용자에게 발송된 알림 중 보존 기간(NOTIFICATION_RETENTION_DAYS) 안의 것을 최신순으로 반환합니다(커서 페이지네이션, `next`/`previous` 링크로 이동).\n"
+            "- `read` 쿼리: `true` → 읽은 것만, `false` → 읽지 않은 것만, 생략 시 전체"
+        ),
         operation_id="notifications_list",
         parameters=[
-            OpenApiParameter(name="read", location=OpenApiParameter.QUERY, required=False, type=OpenApiTypes.STR, description="읽음 필터: `true` | `false`", enum=["true", "false"])
+            OpenApiParameter(
+                name="read", location=OpenApiParameter.QUERY, required=False, type=OpenApiTypes.STR, description="읽음 필터: `true` | `false`", enum=["true", "false"]
+            ),
+            OpenApiParameter(name="cursor", location=OpenApiParameter.QUERY, required=False, type=OpenApiTypes.STR, description="이전 응답의 next/previous 커서"),
+            OpenApiParameter(name="page_size", location=OpenApiParameter.QUERY, required=False, type=OpenApiTypes.INT, description="페이지 크기(기본 20, 최대 100)"),
         ],
         responses={200: OpenApiResponse(response=NotificationOut(many=True)), 401: OpenApiResponse(response=ErrorOut)},
     ),
@@ -125,9 +142,11 @@ class NotificationSettingViewSet(viewsets.ViewSet):
 class NotificationViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = NotificationOut
+    pagination_class = NotificationCursorPagination
 
     def get_queryset(self):
-        qs = Notification.objects.filter(user=self.request.user).order_by("-created_at")
+        # 보존 기간 안의 알림만(스윕 전의 만료 행은 읽지 않음 → 인덱스 범위가 최근 구간으로 한정)
+        qs = Notification.objects.filter(user=self.request.user, created_at__gte=cutoff()).order_by("-created_at", "-id")
         read = self.request.query_params.get("read")
         if read == "true":
             qs = qs.filter(is_read=True)
@@ -156,5 +175,49 @@ class NotificationViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
         ser = MarkReadIn(data=request.data)
         ser.is_valid(raise_exception=True)
         ids = ser.validated_data["ids"]
-        updated = Notification.objects.filter(user=request.user, id__in=ids).update(is_read=True)
+        # 이미 읽은 알림은 건드리지 않는다 → updated 가 곧 안 읽은 수 감소분
+        # 카운터와 같은 기준: 보존 기간이 지난 행은 읽음 처리 대상에서 제외(안 읽은 수에 없던 행)
+        updated = Notification.objects.filter(user=request.user, id__in=ids, is_read=False, created_at__gte=cutoff()).update(is_read=True)
+        unread.add([request.user.id], -updated)
         return Response({"updated": updated})
+
+    @extend_schema(
+        tags=["Notifications"],
+        summary="알림 일괄 읽음 처리",
+        description="`until` 알림과 그보다 오래된(최신순 목록에서 그 아래) 안 읽은 알림을 UPDATE 한 번으로 읽음 처리합니다.\n`until` 을 생략하면 안 읽은 알림 전체를 읽음 처리합니다.",
+        operation_id="notifications_mark_all_read",
+        request=MarkAllReadIn,
+        responses={
+            200: OpenApiResponse(response=inline_serializer(name="MarkAllReadOut", fields={"updated": serializers.IntegerField(help_text="읽음 처리된 개수")})),
+            400: OpenApiResponse(response=ErrorOut),
+            401: OpenApiResponse(response=ErrorOut),
+        },
+        examples=[OpenApiExample("요청 예시", value={"until": "11111111-1111-1111-1111-111111111111"}, request_only=True)],
+    )
+    @action(detail=False, methods=["POST"])
+    def mark_all_read(self, request):
+        ser = MarkAllReadIn(data=request.data)
+        ser.is_valid(raise_exception=True)
+        until = ser.validated_data.get("until")
+        qs = Notification.objects.filter(user=request.user, is_read=False, created_at__gte=cutoff())
+        if until:
+            # 기준 알림의 (created_at, id) 이하: 목록 정렬(-created_at, -id)과 같은 순서. 기준 조회는 서브쿼리로 같은 문장에
+            anchor = Subquery(Notification.objects.filter(user=request.user, id=until).values("created_at")[:1])
+            qs = qs.filter(Q(created_at__lt=anchor) | Q(created_at=anchor, id__lte=until))
+        updated = qs.update(is_read=True)
+        unread.add([request.user.id], -updated)
+        return Response({"updated": updated})
+
+    @extend_schema(
+        tags=["Notifications"],
+        summary="안 읽은 알림 수",
+        description="배지용 안 읽은 알림 수를 반환합니다(Redis 카운터, 미스 시 DB 에서 한 번 계산).",
+        operation_id="notifications_unread_count",
+        responses={
+            200: OpenApiResponse(response=inline_serializer(name="UnreadCountOut", fields={"unread": serializers.IntegerField(help_text="안 읽은 알림 수")})),
+            401: OpenApiResponse(response=ErrorOut),
+        },
+    )
+    @action(detail=False, methods=["GET"])
+    def unread_count(self, request):
+        return Response({"unread": unread.count(request.user.id)})
@@ -0,0 +1,72 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+
+from polls import tally
+from polls.models import PollOption
+from polls.services import cast_vote, create_poll
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Benchmark concurrent voters on a single poll: synchronous option counters vs sharded Redis write-behind. Use on a dev database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--voters", type=int, default=1000)
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--mode", choices=["db", "sharded"], default="sharded")
+        parser.add_argument("--shards", type=int, default=8)
+        parser.add_argument("--keep", action="store_true", help="Keep the generated poll/users after the run.")
+
+    def handle(self, *args, **opts):
+        n, mode = opts["voters"], opts["mode"]
+        sharded = mode == "sharded"
+        with override_settings(POLL_COUNTER_WRITE_BEHIND=sharded, POLL_TALLY_SHARDS=opts["shards"] if sharded else 1):
+            self._run(n, mode, opts)
+
+    def _run(self, n, mode, opts):
+        owner = User.objects.create()
+        created = create_poll(owner=owner, option_texts=["A", "B"])
+        poll, options = created.poll, created.options
+        users = User.objects.bulk_create([User() for _ in range(n)], batch_size=1000)
+        user_ids = [u.id for u in users]
+
+        def timed(i):
+            # 모두 같은 폴, 옵션 2개에 번갈아 투표 → 같은 옵션 행에 경합이 몰리는 상황
+            # 스레드별 커넥션은 재사용(연결 비용이 아니라 투표 경로만 측정), 종료 시 정리
+            t0 = time.perf_counter()
+            cast_vote(poll=poll, voter=users[i], option=options[i % 2])
+            return time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=opts["concurrency"]) as pool:
+            latencies = sorted(pool.map(timed, range(n)))
+            elapsed = time.perf_counter() - t0
+            list(pool.map(lambda _: connection.close(), range(opts["concurrency"])))
+
+        flush_elapsed = 0.0
+        if mode == "sharded":
+            t1 = time.perf_counter()
+            while tally.flush():
+                pass
+            flush_elapsed = time.perf_counter() - t1
+
+        stored = sum(PollOption.objects.filter(poll=poll).values_list("vote_count", flat=True))
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"mode={mode} voters={n} concurrency={opts['concurrency']} "
+                f"throughput={n / elapsed:.0f}/s p50={statistics.median(latencies) * 1000:.1f}ms p99={p99 * 1000:.1f}ms "
+                f"flush={flush_elapsed:.2f}s counted={stored} tally={sum(tally.counts(poll.id).values())}"
+            )
+        )
+
+        if not opts["keep"]:
+            poll.delete()
+            User.objects.filter(id__in=user_ids + [owner.id]).delete()
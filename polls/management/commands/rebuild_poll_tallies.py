@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from polls import tally
+
+
+class Command(BaseCommand):
+    help = "Recompute poll option vote counts from poll_votes with one GROUP BY and refresh the Redis tallies."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--poll", action="append", dest="polls", help="Limit to this poll id (repeatable).")
+        parser.add_argument("--dry-run", action="store_true", help="Report drifted options without updating them.")
+
+    def handle(self, *args, **opts):
+        fixed = tally.rebuild(opts["polls"], dry_run=opts["dry_run"])
+        verb = "Would fix" if opts["dry_run"] else "Fixed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {fixed} options."))
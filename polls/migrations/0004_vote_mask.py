@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0003_alter_poll_allow_multiple'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vote',
+            name='mask',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        # 기존 단일 선택 표 백필: mask = 1 << option.position
+        migrations.RunSQL(
+            'UPDATE poll_votes AS v SET mask = 1 << o.position FROM poll_options AS o WHERE o.id = v.option_id',
+            migrations.RunSQL.noop,
+        ),
+    ]
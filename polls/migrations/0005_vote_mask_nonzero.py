@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0004_vote_mask"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # 제약 전에 ORM 으로 만들어져 mask 가 비어 있는 표 백필: mask = 1 << option.position
+        migrations.RunSQL(
+            "UPDATE poll_votes AS v SET mask = 1 << o.position FROM poll_options AS o WHERE o.id = v.option_id AND v.mask = 0",
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name="vote",
+            constraint=models.CheckConstraint(condition=models.Q(("mask__gt", 0)), name="ck_vote_mask_nonzero"),
+        ),
+    ]
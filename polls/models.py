@@ -2,7 +2,7 @@ import uuid
 
 from django.conf import settings
 from django.db import models
-from django.db.models import UniqueConstraint
+from django.db.models import CheckConstraint, Q, UniqueConstraint
 
 
 class Poll(models.Model):
@@ -39,12 +39,14 @@ class PollOption(models.Model):
         return f"Option<{self.id}> poll={self.poll_id} pos={self.position}"
 
 
-# single choice일 때 (voter, poll) 유니크로 1표만 허용하며 다중 선택 확장 시 (voter, poll, option) 유니크로 전환하고 allowed_max 등 정책이 필요
+# (voter, poll) 유니크로 사용자당 1행만 두고, 선택한 옵션 집합은 position 비트마스크(mask)로 저장한다.
+# 단일 선택은 비트 1개, 복수 선택(allow_multiple)은 여러 비트. option 은 선택 중 가장 앞선(position 최소) 옵션.
 class Vote(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     voter = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="votes", db_index=True)
     poll = models.ForeignKey(Poll, on_delete=models.CASCADE, related_name="votes", db_index=True)
     option = models.ForeignKey(PollOption, on_delete=models.CASCADE, related_name="votes", db_index=True)
+    mask = models.PositiveSmallIntegerField(default=0)  # bit i = position i 옵션 선택(옵션 최대 5개 → 0..31)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -52,11 +54,19 @@ class Vote(models.Model):
         # 데이터 무결성: option은 반드시 같은 poll에 속해야 함(애플리케이션 레벨에서 강제)
         constraints = [
             UniqueConstraint(fields=["voter", "poll"], name="uq_vote_voter_poll"),
+            # 선택 없는 표(mask=0)는 집계(비트마스크 GROUP BY)에서 빠지므로 저장하지 않는다
+            CheckConstraint(condition=Q(mask__gt=0), name="ck_vote_mask_nonzero"),
         ]
         indexes = [
             models.Index(fields=["poll"], name="idx_vote_poll"),
             models.Index(fields=["option"], name="idx_vote_option"),
         ]
 
+    def save(self, *args, **kwargs):
+        # ORM 으로 만든 단일 선택 표: option 의 비트로 mask 를 채운다(복수 선택은 services.cast_vote 가 mask 를 넘긴다)
+        if not self.mask and self.option_id:
+            self.mask = 1 << self.option.position
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Vote<{self.id}> voter={self.voter_id} poll={self.poll_id} option={self.option_id}"
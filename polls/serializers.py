@@ -8,6 +8,14 @@ class PollOptionOut(serializers.ModelSerializer):
         model = PollOption
         fields = ["id", "text", "position", "vote_count"]
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # context["tally"](option_id → 득표 수)가 있으면 집계 캐시 값을 우선 사용
+        tally = self.context.get("tally")
+        if tally is not None:
+            data["vote_count"] = tally.get(str(instance.id), instance.vote_count)
+        return data
+
 
 class PollOut(serializers.ModelSerializer):
     options = PollOptionOut(many=True, read_only=True)
@@ -34,9 +42,18 @@ class PollCreateIn(serializers.Serializer):
 
 
 class VoteIn(serializers.Serializer):
-    option_id = serializers.UUIDField()
+    # 단일 선택은 option_id, 복수 선택 투표는 option_ids(둘 중 하나만)
+    option_id = serializers.UUIDField(required=False)
+    option_ids = serializers.ListField(child=serializers.UUIDField(), min_length=1, max_length=5, required=False)
+
+    def validate(self, data):
+        if ("option_id" in data) == ("option_ids" in data):
+            raise serializers.ValidationError("Provide either option_id or option_ids")
+        data["option_ids"] = list(dict.fromkeys(data["option_ids"])) if "option_ids" in data else [data["option_id"]]
+        return data
 
 
 class VoteOut(serializers.Serializer):
     poll = PollOut()
     my_option_id = serializers.UUIDField(allow_null=True)
+    my_option_ids = serializers.ListField(child=serializers.UUIDField())
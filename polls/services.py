@@ -1,12 +1,13 @@
 from __future__ import annotations
 
+import uuid
 from dataclasses import dataclass
 from typing import Sequence
 
 from django.core.exceptions import ValidationError
-from django.db import transaction
-from django.db.models import F
+from django.db import connection, transaction
 
+from . import tally
 from .models import Poll, PollOption, Vote
 
 MIN_OPTIONS = 2
@@ -31,17 +32,22 @@ def create_poll(*, owner, option_texts: Sequence[str], allow_multiple: bool = Fa
 
     with transaction.atomic():
         poll = Poll.objects.create(owner=owner, allow_multiple=allow_multiple)
-        options = []
-        for i, text in enumerate(texts):
-            options.append(PollOption.objects.create(poll=poll, text=text, position=i))
-        return CreatedPoll(poll=poll, options=options)
+        # 옵션은 INSERT 한 번으로(UUID pk 는 파이썬에서 생성되므로 반환 객체에 그대로 채워짐)
+        options = PollOption.objects.bulk_create([PollOption(poll=poll, text=text, position=i) for i, text in enumerate(texts)])
+    # 0 표로 집계 캐시를 미리 채워 둔다(투표 폭주 중 캐시 미스 → DB 재적재 경합을 피함)
+    tally.prime(poll.id, [o.id for o in options])
+    return CreatedPoll(poll=poll, options=options)
 
 
 @dataclass(frozen=True)
 class VoteResult:
     poll: Poll
-    options: list[PollOption]
-    my_option_id: str | None
+    counts: dict[str, int]  # option_id → 득표 수(집계 캐시 기준)
+    my_option_ids: list[str]  # position 순
+
+    @property
+    def my_option_id(self) -> str | None:
+        return self.my_option_ids[0] if self.my_option_ids else None
 
 
 def _ensure_option_in_poll(poll: Poll, option: PollOption):
@@ -49,38 +55,97 @@ def _ensure_option_in_poll(poll: Poll, option: PollOption):
         raise ValidationError("Option does not belong to poll")
 
 
-@transaction.atomic
-def cast_vote(*, poll: Poll, voter, option: PollOption) -> VoteResult:
-    _ensure_option_in_poll(poll, option)
-
-    # 단일 선택을 가정하며 기존 표가 있으면 다른 옵션으로 '이동' 처리(이전 옵션 -1, 새 옵션 +1)
-    existing = Vote.objects.select_for_update().filter(voter=voter, poll=poll).first()
-    if existing is None:
-        # 신규 투표
-        Vote.objects.create(voter=voter, poll=poll, option=option)
-        PollOption.objects.filter(id=option.id).update(vote_count=F("vote_count") + 1)
-        my_option_id = str(option.id)
-    elif existing.option_id == option.id:
-        # 동일 옵션 재투표: idempotent
-        my_option_id = str(option.id)
-    else:
-        # 옵션 이동
-        old_option_id = existing.option_id
-        Vote.objects.filter(pk=existing.pk).update(option_id=option.id)
-        PollOption.objects.filter(id=old_option_id).update(vote_count=F("vote_count") - 1)
-        PollOption.objects.filter(id=option.id).update(vote_count=F("vote_count") + 1)
-        my_option_id = str(option.id)
-
-    options = list(PollOption.objects.filter(poll=poll).order_by("position"))
-    return VoteResult(poll=poll, options=options, my_option_id=my_option_id)
-
-
-@transaction.atomic
+def options_mask(options: Sequence[PollOption]) -> int:
+    mask = 0
+    for o in options:
+        mask |= 1 << o.position
+    return mask
+
+
+def _mask_deltas(old_mask: int, new_mask: int, option_ids: dict[int, str]) -> dict[str, int]:
+    # 바뀐 비트만 카운터 델타로(빠진 옵션 -1, 새로 고른 옵션 +1). 그대로인 옵션은 건드리지 않는다.
+    changed = old_mask ^ new_mask
+    return {option_ids[pos]: (1 if new_mask >> pos & 1 else -1) for pos in option_ids if changed >> pos & 1}
+
+
+# 기존 표를 잠그고(old) 같은 문장에서 upsert 한다. 선택 집합(mask)이 같으면 WHERE 로 걸러 행을 건드리지 않는다.
+# inserted: 신규 INSERT 면 true, 선택 변경(UPDATE)이면 false, 아무 변화가 없으면 NULL
+# 델타 계산에 필요한 position → option_id 도 같은 문장에서 함께 읽는다.
+# 폴 공유 락(tally.VOTE_LOCK_SQL, 트랜잭션 단위)도 여기서 잡아 같은 트랜잭션의 record() 까지 유지한다(rebuild 와 순서 보장).
+_UPSERT_VOTE_SQL = f"""
+WITH old AS (
+    SELECT mask FROM {Vote._meta.db_table} WHERE voter_id = %s AND poll_id = %s FOR UPDATE
+), up AS (
+    INSERT INTO {Vote._meta.db_table} (id, voter_id, poll_id, option_id, mask, created_at)
+    VALUES (%s, %s, %s, %s, %s, now())
+    ON CONFLICT (voter_id, poll_id) DO UPDATE SET option_id = EXCLUDED.option_id, mask = EXCLUDED.mask
+    WHERE {Vote._meta.db_table}.mask IS DISTINCT FROM EXCLUDED.mask
+    RETURNING (xmax = 0) AS inserted
+)
+SELECT
+    {tally.VOTE_LOCK_SQL},
+    (SELECT mask FROM old),
+    (SELECT inserted FROM up),
+    (SELECT array_agg(position ORDER BY position) FROM {PollOption._meta.db_table} WHERE poll_id = %s),
+    (SELECT array_agg(id ORDER BY position) FROM {PollOption._meta.db_table} WHERE poll_id = %s)
+"""
+
+_DELETE_VOTE_SQL = f"""
+WITH d AS (
+    DELETE FROM {Vote._meta.db_table} WHERE voter_id = %s AND poll_id = %s RETURNING mask
+)
+SELECT
+    {tally.VOTE_LOCK_SQL},
+    (SELECT array_agg(o.id) FROM d JOIN {PollOption._meta.db_table} AS o ON o.poll_id = %s AND (d.mask & (1 << o.position)) <> 0)
+"""
+
+
+def cast_vote(*, poll: Poll, voter, option: PollOption | None = None, options: Sequence[PollOption] | None = None) -> VoteResult:
+    """
+    단일 선택은 option, 복수 선택(poll.allow_multiple)은 options 로 고른 옵션 전체를 넘긴다.
+    재투표는 이전 선택을 새 선택 집합으로 '교체'하며, 바뀐 옵션의 카운터만 움직인다.
+    """
+    chosen = sorted({o.id: o for o in (options if options is not None else [option]) if o is not None}.values(), key=lambda o: o.position)
+    if not chosen:
+        raise ValidationError("At least one option is required")
+    for o in chosen:
+        _ensure_option_in_poll(poll, o)
+    if len(chosen) > 1 and not poll.allow_multiple:
+        raise ValidationError("Poll does not allow multiple choices")
+    new_mask = options_mask(chosen)
+
+    deltas: dict[str, int] = {}
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute(_UPSERT_VOTE_SQL, [voter.id, poll.id, uuid.uuid4(), voter.id, poll.id, chosen[0].id, new_mask, tally.lock_key(poll.id), poll.id, poll.id])
+        _, old_mask, inserted, positions, ids = cur.fetchone()
+        option_ids = {pos: str(oid) for pos, oid in zip(positions or [], ids or [], strict=True)}
+        if inserted is True:
+            # 신규 투표
+            deltas = _mask_deltas(0, new_mask, option_ids)
+        elif inserted is False and old_mask is not None:
+            # 선택 변경: 바뀐 비트만 반영
+            deltas = _mask_deltas(old_mask, new_mask, option_ids)
+        # inserted 가 NULL 이면 동일 선택 재투표: idempotent
+        # write-behind 모드에서는 옵션 행을 잠그지 않고 델타를 Redis 에 남긴다(tally.record → flush)
+        if deltas and not tally.write_behind():
+            tally.apply_deltas(deltas)
+        if not (inserted is False and old_mask is None):
+            # 폴 락을 쥔 채로 반영(rebuild 는 이 트랜잭션이 끝난 뒤 델타까지 보고 재계산)
+            tally.record(poll.id, deltas)
+
+    if inserted is False and old_mask is None:
+        # 같은 사용자의 동시 첫 투표 경합으로 이전 선택을 알 수 없는 드문 경우 → 이 폴만 poll_votes 기준으로 재계산(트랜잭션 밖에서)
+        tally.rebuild([poll.id])
+    return VoteResult(poll=poll, counts=tally.counts(poll.id), my_option_ids=[str(o.id) for o in chosen])
+
+
 def retract_vote(*, poll: Poll, voter) -> VoteResult:
-    # 사용자의 표를 철회하며 존재하지 않으면 idempotent.
-    existing = Vote.objects.select_for_update().filter(voter=voter, poll=poll).first()
-    if existing:
-        PollOption.objects.filter(id=existing.option_id).update(vote_count=F("vote_count") - 1)
-        existing.delete()
-    options = list(PollOption.objects.filter(poll=poll).order_by("position"))
-    return VoteResult(poll=poll, options=options, my_option_id=None)
+    # 사용자의 표(선택 전체)를 철회하며 존재하지 않으면 idempotent.
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute(_DELETE_VOTE_SQL, [voter.id, poll.id, tally.lock_key(poll.id), poll.id])
+        _, option_ids = cur.fetchone()
+        deltas = {str(oid): -1 for oid in option_ids or []}
+        if deltas and not tally.write_behind():
+            tally.apply_deltas(deltas)
+        tally.record(poll.id, deltas)
+    return VoteResult(poll=poll, counts=tally.counts(poll.id), my_option_ids=[])
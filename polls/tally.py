@@ -0,0 +1,352 @@
+"""
+투표 집계 캐시(폴별 Redis 해시) + 선택적 write-behind 카운터(POLL_COUNTER_WRITE_BEHIND=True).
+
+키
+- poll:tally:{poll}:{shard} : option_id → 득표 수(샤드별 부분합). 샤드 0 에만 채움 표시 필드 "_n"(옵션 개수).
+  샤드 키의 TTL 은 쓰기/채우기마다 함께 갱신한다(한꺼번에 만료)
+- poll:tally:dirty          : 집계가 바뀐 poll id 집합(주기 보정 대상)
+- poll:delta:{poll}:{shard} : write-behind 모드에서 아직 poll_options 에 반영되지 않은 델타
+- poll:delta:dirty          : 반영할 델타가 있는 poll id 집합
+
+쓰기: 투표/철회 트랜잭션 안에서 DB(poll_votes) 쓰기 뒤 임의의 샤드에 HINCRBY 로 델타만 더한다.
+  바이럴 폴에서 한 해시 키에 몰리는 쓰기를 POLL_TALLY_SHARDS 개 키로 분산한다(클러스터에서는 노드도 분산).
+  - 기본 모드: poll_options.vote_count 는 투표 트랜잭션 안에서 UPDATE 1회로 함께 갱신
+  - write-behind 모드: poll_options 는 건드리지 않고 델타를 Redis 에 쌓아 flush() 가 주기적으로 일괄 반영
+    (같은 옵션 행을 잡는 투표끼리의 행 잠금 경합이 사라진다)
+읽기: 샤드 0 에 "_n" 이 있으면 샤드 합을 그대로 쓰고, 없으면 DB 로 다시 채운다.
+  write-behind 모드에서는 poll_options 가 뒤처져 있으므로 poll_votes GROUP BY 로 센다.
+보정
+- reconcile(): dirty 폴을 꺼내 DB 기준으로 캐시를 덮어쓴다(바깥 트랜잭션 롤백 등으로 어긋난 값 정리).
+- rebuild(): poll_votes 선택 비트마스크별 GROUP BY 한 번으로 poll_options.vote_count 를 재계산하고 캐시를 다시 채운다.
+순서(advisory lock)
+- 투표/철회는 쓰기 문장 안에서 폴 락 poll:tally:{poll} 을 트랜잭션 단위 공유로 잡고, 같은 트랜잭션 안에서 record() 까지 마친다
+  (커밋/롤백 때 락이 함께 풀리므로 문장이 실패해도 커넥션에 락이 남지 않는다).
+- rebuild 는 flush 락 poll:tally:flush 와 폴 락을 배타로 잡은 트랜잭션 안에서 델타를 비우고 재계산한다.
+  → 커밋됐지만 델타가 아직 Redis 에 없는 표가 재계산에 포함된 뒤 델타로 한 번 더 더해지지 않는다.
+- flush 는 flush 락을 잡은 트랜잭션 안에서 델타를 꺼내 반영한다(꺼낸 델타가 재계산 뒤에 반영되지 않게).
+Redis 장애 시 읽기는 DB 로, write-behind 델타는 poll_options 에 곧바로 반영한다.
+"""
+
+import logging
+import random
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+import redis
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+
+from .models import Poll, PollOption, Vote
+
+log = logging.getLogger(__name__)
+
+FILLED = "_n"
+FLUSH_LOCK = "poll:tally:flush"
+REBUILD_BATCH = 200  # 전체 rebuild 한 트랜잭션에서 잠그는 폴 수
+
+# 투표/철회 쓰기 문장에 끼워 넣는 폴 공유 락(트랜잭션 단위 → record() 를 마친 뒤 커밋/롤백과 함께 해제)
+VOTE_LOCK_SQL = "pg_advisory_xact_lock_shared(hashtextextended(%s, 0))"
+
+Counts = Dict[str, int]  # {option_id: n}
+
+
+def write_behind() -> bool:
+    return getattr(settings, "POLL_COUNTER_WRITE_BEHIND", False)
+
+
+def _shards() -> int:
+    return max(1, getattr(settings, "POLL_TALLY_SHARDS", 1))
+
+
+class PollTally:
+    KEY = "poll:tally:{poll}:{shard}"
+    DIRTY = "poll:tally:dirty"
+    DELTA = "poll:delta:{poll}:{shard}"
+    DELTA_DIRTY = "poll:delta:dirty"
+
+    def __init__(self, url: str):
+        self.r = redis.Redis.from_url(url, decode_responses=True)
+
+    @property
+    def ttl(self) -> int:
+        return getattr(settings, "POLL_TALLY_TTL_SEC", 86400)
+
+    def _keys(self, pattern: str, poll_id: str) -> List[str]:
+        return [pattern.format(poll=poll_id, shard=i) for i in range(_shards())]
+
+    def read(self, poll_id: str) -> Optional[Counts]:
+        pipe = self.r.pipeline(transaction=False)
+        for k in self._keys(self.KEY, poll_id):
+            pipe.hgetall(k)
+        shards = pipe.execute()
+        if FILLED not in shards[0]:
+            return None
+        total: Counter = Counter()
+        for raw in shards:
+            total.update({k: int(v) for k, v in raw.items() if k != FILLED})
+        # 0 표 옵션도 키로 남긴다(Counter.update 는 0 을 유지)
+        return dict(total)
+
+    def fill(self, poll_id: str, counts: Counts) -> None:
+        keys = self._keys(self.KEY, poll_id)
+        pipe = self.r.pipeline(transaction=True)
+        pipe.delete(*keys)
+        pipe.hset(keys[0], mapping={**counts, FILLED: len(counts)})
+        self._expire(pipe, keys)
+        pipe.execute()
+
+    def _expire(self, pipe, keys: List[str]) -> None:
+        # 샤드 키는 TTL 을 함께 갱신한다(일부 샤드만 만료되면 "_n" 이 남은 채 합이 모자라게 읽힘)
+        for k in keys:
+            pipe.expire(k, self.ttl)
+
+    def invalidate(self, poll_id: str) -> None:
+        self.r.delete(*self._keys(self.KEY, poll_id))
+
+    def incr(self, poll_id: str, deltas: Counts, *, pending: bool = False) -> None:
+        keys = self._keys(self.KEY, poll_id)
+        shard = random.randrange(len(keys))
+        pipe = self.r.pipeline(transaction=True)
+        for option_id, d in deltas.items():
+            pipe.hincrby(keys[shard], option_id, d)
+        self._expire(pipe, keys)
+        pipe.sadd(self.DIRTY, poll_id)
+        if pending:
+            dk = self.DELTA.format(poll=poll_id, shard=shard)
+            for option_id, d in deltas.items():
+                pipe.hincrby(dk, option_id, d)
+            pipe.sadd(self.DELTA_DIRTY, poll_id)
+        pipe.execute()
+
+    def drain(self, limit: int) -> List[str]:
+        return self.r.spop(self.DIRTY, limit) or []
+
+    def drain_deltas(self, limit: int, poll_ids: Optional[Iterable[str]] = None) -> Counts:
+        # poll_ids 가 주어지면 해당 폴의 델타만(재계산 전 폐기용), 아니면 dirty 집합에서 limit 개
+        if poll_ids is None:
+            poll_ids = self.r.spop(self.DELTA_DIRTY, limit) or []
+        else:
+            poll_ids = list(poll_ids)
+            if poll_ids:
+                self.r.srem(self.DELTA_DIRTY, *poll_ids)
+        if not poll_ids:
+            return {}
+        # HGETALL + DEL 을 MULTI 로 묶어 읽은 델타와 지운 델타가 어긋나지 않게 한다.
+        pipe = self.r.pipeline(transaction=True)
+        for pid in poll_ids:
+            for k in self._keys(self.DELTA, pid):
+                pipe.hgetall(k)
+                pipe.delete(k)
+        out: Counter = Counter()
+        for fields in pipe.execute()[::2]:
+            out.update({f: int(v) for f, v in (fields or {}).items()})
+        return {option_id: d for option_id, d in out.items() if d}
+
+    def restore_deltas(self, poll_ids: Dict[str, str], deltas: Counts) -> None:
+        # flush 실패 시 델타를 샤드 0 에 되돌려 다음 flush 에서 재시도(poll_ids: option_id → poll_id)
+        pipe = self.r.pipeline(transaction=True)
+        for option_id, d in deltas.items():
+            poll_id = poll_ids[option_id]
+            pipe.hincrby(self.DELTA.format(poll=poll_id, shard=0), option_id, d)
+            pipe.sadd(self.DELTA_DIRTY, poll_id)
+        pipe.execute()
+
+    def pending(self) -> int:
+        return int(self.r.scard(self.DELTA_DIRTY))
+
+
+_tally = PollTally(settings.REDIS_URL)
+
+
+def lock_key(poll_id) -> str:
+    return f"poll:tally:{poll_id}"
+
+
+def _lock(keys: List[str]) -> None:
+    # 트랜잭션 단위 배타 락을 keys 순서대로(flush 락 → 폴 락)
+    with connection.cursor() as cur:
+        cur.execute("SELECT pg_advisory_xact_lock(hashtextextended(k, 0)) FROM unnest(%s::text[]) AS k", [keys])
+
+
+def apply_deltas(deltas: Counts) -> None:
+    # 옵션 카운터를 UPDATE 한 번으로 반영(PositiveIntegerField 이므로 0 미만 방지)
+    if not deltas:
+        return
+    values = ", ".join(["(%s::uuid, %s)"] * len(deltas))
+    params = [v for item in deltas.items() for v in item]
+    table = PollOption._meta.db_table
+    with connection.cursor() as cur:
+        cur.execute(f"UPDATE {table} AS o SET vote_count = GREATEST(o.vote_count + v.d, 0) FROM (VALUES {values}) AS v(id, d) WHERE o.id = v.id", params)
+
+
+def _vote_counts(poll_ids: List[str]) -> Dict[str, Counts]:
+    # poll_votes 를 (poll, mask) GROUP BY 한 번으로 센 뒤(폴당 최대 31 그룹) 비트를 옵션별 합으로 펼친다
+    out: Dict[str, Counts] = {pid: {} for pid in poll_ids}
+    by_position: Dict[str, Dict[int, str]] = {pid: {} for pid in poll_ids}
+    for poll_id, option_id, position in PollOption.objects.filter(poll_id__in=poll_ids).values_list("poll_id", "id", "position"):
+        out[str(poll_id)][str(option_id)] = 0
+        by_position[str(poll_id)][position] = str(option_id)
+    for poll_id, mask, n in Vote.objects.filter(poll_id__in=poll_ids).order_by().values_list("poll_id", "mask").annotate(n=Count("id")):
+        for position, option_id in by_position[str(poll_id)].items():
+            if mask >> position & 1:
+                out[str(poll_id)][option_id] += n
+    return out
+
+
+def _db_counts(poll_ids: Iterable[str]) -> Dict[str, Counts]:
+    poll_ids = [str(pid) for pid in poll_ids]
+    if write_behind():
+        # poll_options 는 flush 전까지 뒤처지므로 원천(poll_votes)에서 센다
+        return _vote_counts(poll_ids)
+    out: Dict[str, Counts] = {pid: {} for pid in poll_ids}
+    for poll_id, option_id, count in PollOption.objects.filter(poll_id__in=poll_ids).values_list("poll_id", "id", "vote_count"):
+        out[str(poll_id)][str(option_id)] = count
+    return out
+
+
+def counts(poll_id) -> Counts:
+    """option_id(str) → 득표 수. 캐시 미스면 DB 에서 한 번 읽어 채운다."""
+    poll_id = str(poll_id)
+    try:
+        cached = _tally.read(poll_id)
+        if cached is not None:
+            return cached
+        fresh = _db_counts([poll_id])[poll_id]
+        _tally.fill(poll_id, fresh)
+        return fresh
+    except redis.RedisError as e:
+        log.warning("poll tally unavailable, reading counts from DB: %s", e)
+        return _db_counts([poll_id])[poll_id]
+
+
+def prime(poll_id, option_ids: Iterable) -> None:
+    # 새 폴: 표가 없으므로 DB 조회 없이 0 으로 채운다
+    try:
+        _tally.fill(str(poll_id), {str(oid): 0 for oid in option_ids})
+    except redis.RedisError as e:
+        log.warning("poll tally prime failed: %s", e)
+
+
+def record(poll_id, deltas: Counts) -> None:
+    """
+    투표 반영 후 호출. write-behind 모드에서는 poll_options 반영도 여기(Redis 델타)에 맡긴다.
+    Redis 장애 시: 기본 모드는 캐시만 무효화, write-behind 모드는 DB 에 곧바로 반영(경합은 늘지만 유실 없음).
+    """
+    deltas = {str(k): d for k, d in deltas.items() if d}
+    if not deltas:
+        return
+    pending = write_behind()
+    try:
+        _tally.incr(str(poll_id), deltas, pending=pending)
+    except redis.RedisError as e:
+        log.warning("poll tally update failed: %s", e)
+        if pending:
+            apply_deltas(deltas)
+        invalidate(poll_id)
+
+
+def invalidate(poll_id) -> None:
+    try:
+        _tally.invalidate(str(poll_id))
+    except redis.RedisError as e:
+        # 지우지도 못하면 reconcile/TTL 에 맡긴다
+        log.warning("poll tally invalidate failed: %s", e)
+
+
+def reconcile(limit: int | None = None) -> int:
+    """
+    dirty 폴을 최대 limit 개 꺼내 DB 기준으로 캐시를 덮어쓴다.
+    반환값: 보정한 폴 수
+    """
+    limit = limit or getattr(settings, "POLL_TALLY_RECONCILE_BATCH", 1000)
+    poll_ids = _tally.drain(limit)
+    if not poll_ids:
+        return 0
+    for poll_id, fresh in _db_counts(poll_ids).items():
+        _tally.fill(poll_id, fresh)
+    return len(poll_ids)
+
+
+def flush(limit: int | None = None) -> int:
+    """
+    write-behind 델타를 최대 limit 개 폴 만큼 꺼내 poll_options 에 UPDATE 한 번으로 반영한다.
+    반환값: 반영한 옵션 수
+    """
+    limit = limit or getattr(settings, "POLL_COUNTER_FLUSH_BATCH", 1000)
+    if not _tally.pending():
+        return 0
+    deltas: Counts = {}
+    try:
+        with transaction.atomic():
+            # 꺼내기 ~ 반영을 rebuild 와 겹치지 않게(꺼낸 델타가 재계산 뒤에 더해지면 이중 집계)
+            _lock([FLUSH_LOCK])
+            deltas = _tally.drain_deltas(limit)
+            apply_deltas(deltas)
+    except Exception:
+        if deltas:
+            owners = {str(oid): str(pid) for oid, pid in PollOption.objects.filter(id__in=list(deltas)).values_list("id", "poll_id")}
+            _tally.restore_deltas(owners, {oid: d for oid, d in deltas.items() if oid in owners})
+        raise
+    return len(deltas)
+
+
+def rebuild(poll_ids: Optional[Iterable[str]] = None, dry_run: bool = False) -> int:
+    """
+    poll_votes 를 (poll, mask) GROUP BY 한 번으로 집계해 poll_options.vote_count 를 재계산하고 어긋난 옵션만 고친다.
+    poll_ids 가 없으면 전체 폴을 REBUILD_BATCH 개씩. 재계산 결과가 원천이므로 해당 폴의 미반영 델타는 폐기하고 캐시를 다시 채운다.
+    반환값: 보정한(dry_run 이면 어긋난) 옵션 수
+    """
+    if poll_ids is not None:
+        poll_ids = [str(p) for p in poll_ids]
+        fixed = _rebuild(poll_ids, dry_run)
+        if not dry_run:
+            for poll_id in poll_ids:
+                invalidate(poll_id)
+        return len(fixed)
+    total, after = 0, None
+    while True:
+        qs = Poll.objects.order_by("id")
+        if after is not None:
+            qs = qs.filter(id__gt=after)
+        batch = [str(pid) for pid in qs.values_list("id", flat=True)[:REBUILD_BATCH]]
+        if not batch:
+            return total
+        fixed = _rebuild(batch, dry_run)
+        if not dry_run:
+            for poll_id in set(fixed):
+                invalidate(poll_id)
+        total += len(fixed)
+        after = batch[-1]
+
+
+def _rebuild(poll_ids: List[str], dry_run: bool) -> List[str]:
+    # 반환값: 고친(dry_run 이면 어긋난) 옵션의 poll_id 목록
+    table, votes = PollOption._meta.db_table, Vote._meta.db_table
+    # 비트마스크 집계: 선택 조합별 표 수를 옵션 비트와 조인해 옵션별로 합산
+    real = (
+        f"SELECT o3.id AS option_id, SUM(g.n) AS n FROM {table} o3 "
+        f"JOIN (SELECT poll_id, mask, COUNT(*) AS n FROM {votes} WHERE poll_id = ANY(%s::uuid[]) GROUP BY poll_id, mask) g "
+        "ON g.poll_id = o3.poll_id AND (g.mask & (1 << o3.position)) <> 0 GROUP BY o3.id"
+    )
+    if dry_run:
+        sql = f"SELECT o.poll_id FROM {table} o LEFT JOIN ({real}) c ON c.option_id = o.id WHERE o.vote_count <> COALESCE(c.n, 0) AND o.poll_id = ANY(%s::uuid[])"
+        with connection.cursor() as cur:
+            cur.execute(sql, [poll_ids, poll_ids])
+            return [str(row[0]) for row in cur.fetchall()]
+    sql = (
+        f"UPDATE {table} AS o SET vote_count = COALESCE(c.n, 0) "
+        f"FROM {table} AS o2 LEFT JOIN ({real}) c ON c.option_id = o2.id "
+        f"WHERE o.id = o2.id AND o.vote_count <> COALESCE(c.n, 0) AND o.poll_id = ANY(%s::uuid[]) RETURNING o.poll_id"
+    )
+    with transaction.atomic():
+        # 진행 중인 투표(record 를 마친 커밋까지)와 flush 가 끝나기를 기다린 뒤, 재계산 커밋까지 새 쓰기를 막는다
+        _lock([FLUSH_LOCK, *sorted(lock_key(pid) for pid in poll_ids)])
+        try:
+            # 재계산에 이미 포함될 표의 델타가 나중에 한 번 더 더해지지 않도록 먼저 비운다
+            _tally.drain_deltas(0, poll_ids)
+        except redis.RedisError as e:
+            log.warning("poll tally unavailable, rebuilding without clearing deltas: %s", e)
+        with connection.cursor() as cur:
+            cur.execute(sql, [poll_ids, poll_ids])
+            return [str(row[0]) for row in cur.fetchall()]
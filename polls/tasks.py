@@ -0,0 +1,25 @@
+from celery import shared_task
+
+
+@shared_task(name="polls.tasks.reconcile_poll_tallies")
+def reconcile_poll_tallies(limit: int | None = None):
+    # celery beat 주기 작업: 집계가 바뀐 폴의 Redis 캐시를 DB 카운트로 덮어써 어긋남을 정리
+    from .tally import reconcile
+
+    return reconcile(limit)
+
+
+@shared_task(name="polls.tasks.flush_poll_counters")
+def flush_poll_counters(limit: int | None = None):
+    # celery beat 주기 작업(write-behind 모드): Redis 에 쌓인 득표 델타를 poll_options 에 일괄 반영
+    from .tally import flush
+
+    return flush(limit)
+
+
+@shared_task(name="polls.tasks.rebuild_poll_tallies")
+def rebuild_poll_tallies():
+    # celery beat 주기 작업(write-behind 모드): poll_votes GROUP BY 로 득표 수 재계산
+    from .tally import rebuild
+
+    return rebuild()
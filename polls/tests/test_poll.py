@@ -5,6 +5,8 @@ from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework.test import APIClient
 
+from polls.models import PollOption, Vote
+
 pytestmark = pytest.mark.django_db
 
 # ---------- Fixtures ----------
@@ -163,3 +165,312 @@ class TestPollVote:
         # PollOption 조회는 되더라도 서비스 계층에서 poll 불일치 시 ValidationError -> 400
         r = auth_client.post(reverse("polls-vote", args=[poll_id]), data={"option_id": str(bad_option)}, format="json")
         assert r.status_code == 400
+
+
+@pytest.fixture
+def fake_tally(monkeypatch):
+    import fakeredis
+
+    from polls import tally
+
+    # 모듈 로드 시 생성된 집계 캐시를 fakeredis 기반으로 교체
+    t = tally.PollTally.__new__(tally.PollTally)
+    t.r = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(tally, "_tally", t)
+    return t
+
+
+def _poll(user):
+    from polls.services import create_poll
+
+    return create_poll(owner=user, option_texts=["A", "B", "C"])
+
+
+@pytest.mark.usefixtures("fake_tally")
+class TestPollTally:
+
+    def test_create_poll_inserts_options_in_one_statement(self, user, django_assert_num_queries):
+        from polls.services import create_poll
+
+        # savepoint + poll INSERT + options INSERT(bulk) + release
+        with django_assert_num_queries(4):
+            created = create_poll(owner=user, option_texts=["A", "B", "C", "D", "E"])
+        assert [o.position for o in created.options] == [0, 1, 2, 3, 4]
+        assert all(o.pk for o in created.options)
+
+    def test_vote_is_one_upsert_and_one_counter_update(self, user, django_assert_num_queries, fake_tally):
+        from polls.services import cast_vote
+
+        created = _poll(user)
+        a, b = created.options[0], created.options[1]
+        cast_vote(poll=created.poll, voter=user, option=a)
+
+        # 이동 투표: savepoint + CTE upsert(폴 락 포함) + 카운터 UPDATE + release (캐시 적중 → 옵션 재조회 없음)
+        with django_assert_num_queries(4):
+            result = cast_vote(poll=created.poll, voter=user, option=b)
+        assert result.counts[str(a.id)] == 0 and result.counts[str(b.id)] == 1
+        assert {o.id: o.vote_count for o in created.poll.options.all()} == {a.id: 0, b.id: 1, created.options[2].id: 0}
+
+        # 동일 옵션 재투표는 카운터를 건드리지 않음
+        with django_assert_num_queries(3):
+            result = cast_vote(poll=created.poll, voter=user, option=b)
+        assert result.counts[str(b.id)] == 1
+
+    def test_results_served_from_tally_and_reconciled(self, auth_client, user, fake_tally):
+        from polls import tally
+        from polls.services import cast_vote
+
+        created = _poll(user)
+        a = created.options[0]
+        cast_vote(poll=created.poll, voter=user, option=a)
+
+        # 캐시에 어긋난 값을 심으면 결과 API 는 캐시 값을 그대로 반환
+        fake_tally.r.hset(tally.PollTally.KEY.format(poll=created.poll.id, shard=0), str(a.id), 7)
+        res = auth_client.get(reverse("polls-results", args=[created.poll.id]))
+        assert {o["id"]: o["vote_count"] for o in res.json()["options"]}[str(a.id)] == 7
+
+        # 주기 보정이 DB 카운트로 되돌린다
+        assert tally.reconcile() == 1
+        res = auth_client.get(reverse("polls-results", args=[created.poll.id]))
+        assert {o["id"]: o["vote_count"] for o in res.json()["options"]}[str(a.id)] == 1
+
+    def test_redis_down_falls_back_to_db_counts(self, auth_client, user, monkeypatch, fake_tally):
+        import redis
+
+        from polls.services import cast_vote
+
+        def boom(*a, **kw):
+            raise redis.ConnectionError("down")
+
+        monkeypatch.setattr(fake_tally, "read", boom)
+        monkeypatch.setattr(fake_tally, "incr", boom)
+        created = _poll(user)
+        result = cast_vote(poll=created.poll, voter=user, option=created.options[1])
+        assert result.counts[str(created.options[1].id)] == 1
+
+        res = auth_client.get(reverse("polls-results", args=[created.poll.id]))
+        assert {o["id"]: o["vote_count"] for o in res.json()["options"]}[str(created.options[1].id)] == 1
+
+
+@pytest.mark.usefixtures("fake_tally")
+class TestPollWriteBehind:
+    @pytest.fixture(autouse=True)
+    def _write_behind(self, settings):
+        settings.POLL_COUNTER_WRITE_BEHIND = True
+        settings.POLL_TALLY_SHARDS = 4
+
+    def _voters(self, n):
+        U = get_user_model()
+        return [U.objects.create() for _ in range(n)]
+
+    def test_votes_defer_option_counters_until_flush(self, auth_client, user, django_assert_num_queries):
+        from polls import tally
+        from polls.services import cast_vote
+
+        created = _poll(user)
+        a, b = created.options[0], created.options[1]
+        voters = self._voters(3)
+        for v in voters:
+            cast_vote(poll=created.poll, voter=v, option=a)
+        # 옵션 행은 잠그지 않음: savepoint + CTE upsert + release
+        with django_assert_num_queries(3):
+            cast_vote(poll=created.poll, voter=voters[0], option=b)
+
+        assert {o.id: o.vote_count for o in created.poll.options.all()}[a.id] == 0
+        res = auth_client.get(reverse("polls-results", args=[created.poll.id]))
+        got = {o["id"]: o["vote_count"] for o in res.json()["options"]}
+        assert got[str(a.id)] == 2 and got[str(b.id)] == 1
+
+        # 샤드에 흩어진 델타를 UPDATE 한 번으로 반영
+        assert tally.flush() == 2
+        assert {o.id: o.vote_count for o in created.poll.options.all()} == {a.id: 2, b.id: 1, created.options[2].id: 0}
+        assert tally.flush() == 0
+
+    def test_cache_miss_counts_from_poll_votes(self, user, fake_tally):
+        from polls import tally
+        from polls.services import cast_vote
+
+        created = _poll(user)
+        a = created.options[0]
+        for v in self._voters(2):
+            cast_vote(poll=created.poll, voter=v, option=a)
+        tally.invalidate(created.poll.id)
+        # poll_options 는 아직 0 이지만 캐시 재적재는 poll_votes 기준
+        assert tally.counts(created.poll.id)[str(a.id)] == 2
+
+    def test_rebuild_recomputes_from_poll_votes(self, user, fake_tally):
+        from django.core.management import call_command
+
+        from polls import tally
+        from polls.services import cast_vote
+
+        created = _poll(user)
+        a, b = created.options[0], created.options[1]
+        for v in self._voters(2):
+            cast_vote(poll=created.poll, voter=v, option=a)
+        PollOption.objects.filter(pk=b.pk).update(vote_count=9)
+
+        assert tally.rebuild(dry_run=True) == 2
+        call_command("rebuild_poll_tallies", "--poll", str(created.poll.id))
+        assert {o.id: o.vote_count for o in created.poll.options.all()}[a.id] == 2
+        assert {o.id: o.vote_count for o in created.poll.options.all()}[b.id] == 0
+        # 재계산에 포함된 델타는 폐기되어 다시 더해지지 않음
+        assert tally.flush() == 0
+        assert tally.counts(created.poll.id)[str(a.id)] == 2
+
+    def test_rebuild_in_batches(self, user, monkeypatch, fake_tally):
+        from polls import tally
+        from polls.services import cast_vote, retract_vote
+
+        monkeypatch.setattr(tally, "REBUILD_BATCH", 1)
+        polls = [_poll(user), _poll(user)]
+        voters = self._voters(2)
+        for created in polls:
+            for v in voters:
+                cast_vote(poll=created.poll, voter=v, option=created.options[0])
+        retract_vote(poll=polls[1].poll, voter=voters[0])
+
+        # 전체 rebuild 는 폴 1개씩 잠그고 재계산, 델타는 폐기
+        assert tally.rebuild() == 2
+        assert [o.vote_count for o in polls[0].poll.options.order_by("position")] == [2, 0, 0]
+        assert [o.vote_count for o in polls[1].poll.options.order_by("position")] == [1, 0, 0]
+        assert tally.flush() == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_vote_lock_released_on_commit_and_failure(self, user, monkeypatch, fake_tally):
+        from django.db import connection
+
+        from polls import tally
+        from polls.services import cast_vote
+
+        def held() -> int:
+            with connection.cursor() as cur:
+                cur.execute("SELECT count(*) FROM pg_locks WHERE locktype = 'advisory' AND pid = pg_backend_pid()")
+                return cur.fetchone()[0]
+
+        created = _poll(user)
+        voters = self._voters(2)
+        cast_vote(poll=created.poll, voter=voters[0], option=created.options[0])
+        assert held() == 0
+
+        # 락을 잡은 뒤 실패해도 롤백과 함께 풀린다(커넥션에 남아 rebuild 를 막지 않음)
+        def boom(*a, **kw):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(tally, "record", boom)
+        with pytest.raises(RuntimeError):
+            cast_vote(poll=created.poll, voter=voters[1], option=created.options[0])
+        assert held() == 0
+        assert Vote.objects.filter(poll=created.poll).count() == 1
+
+    def test_shard_ttls_refreshed_together(self, user, settings, fake_tally):
+        from polls import tally
+        from polls.services import cast_vote
+
+        created = _poll(user)
+        settings.POLL_TALLY_TTL_SEC = 100
+        for v in self._voters(8):
+            cast_vote(poll=created.poll, voter=v, option=created.options[0])
+        # 어느 샤드에 쓰든 샤드 0(채움 표시 포함)까지 같은 TTL 로 갱신
+        keys = [k for k in fake_tally._keys(tally.PollTally.KEY, str(created.poll.id)) if fake_tally.r.exists(k)]
+        assert len(keys) > 1 and all(0 < fake_tally.r.ttl(k) <= 100 for k in keys)
+
+    def test_redis_down_applies_counters_directly(self, user, monkeypatch, fake_tally):
+        import redis
+
+        from polls.services import cast_vote
+
+        def boom(*a, **kw):
+            raise redis.ConnectionError("down")
+
+        monkeypatch.setattr(fake_tally, "incr", boom)
+        created = _poll(user)
+        cast_vote(poll=created.poll, voter=user, option=created.options[0])
+        assert created.poll.options.get(pk=created.options[0].pk).vote_count == 1
+
+
+@pytest.mark.usefixtures("fake_tally")
+class TestPollMultiChoice:
+    def _create_poll(self, client, allow_multiple=True) -> dict:
+        res = client.post(reverse("polls-list"), data={"options": ["A", "B", "C"], "allow_multiple": allow_multiple}, format="json")
+        assert res.status_code == 201
+        return res.json()
+
+    def _vote(self, client, poll_id, option_ids):
+        return client.post(reverse("polls-vote", args=[poll_id]), data={"option_ids": option_ids}, format="json")
+
+    def test_multi_vote_and_replace_selection(self, auth_client, user):
+        poll = self._create_poll(auth_client)
+        a, b, c = (o["id"] for o in poll["options"])
+
+        r1 = self._vote(auth_client, poll["id"], [a, b])
+        assert r1.status_code == 200
+        assert r1.json()["my_option_ids"] == [a, b]
+
+        # 선택 교체: A 빠지고 C 추가, B 유지
+        r2 = self._vote(auth_client, poll["id"], [c, b])
+        body = r2.json()
+        assert body["my_option_ids"] == [b, c]
+        assert body["my_option_id"] == b
+        assert {o["id"]: o["vote_count"] for o in body["poll"]["options"]} == {a: 0, b: 1, c: 1}
+
+        vote = Vote.objects.get(voter=user, poll_id=poll["id"])
+        assert vote.mask == 0b110
+
+        r3 = auth_client.post(reverse("polls-unvote", args=[poll["id"]]), format="json")
+        assert {o["id"]: o["vote_count"] for o in r3.json()["poll"]["options"]} == {a: 0, b: 0, c: 0}
+        assert r3.json()["my_option_ids"] == []
+
+    def test_selection_diff_touches_only_changed_counters(self, user, django_assert_num_queries):
+        from polls.services import cast_vote, create_poll
+
+        created = create_poll(owner=user, option_texts=["A", "B", "C"], allow_multiple=True)
+        a, b, c = created.options
+        cast_vote(poll=created.poll, voter=user, options=[a, b])
+
+        # 단일 선택과 같은 쿼리 예산: savepoint + CTE upsert + 카운터 UPDATE + release
+        with django_assert_num_queries(4) as ctx:
+            cast_vote(poll=created.poll, voter=user, options=[b, c])
+        update = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+        assert len(update) == 1 and str(b.id) not in update[0]
+
+    def test_orm_created_vote_gets_mask_and_is_tallied(self, user, other_user):
+        from django.db import IntegrityError, transaction
+
+        from polls import tally
+        from polls.services import create_poll
+
+        created = create_poll(owner=user, option_texts=["A", "B", "C"])
+        vote = Vote.objects.create(voter=other_user, poll=created.poll, option=created.options[2])
+        assert vote.mask == 0b100
+        assert tally.rebuild([created.poll.id], dry_run=True) == 1
+
+        # save() 를 거치지 않는 경로의 빈 mask 는 DB 가 거부
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Vote.objects.bulk_create([Vote(voter=user, poll=created.poll, option=created.options[0])])
+
+    def test_single_choice_poll_rejects_multiple_options(self, auth_client):
+        poll = self._create_poll(auth_client, allow_multiple=False)
+        r = self._vote(auth_client, poll["id"], [poll["options"][0]["id"], poll["options"][1]["id"]])
+        assert r.status_code == 400
+
+    def test_option_id_and_option_ids_are_exclusive(self, auth_client):
+        poll = self._create_poll(auth_client)
+        opt = poll["options"][0]["id"]
+        r = auth_client.post(reverse("polls-vote", args=[poll["id"]]), data={"option_id": opt, "option_ids": [opt]}, format="json")
+        assert r.status_code == 400
+
+    def test_results_from_mask_aggregates(self, user, other_user, settings):
+        from polls import tally
+        from polls.services import cast_vote, create_poll
+
+        settings.POLL_COUNTER_WRITE_BEHIND = True
+        created = create_poll(owner=user, option_texts=["A", "B", "C"], allow_multiple=True)
+        a, b, c = created.options
+        cast_vote(poll=created.poll, voter=user, options=[a, b])
+        cast_vote(poll=created.poll, voter=other_user, options=[a, c])
+
+        tally.invalidate(created.poll.id)
+        assert tally.counts(created.poll.id) == {str(a.id): 2, str(b.id): 1, str(c.id): 1}
+        assert tally.rebuild() == 3
+        assert {o.id: o.vote_count for o in created.poll.options.all()} == {a.id: 2, b.id: 1, c.id: 1}
@@ -9,6 +9,7 @@ from rest_framework.response import Response
 
 from common.schema import ErrorOut
 
+from . import tally
 from .models import Poll, PollOption
 from .serializers import PollCreateIn, PollOut, VoteIn, VoteOut
 from .services import cast_vote, create_poll, retract_vote
@@ -46,7 +47,7 @@ class PollViewSet(viewsets.GenericViewSet):
 
     def retrieve(self, request, pk=None):
         poll = get_object_or_404(self.get_queryset(), pk=pk)
-        return Response(PollOut(poll).data)
+        return Response(PollOut(poll, context={"tally": tally.counts(poll.id)}).data)
 
     def list(self, request):
         # 기본은 내가 만든 Poll만(운영 편의) 보이며 필요시 공개 범위에 따라 확장
@@ -71,7 +72,9 @@ class PollViewSet(viewsets.GenericViewSet):
     @extend_schema(
         tags=["Polls"],
         summary="투표 참여",
-        description="특정 투표의 옵션 하나(또는 정책상 허용되는 복수 개)에 투표합니다.",
+        description=(
+            "특정 투표의 옵션 하나(`option_id`) 또는 복수 선택 투표(`allow_multiple`)라면 여러 개(`option_ids`)에 투표합니다.\n" "재투표는 이전 선택을 새 선택으로 교체합니다."
+        ),
         operation_id="polls_vote",
         parameters=[OpenApiParameter(name="pk", location=OpenApiParameter.PATH, type=OpenApiTypes.UUID, description="투표 ID (UUID)")],
         request=VoteIn,
@@ -83,9 +86,14 @@ class PollViewSet(viewsets.GenericViewSet):
         },
         examples=[
             OpenApiExample("요청 예시", value={"option_id": "11111111-1111-1111-1111-111111111111"}, request_only=True),
+            OpenApiExample("복수 선택 요청 예시", value={"option_ids": ["11111111-1111-1111-1111-111111111111", "22222222-2222-2222-2222-222222222222"]}, request_only=True),
             OpenApiExample(
                 "응답 예시",
-                value={"poll": {"id": "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa", "options": []}, "my_option_id": "11111111-1111-1111-1111-111111111111"},
+                value={
+                    "poll": {"id": "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa", "options": []},
+                    "my_option_id": "11111111-1111-1111-1111-111111111111",
+                    "my_option_ids": ["11111111-1111-1111-1111-111111111111"],
+                },
                 response_only=True,
             ),
         ],
@@ -94,7 +102,7 @@ class PollViewSet(viewsets.GenericViewSet):
     def vote(self, request, pk=None):
         """
         POST /api/v1/polls/{id}/vote
-        body: { "option_id": "<uuid>" }
+        body: { "option_id": "<uuid>" } 또는 { "option_ids": ["<uuid>", ...] }
         """
         poll = get_object_or_404(self.get_queryset(), pk=pk)
 
@@ -102,18 +110,19 @@ class PollViewSet(viewsets.GenericViewSet):
         vin.is_valid(raise_exception=True)
 
         # 1) 존재 여부를 400(Validation)로 매핑: 테스트 기대와 일치
-        option = PollOption.objects.filter(pk=vin.validated_data["option_id"]).first()
-        if option is None:
+        option_ids = vin.validated_data["option_ids"]
+        options = list(PollOption.objects.filter(pk__in=option_ids))
+        if len(options) != len(option_ids):
             raise DRFValidationError({"option_id": "Option not found"})
 
         # 2) 서비스에 '객체'를 넘겨 FK 할당 시 'UUID.pk' 오류 방지
         try:
-            result = cast_vote(poll=poll, voter=request.user, option=option)
+            result = cast_vote(poll=poll, voter=request.user, options=options)
         except DjangoValidationError as e:
             detail = getattr(e, "message_dict", None) or getattr(e, "messages", None) or str(e)
             raise DRFValidationError(detail) from None
 
-        out = VoteOut({"poll": result.poll, "my_option_id": result.my_option_id})
+        out = VoteOut({"poll": result.poll, "my_option_id": result.my_option_id, "my_option_ids": result.my_option_ids}, context={"tally": result.counts})
         return Response(out.data, status=status.HTTP_200_OK)
 
     @extend_schema(
@@ -123,7 +132,11 @@ class PollViewSet(viewsets.GenericViewSet):
         operation_id="polls_unvote",
         parameters=[OpenApiParameter(name="pk", location=OpenApiParameter.PATH, type=OpenApiTypes.UUID, description="투표 ID (UUID)")],
         responses={200: OpenApiResponse(response=VoteOut, description="철회 후 최신 집계"), 401: OpenApiResponse(response=ErrorOut), 404: OpenApiResponse(response=ErrorOut)},
-        examples=[OpenApiExample("응답 예시", value={"poll": {"id": "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa", "options": []}, "my_option_id": None}, response_only=True)],
+        examples=[
+            OpenApiExample(
+                "응답 예시", value={"poll": {"id": "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa", "options": []}, "my_option_id": None, "my_option_ids": []}, response_only=True
+            )
+        ],
     )
     @action(methods=["post"], detail=True, url_path="unvote")
     def unvote(self, request, pk=None):
@@ -132,7 +145,7 @@ class PollViewSet(viewsets.GenericViewSet):
         """
         poll = get_object_or_404(self.get_queryset(), pk=pk)
         result = retract_vote(poll=poll, voter=request.user)
-        out = VoteOut({"poll": result.poll, "my_option_id": result.my_option_id})
+        out = VoteOut({"poll": result.poll, "my_option_id": result.my_option_id, "my_option_ids": result.my_option_ids}, context={"tally": result.counts})
         return Response(out.data, status=status.HTTP_200_OK)
 
     @extend_schema(
@@ -145,5 +158,6 @@ class PollViewSet(viewsets.GenericViewSet):
     )
     @action(methods=["get"], detail=True, url_path="results")
     def results(self, request, pk=None):
+        # 집계는 폴별 Redis 캐시에서(옵션 텍스트만 DB), 캐시 미스/장애 시 DB 카운트
         poll = get_object_or_404(self.get_queryset(), pk=pk)
-        return Response(PollOut(poll).data, status=status.HTTP_200_OK)
+        return Response(PollOut(poll, context={"tally": tally.counts(poll.id)}).data, status=status.HTTP_200_OK)
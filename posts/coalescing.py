@@ -0,0 +1,91 @@
+"""
+포스트 참여 이벤트 코얼레싱 버퍼.
+
+시그널마다 Celery 태스크를 하나씩 띄우면 바이럴 포스트의 좋아요 폭주가 그대로 태스크/알림 폭주로 이어진다.
+여기서는 트랜잭션 단위로 이벤트를 모았다가 커밋 직후 `posts.tasks.on_engagement_batch` 한 번으로 넘긴다.
+- 버퍼는 세이브포인트(atomic 블록)마다 하나씩 두고, 그 블록 안에서 transaction.on_commit 으로 등록한다.
+  롤백되면 Django 가 그 블록에서 등록된 콜백을 버린다 → 스레드 로컬에는 버퍼를 약한 참조로만 들고 있으므로
+  버퍼도 함께 사라지고, 그 블록의 이벤트는 발송되지 않는다(바깥 블록 이벤트는 그대로).
+- 커밋 후 처음 실행되는 버퍼 콜백이 같은 커밋의 살아남은 버퍼들의 이벤트를 모두 넘겨받아 한 번에 보낸다.
+  나머지 버퍼는 비어 있어 아무것도 하지 않는다. 커밋 사이에 이벤트를 스레드 로컬에 남기지 않으므로,
+  앞선 on_commit 훅이 예외를 던져 뒤 콜백이 버려져도 이미 커밋된 이벤트가 다음 커밋에 섞여 나가지 않는다.
+- 트랜잭션 밖(autocommit)이거나 CELERY_TASK_ALWAYS_EAGER=True 라면 즉시 전송한다.
+"""
+
+import threading
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+_local = threading.local()
+
+
+def _buffers() -> Dict[Tuple, "weakref.ref[_Buffer]"]:
+    # (using, 세이브포인트 id 들) → 버퍼 약한 참조. 강한 참조는 Django 의 on_commit 목록만 가진다
+    if not hasattr(_local, "buffers"):
+        _local.buffers = {}
+    return _local.buffers
+
+
+class _Buffer:
+    """하나의 atomic 블록 동안 쌓이는 이벤트 묶음. 자기 자신이 그 블록에서 등록한 on_commit 콜백이다."""
+
+    def __init__(self, using: str):
+        self.using = using
+        self.events: List[Dict[str, Any]] = []
+
+    def __call__(self):
+        # 살아 있는 같은 using 의 버퍼는 모두 방금 커밋된 트랜잭션의 것 → 등록 순서대로 넘겨받아 비운다
+        events: List[Dict[str, Any]] = []
+        buffers = _buffers()
+        for key, ref in list(buffers.items()):
+            buf = ref()
+            if buf is None or key[0] == self.using:
+                del buffers[key]
+            if buf is not None and key[0] == self.using:
+                events += buf.events
+                buf.events = []
+        # 이미 다른 버퍼가 넘겨받아 보냈다면 비어 있다
+        events += self.events
+        self.events = []
+        if events:
+            dispatch(events)
+
+
+def _pending_buffer(using: str) -> _Buffer:
+    # 세이브포인트 id 가 같으면 같은 블록(id 는 트랜잭션 안에서 유일). 롤백된 블록의 버퍼는 이미 수거되어 None
+    key = (using, tuple(transaction.get_connection(using).savepoint_ids))
+    buffers = _buffers()
+    ref = buffers.get(key)
+    buf = ref() if ref is not None else None
+    if buf is None:
+        buf = _Buffer(using)
+        buffers[key] = weakref.ref(buf)
+        transaction.on_commit(buf, using=using)
+    return buf
+
+
+def enqueue(kind: str, post_id: str, *, actor_id: Optional[str] = None, author_id: Optional[str] = None, using: str = DEFAULT_DB_ALIAS, **extra: Any) -> None:
+    event = {"kind": kind, "post_id": post_id, "actor_id": actor_id, "author_id": author_id, **extra}
+
+    if getattr(settings, "CELERY_TASK_ALWAYS_EAGER", False) or not transaction.get_connection(using).in_atomic_block:
+        dispatch([event])
+        return
+
+    _pending_buffer(using).events.append(event)
+
+
+def dispatch(events: List[Dict[str, Any]]) -> None:
+    # 순환 import 방지
+    from . import tasks
+
+    size = max(1, getattr(settings, "POST_EVENT_BATCH_SIZE", 500))
+    eager = getattr(settings, "CELERY_TASK_ALWAYS_EAGER", False)
+    for i in range(0, len(events), size):
+        chunk = events[i : i + size]
+        if eager:
+            tasks.on_engagement_batch.apply(args=(chunk,))
+        else:
+            tasks.on_engagement_batch.delay(chunk)
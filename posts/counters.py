@@ -0,0 +1,184 @@
+"""
+포스트 참여 카운터(좋아요/댓글/리포스트).
+
+- 쓰기: 이벤트마다 posts 행을 UPDATE 하면 핫 포스트에서 행 잠금 경합이 생긴다.
+  대신 Redis 해시에 HINCRBY 로 델타만 누적하고, 바뀐 포스트 id 를 dirty 집합에 남긴다.
+- 반영: flush() 가 주기적으로(dirty 집합 기준) 델타를 꺼내 posts 컬럼에 한 번의 UPDATE 로 일괄 반영하고,
+  반영된 값을 검색 인덱스에 전파한다.
+- 읽기: posts.like_count 등 컬럼을 그대로 읽으므로 O(1).
+- Redis 장애 시에는 델타를 곧바로 DB 에 반영한다(경합은 늘지만 카운트는 유실되지 않음).
+"""
+
+import logging
+from typing import Dict, List, Tuple
+
+import redis
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Post, PostLike, Repost
+
+log = logging.getLogger(__name__)
+
+FIELDS = ("like_count", "comment_count", "repost_count")
+
+Deltas = Dict[str, Dict[str, int]]  # {post_id: {"like_count": +3, "repost_count": -1}}
+
+
+class PostCounterBuffer:
+    DELTA = "post:counters:{post}"
+    DIRTY = "post:counters:dirty"
+
+    def __init__(self, url: str):
+        self.r = redis.Redis.from_url(url, decode_responses=True)
+
+    def incr(self, deltas: Deltas) -> None:
+        pipe = self.r.pipeline(transaction=False)
+        for post_id, fields in deltas.items():
+            k = self.DELTA.format(post=post_id)
+            for f, d in fields.items():
+                if d:
+                    pipe.hincrby(k, f, d)
+            pipe.sadd(self.DIRTY, post_id)
+        pipe.execute()
+
+    def drain(self, limit: int) -> Deltas:
+        post_ids = self.r.spop(self.DIRTY, limit) or []
+        if not post_ids:
+            return {}
+        # HGETALL + DEL 을 MULTI 로 묶어 읽은 델타와 지운 델타가 어긋나지 않게 한다.
+        # SPOP 이후 들어온 증분은 여기서 함께 읽히거나(dirty 재등록 → 다음 flush 에서 빈 해시), 새 해시로 남는다.
+        pipe = self.r.pipeline(transaction=True)
+        for pid in post_ids:
+            k = self.DELTA.format(post=pid)
+            pipe.hgetall(k)
+            pipe.delete(k)
+        res = pipe.execute()
+        out: Deltas = {}
+        for pid, fields in zip(post_ids, res[::2], strict=True):
+            d = {f: int(v) for f, v in (fields or {}).items() if f in FIELDS and int(v)}
+            if d:
+                out[pid] = d
+        return out
+
+    def pending(self) -> int:
+        return int(self.r.scard(self.DIRTY))
+
+
+_buffer = PostCounterBuffer(settings.REDIS_URL)
+
+
+def apply_deltas(deltas: Deltas) -> None:
+    # VALUES 조인으로 한 번의 UPDATE. PositiveIntegerField 이므로 0 미만으로 내려가지 않게 GREATEST 로 고정.
+    if not deltas:
+        return
+    rows = [(pid, d.get("like_count", 0), d.get("comment_count", 0), d.get("repost_count", 0)) for pid, d in deltas.items()]
+    values = ", ".join(["(%s::uuid, %s, %s, %s)"] * len(rows))
+    params = [v for row in rows for v in row]
+    table = Post._meta.db_table
+    sql = (
+        f"UPDATE {table} AS p SET "
+        "like_count = GREATEST(p.like_count + v.dl, 0), "
+        "comment_count = GREATEST(p.comment_count + v.dc, 0), "
+        "repost_count = GREATEST(p.repost_count + v.dr, 0) "
+        f"FROM (VALUES {values}) AS v(id, dl, dc, dr) WHERE p.id = v.id"
+    )
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute(sql, params)
+
+
+def record(deltas: Deltas) -> None:
+    deltas = {pid: d for pid, d in deltas.items() if any(d.values())}
+    if not deltas:
+        return
+    try:
+        _buffer.incr(deltas)
+    except redis.RedisError as e:
+        log.warning("post counter buffer unavailable, applying directly: %s", e)
+        apply_deltas(deltas)
+
+
+def flush(limit: int | None = None) -> int:
+    """
+    dirty 포스트를 최대 limit 개 꺼내 DB 에 반영하고, 반영된 카운트를 검색 인덱스로 전파한다.
+    반환값: 반영한 포스트 수
+    """
+    limit = limit or getattr(settings, "POST_COUNTER_FLUSH_BATCH", 1000)
+    deltas = _buffer.drain(limit)
+    if not deltas:
+        return 0
+    try:
+        apply_deltas(deltas)
+    except Exception:
+        # DB 반영 실패 시 델타를 되돌려 다음 flush 에서 재시도
+        _buffer.incr(deltas)
+        raise
+    _propagate(list(deltas))
+    return len(deltas)
+
+
+def _propagate(post_ids: List[str]) -> None:
+    counts = {str(pid): {"like_count": lc, "comment_count": cc, "repost_count": rc} for pid, lc, cc, rc in Post.objects.filter(id__in=post_ids).values_list("id", *FIELDS)}
+    if not counts:
+        return
+    try:
+        from search.services import update_post_counts
+
+        update_post_counts(counts)
+    except Exception as e:
+        log.exception("search counter propagation failed: %s", e)
+
+
+def _count_subquery(model, fk: str):
+    # 상관 서브쿼리: SELECT COUNT(id) FROM <model> WHERE <fk> = posts.id
+    qs = model.objects.filter(**{fk: OuterRef("pk")}).order_by().values(fk).annotate(c=Count("id")).values("c")
+    return Coalesce(Subquery(qs, output_field=IntegerField()), 0)
+
+
+def reconcile(batch_size: int = 1000, dry_run: bool = False) -> Tuple[int, int]:
+    """
+    posts 카운터 컬럼을 실제 COUNT(*) 와 비교해 어긋난 행만 고친다(id keyset 으로 batch_size 씩 순회).
+    실행 직전에 쌓여 있던 Redis 델타를 먼저 반영해, 보정 직후 같은 델타가 한 번 더 더해지는 일을 줄인다.
+    반환값: (검사한 포스트 수, 보정한 포스트 수)
+    """
+    from comments.models import Comment
+
+    try:
+        flush(max(_buffer.pending(), 1))
+    except redis.RedisError as e:
+        log.warning("post counter buffer unavailable, reconciling without flush: %s", e)
+
+    real = {
+        "like_count": _count_subquery(PostLike, "post"),
+        "comment_count": _count_subquery(Comment, "post"),
+        "repost_count": _count_subquery(Repost, "original_post"),
+    }
+    scanned = fixed = 0
+    last_id = None
+    while True:
+        qs = Post.objects.order_by("id").only("id", *FIELDS)
+        if last_id is not None:
+            qs = qs.filter(id__gt=last_id)
+        rows = list(qs.annotate(**{f"real_{f}": expr for f, expr in real.items()})[:batch_size])
+        if not rows:
+            break
+        last_id = rows[-1].id
+        scanned += len(rows)
+
+        drifted = []
+        for p in rows:
+            changed = False
+            for f in FIELDS:
+                actual = getattr(p, f"real_{f}")
+                if getattr(p, f) != actual:
+                    setattr(p, f, actual)
+                    changed = True
+            if changed:
+                drifted.append(p)
+        fixed += len(drifted)
+        if drifted and not dry_run:
+            Post.objects.bulk_update(drifted, FIELDS)
+            _propagate([str(p.id) for p in drifted])
+    return scanned, fixed
@@ -0,0 +1,275 @@
+"""
+Write-behind 좋아요 경로(바이럴 포스트용, POST_LIKE_WRITE_BEHIND=True 일 때만 사용).
+
+요청 경로에서는 Redis 만 건드리고 즉시 응답한다.
+- post:likers:{post}   : 좋아요한 user_id 집합 → SADD/SREM 결과로 멱등성 판단, "내가 좋아요 했나" 조회도 O(1)
+- post:likers:{post}:w : 집합이 DB 로부터 워밍되었음을 나타내는 플래그
+- post:likes:dirty     : 상태가 바뀐 "post_id:user_id" 쌍
+
+워밍: 플래그가 없는 포스트의 좋아요/취소는 워밍이 끝날 때까지 DB 에 바로 쓰고(요청 경로에서 좋아요 전체를 읽지 않음),
+  포스트가 있으면 워밍 태스크(posts.tasks.warm_post_likers)를 1회 예약한다.
+  DB 쓰기는 포스트 advisory lock 을 공유로, 워밍은 배타로 잡는다 → 워밍 스냅샷은 진행 중인 DB 쓰기가 커밋된 뒤에 읽히고,
+  워밍 중 들어온 쓰기는 락을 얻은 뒤 플래그를 다시 확인해 Redis 경로로 넘어간다(스냅샷이 최신 취소를 덮어쓰지 않음).
+
+flush() 는 dirty 쌍을 꺼내 Redis 집합의 현재 상태(진실)에 맞춰 DB 를 맞춘다.
+- 좋아요: INSERT … ON CONFLICT DO NOTHING RETURNING 으로 실제로 들어간 행만 포스트 이벤트(posts.coalescing) 적재
+- 취소: 포스트별 IN 삭제(post_delete 시그널 → 이벤트)
+순서가 아니라 최종 상태만 반영하므로, 실패 시 dirty 쌍을 되돌려 넣기만 하면 안전하게 재시도된다.
+
+내구성 옵션
+- POST_LIKE_WAIT_REPLICAS > 0 이면 쓰기 후 Redis WAIT 로 복제 확인을 기다리고, 확인 수가 모자라면 DB 에 동기 기록한다.
+"""
+
+import logging
+import uuid
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import redis
+from django.conf import settings
+from django.db import connection, transaction
+
+from . import coalescing
+from .models import Post, PostLike
+
+log = logging.getLogger(__name__)
+
+LIKERS = "post:likers:{post}"
+WARM = "post:likers:{post}:w"
+DIRTY = "post:likes:dirty"
+WARMING = "post:likers:{post}:warming"
+
+_WARM_CHUNK = 5000
+_INSERT_CHUNK = 1000
+
+
+def enabled() -> bool:
+    return getattr(settings, "POST_LIKE_WRITE_BEHIND", False)
+
+
+def _lock(post_id: str, shared: bool) -> None:
+    # 트랜잭션 단위 포스트 락: DB 경로 좋아요/취소(공유) ↔ 워밍(배타)
+    fn = "pg_advisory_xact_lock_shared" if shared else "pg_advisory_xact_lock"
+    with connection.cursor() as cur:
+        cur.execute(f"SELECT {fn}(hashtextextended(%s, 0))", [LIKERS.format(post=post_id)])
+
+
+class LikeBuffer:
+    def __init__(self, url: str):
+        self.r = redis.Redis.from_url(url, decode_responses=True)
+
+    @property
+    def ttl(self) -> int:
+        return getattr(settings, "POST_LIKE_SET_TTL_SEC", 86400)
+
+    def warm(self, post_id: str) -> bool:
+        """
+        DB 의 좋아요를 집합으로 적재하고 플래그를 세운다(워밍 태스크). 반환값: 포스트 존재 여부.
+        배타 락을 잡은 채 읽으므로 진행 중인 DB 경로 쓰기는 모두 스냅샷에 들어가고, 이후 쓰기는 Redis 경로로 간다.
+        """
+        with transaction.atomic():
+            _lock(post_id, shared=False)
+            if self.r.exists(WARM.format(post=post_id)):
+                return True
+            if not Post.objects.filter(id=post_id).exists():
+                self.r.delete(WARMING.format(post=post_id))
+                return False
+            k = LIKERS.format(post=post_id)
+            tmp = f"{k}:tmp"
+            pipe = self.r.pipeline(transaction=False)
+            pipe.delete(tmp)
+            batch: List[str] = []
+            loaded = 0
+            for uid in PostLike.objects.filter(post_id=post_id).values_list("user_id", flat=True).iterator(chunk_size=_WARM_CHUNK):
+                batch.append(str(uid))
+                if len(batch) >= _WARM_CHUNK:
+                    pipe.sadd(tmp, *batch)
+                    loaded += len(batch)
+                    batch = []
+            if batch:
+                pipe.sadd(tmp, *batch)
+                loaded += len(batch)
+            pipe.execute()
+            # 임시 키에 모은 뒤 한 번에 바꿔 끼운다(이전에 남은 집합은 버림)
+            pipe = self.r.pipeline(transaction=True)
+            if loaded:
+                pipe.rename(tmp, k)
+                pipe.expire(k, self.ttl)
+            else:
+                pipe.delete(k)
+            pipe.set(WARM.format(post=post_id), 1, ex=self.ttl)
+            pipe.delete(WARMING.format(post=post_id))
+            pipe.execute()
+        return True
+
+    def _schedule_warm(self, post_id: str) -> None:
+        # 포스트당 1번만 예약(워밍이 실패하면 POST_LIKE_WARM_LOCK_SEC 뒤 다시 예약)
+        if self.r.set(WARMING.format(post=post_id), 1, nx=True, ex=getattr(settings, "POST_LIKE_WARM_LOCK_SEC", 60)):
+            from .tasks import warm_post_likers
+
+            warm_post_likers.delay(post_id)
+
+    def _toggle(self, post_id: str, user_id: str, like: bool) -> Optional[bool]:
+        if not self.r.exists(WARM.format(post=post_id)):
+            with transaction.atomic():
+                _lock(post_id, shared=True)
+                # 락을 기다리는 사이 워밍이 끝났으면 Redis 경로로
+                cold = not self.r.exists(WARM.format(post=post_id))
+                if cold:
+                    result = _toggle_db(post_id, user_id, like)
+            if cold:
+                # 없는 포스트(None)는 워밍을 예약하지 않는다
+                if result is not None:
+                    self._schedule_warm(post_id)
+                return result
+        k = LIKERS.format(post=post_id)
+        pipe = self.r.pipeline(transaction=True)
+        if like:
+            pipe.sadd(k, user_id)
+        else:
+            pipe.srem(k, user_id)
+        pipe.sadd(DIRTY, f"{post_id}:{user_id}")
+        pipe.expire(k, self.ttl)
+        pipe.expire(WARM.format(post=post_id), self.ttl)
+        changed = bool(pipe.execute()[0])
+        if changed:
+            self._wait_durable(post_id, user_id, like)
+        return changed
+
+    def _wait_durable(self, post_id: str, user_id: str, like: bool) -> None:
+        replicas = getattr(settings, "POST_LIKE_WAIT_REPLICAS", 0)
+        if replicas <= 0:
+            return
+        acked = self.r.wait(replicas, getattr(settings, "POST_LIKE_WAIT_TIMEOUT_MS", 50))
+        if acked >= replicas:
+            return
+        # 복제 확인 실패 → 이 건은 DB 에 즉시 기록(이후 flush 는 상태가 이미 맞으므로 no-op)
+        log.warning("like buffer WAIT acked %s/%s replicas; persisting synchronously", acked, replicas)
+        if like:
+            PostLike.objects.get_or_create(post_id=post_id, user_id=user_id)
+        else:
+            PostLike.objects.filter(post_id=post_id, user_id=user_id).delete()
+
+    def like(self, post_id: str, user_id: str) -> Optional[bool]:
+        """True: 새 좋아요, False: 이미 좋아요, None: 포스트 없음"""
+        return self._toggle(str(post_id), str(user_id), True)
+
+    def unlike(self, post_id: str, user_id: str) -> Optional[bool]:
+        """True: 취소됨, False: 좋아요 안 한 상태, None: 포스트 없음"""
+        return self._toggle(str(post_id), str(user_id), False)
+
+    def liked_among(self, user_id: str, post_ids: Iterable[str]) -> Dict[str, Optional[bool]]:
+        # 워밍되지 않은 포스트는 None(모름) → 호출 측에서 DB 로 보완
+        post_ids = [str(p) for p in post_ids]
+        pipe = self.r.pipeline(transaction=False)
+        for pid in post_ids:
+            pipe.exists(WARM.format(post=pid))
+            pipe.sismember(LIKERS.format(post=pid), str(user_id))
+        res = pipe.execute()
+        return {pid: (bool(res[i * 2 + 1]) if res[i * 2] else None) for i, pid in enumerate(post_ids)}
+
+    def drain(self, limit: int) -> List[Tuple[str, str, Optional[bool]]]:
+        pairs = self.r.spop(DIRTY, limit) or []
+        if not pairs:
+            return []
+        split = [p.split(":", 1) for p in pairs]
+        pipe = self.r.pipeline(transaction=False)
+        for post_id, user_id in split:
+            pipe.exists(WARM.format(post=post_id))
+            pipe.sismember(LIKERS.format(post=post_id), user_id)
+        res = pipe.execute()
+        # 집합이 만료되어 사라졌다면 상태를 알 수 없으므로 None(건너뜀)
+        return [(post_id, user_id, (bool(res[i * 2 + 1]) if res[i * 2] else None)) for i, (post_id, user_id) in enumerate(split)]
+
+    def requeue(self, pairs: Iterable[Tuple[str, str]]) -> None:
+        members = [f"{p}:{u}" for p, u in pairs]
+        if members:
+            self.r.sadd(DIRTY, *members)
+
+    def pending(self) -> int:
+        return int(self.r.scard(DIRTY))
+
+
+def _toggle_db(post_id: str, user_id: str, like: bool) -> Optional[bool]:
+    # 워밍 전 포스트: 일반 경로처럼 PostLike 에 바로 쓴다(시그널 → 포스트 이벤트)
+    if like:
+        if not Post.objects.filter(id=post_id).exists():
+            return None
+        _, created = PostLike.objects.get_or_create(post_id=post_id, user_id=user_id)
+        return created
+    deleted, _ = PostLike.objects.filter(post_id=post_id, user_id=user_id).delete()
+    if deleted:
+        return True
+    return False if Post.objects.filter(id=post_id).exists() else None
+
+
+_buffer = LikeBuffer(settings.REDIS_URL)
+
+
+def like(post_id, user_id) -> Optional[bool]:
+    return _buffer.like(post_id, user_id)
+
+
+def unlike(post_id, user_id) -> Optional[bool]:
+    return _buffer.unlike(post_id, user_id)
+
+
+def warm(post_id) -> bool:
+    return _buffer.warm(str(post_id))
+
+
+def liked_among(user_id, post_ids) -> Dict[str, Optional[bool]]:
+    return _buffer.liked_among(user_id, post_ids)
+
+
+# 좋아요 일괄 반영: 없는 포스트는 JOIN 으로 거르고, 이미 있는 행(동시 DB 경로 쓰기 포함)은 충돌로 건너뛴다.
+# RETURNING 으로 이번에 실제로 들어간 행만 돌려받아 이벤트를 적재한다(같은 좋아요의 카운트/알림 중복 방지).
+_INSERT_LIKES_SQL = f"""
+INSERT INTO {PostLike._meta.db_table} (id, post_id, user_id, created_at)
+SELECT v.id, v.post_id, v.user_id, now()
+FROM unnest(%s::uuid[], %s::uuid[], %s::uuid[]) AS v(id, post_id, user_id)
+JOIN {Post._meta.db_table} AS p ON p.id = v.post_id
+ON CONFLICT (user_id, post_id) DO NOTHING
+RETURNING post_id, user_id
+"""
+
+
+def _persist(likes: Set[Tuple[str, str]], unlikes: Set[Tuple[str, str]]) -> None:
+    with transaction.atomic():
+        pairs = sorted(likes)
+        for i in range(0, len(pairs), _INSERT_CHUNK):
+            chunk = pairs[i : i + _INSERT_CHUNK]
+            with connection.cursor() as cur:
+                cur.execute(_INSERT_LIKES_SQL, [[uuid.uuid4() for _ in chunk], [p for p, _ in chunk], [u for _, u in chunk]])
+                inserted = cur.fetchall()
+            # 시그널을 거치지 않으므로 이벤트를 직접 적재(커밋 시 배치 1회)
+            for p, u in inserted:
+                coalescing.enqueue("liked", str(p), actor_id=str(u))
+
+        by_post: Dict[str, List[str]] = defaultdict(list)
+        for p, u in unlikes:
+            by_post[p].append(u)
+        for p, users in by_post.items():
+            PostLike.objects.filter(post_id=p, user_id__in=users).delete()
+
+
+def flush(limit: int | None = None) -> int:
+    """
+    dirty 쌍을 최대 limit 개 꺼내 Redis 상태대로 DB 에 반영한다.
+    반환값: 처리한 쌍 수
+    """
+    limit = limit or getattr(settings, "POST_LIKE_FLUSH_BATCH", 1000)
+    drained = _buffer.drain(limit)
+    if not drained:
+        return 0
+    likes = {(p, u) for p, u, state in drained if state is True}
+    unlikes = {(p, u) for p, u, state in drained if state is False}
+    skipped = len(drained) - len(likes) - len(unlikes)
+    if skipped:
+        log.warning("like buffer: %s pairs skipped (liker set expired before flush)", skipped)
+    try:
+        _persist(likes, unlikes)
+    except Exception:
+        _buffer.requeue(likes | unlikes)
+        raise
+    return len(drained)
@@ -0,0 +1,79 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, connection, transaction
+
+from posts import like_buffer
+from posts.models import Post, PostLike
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Benchmark concurrent likers on a single post: DB path (get_or_create) vs write-behind buffer (Redis + bulk flush). Use on a dev database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--likers", type=int, default=1000)
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--mode", choices=["db", "buffered"], default="buffered")
+        parser.add_argument("--keep", action="store_true", help="Keep the generated post/users after the run.")
+
+    def handle(self, *args, **opts):
+        n, mode = opts["likers"], opts["mode"]
+        author = User.objects.create()
+        post = Post.objects.create(author=author, content="bench: viral post")
+        users = User.objects.bulk_create([User() for _ in range(n)], batch_size=1000)
+        user_ids = [u.id for u in users]
+
+        def like_db(uid):
+            # PostViewSet.like 의 DB 경로와 동일한 트랜잭션 + get_or_create
+            try:
+                with transaction.atomic():
+                    PostLike.objects.get_or_create(user_id=uid, post_id=post.id)
+            except IntegrityError:
+                pass
+
+        def like_buffered(uid):
+            like_buffer.like(post.id, uid)
+
+        fn = like_db if mode == "db" else like_buffered
+        if mode == "buffered":
+            # 워밍 전 좋아요는 DB 경로로 가므로 버퍼 경로만 재도록 미리 적재
+            like_buffer.warm(post.id)
+
+        def timed(uid):
+            t0 = time.perf_counter()
+            try:
+                fn(uid)
+            finally:
+                connection.close()  # 스레드별 커넥션 정리
+            return time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=opts["concurrency"]) as pool:
+            latencies = sorted(pool.map(timed, user_ids))
+        elapsed = time.perf_counter() - t0
+
+        flush_elapsed = 0.0
+        if mode == "buffered":
+            t1 = time.perf_counter()
+            while like_buffer.flush():
+                pass
+            flush_elapsed = time.perf_counter() - t1
+
+        stored = PostLike.objects.filter(post=post).count()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"mode={mode} likers={n} concurrency={opts['concurrency']} "
+                f"throughput={n / elapsed:.0f}/s p50={statistics.median(latencies) * 1000:.1f}ms p99={p99 * 1000:.1f}ms "
+                f"flush={flush_elapsed:.2f}s stored={stored}"
+            )
+        )
+
+        if not opts["keep"]:
+            post.delete()
+            User.objects.filter(id__in=user_ids + [author.id]).delete()
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = "Recompute like/comment/repost counters on posts from source tables and fix drifted rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="Report drifted rows without updating them.")
+
+    def handle(self, *args, **opts):
+        scanned, fixed = counters.reconcile(batch_size=opts["batch_size"], dry_run=opts["dry_run"])
+        verb = "Would fix" if opts["dry_run"] else "Fixed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {fixed} of {scanned} posts."))
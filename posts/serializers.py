@@ -50,10 +50,11 @@ class PollWithMyOut(serializers.ModelSerializer):
     options = PollOptionLite(many=True, read_only=True, source="options.all")
     owner = serializers.UUIDField(source="owner_id", read_only=True)
     my_option_id = serializers.SerializerMethodField()
+    my_option_ids = serializers.SerializerMethodField()
 
     class Meta:
         model = Poll
-        fields = ["id", "owner", "allow_multiple", "options", "my_option_id"]
+        fields = ["id", "owner", "allow_multiple", "options", "my_option_id", "my_option_ids"]
 
     def get_my_option_id(self, obj):
         # 뷰에서 Prefetch(to_attr='my_votes')로 넣어준 컬렉션 사용
@@ -62,6 +63,16 @@ class PollWithMyOut(serializers.ModelSerializer):
             return str(mv[0].option_id)
         return None
 
+    def get_my_option_ids(self, obj) -> list[str]:
+        # 복수 선택: 내 표의 선택 비트마스크를 prefetch 된 옵션 position 으로 펼침(추가 쿼리 없음)
+        mv = getattr(obj, "my_votes", None)
+        if not mv:
+            return []
+        mask = mv[0].mask
+        if not mask:
+            return [str(mv[0].option_id)]
+        return [str(o.id) for o in obj.options.all() if mask >> o.position & 1]
+
 
 class PostDetailOut(serializers.Serializer):
     id = serializers.UUIDField()
@@ -70,14 +81,25 @@ class PostDetailOut(serializers.Serializer):
     created_at = serializers.DateTimeField()
     assets = AssetOut(many=True, source="assets.all")  # assets 앱의 직렬화 재사용
     poll = PollWithMyOut(allow_null=True)
+    # 비정규화 카운터 컬럼(posts.counters) → COUNT(*) 없이 O(1)
+    like_count = serializers.IntegerField(read_only=True)
+    comment_count = serializers.IntegerField(read_only=True)
+    repost_count = serializers.IntegerField(read_only=True)
+    # 뷰어 상태: 뷰에서 posts.viewer_state.attach 로 붙여준 속성 사용(없으면 False)
+    my_liked = serializers.BooleanField(read_only=True, default=False)
+    my_bookmarked = serializers.BooleanField(read_only=True, default=False)
+    my_reposted = serializers.BooleanField(read_only=True, default=False)
 
 
 class BookmarkOut(serializers.ModelSerializer):
     post_id = serializers.UUIDField(read_only=True)
+    # 북마크 목록의 원글에 대한 뷰어 상태(BookmarkViewSet.list 에서 attach)
+    my_liked = serializers.BooleanField(source="post.my_liked", read_only=True, default=False)
+    my_reposted = serializers.BooleanField(source="post.my_reposted", read_only=True, default=False)
 
     class Meta:
         model = Bookmark
-        fields = ("id", "post_id", "created_at")
+        fields = ("id", "post_id", "created_at", "my_liked", "my_reposted")
 
 
 class RepostOut(serializers.ModelSerializer):
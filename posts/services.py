@@ -6,12 +6,10 @@ from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import transaction
 
-from assets.models import Asset, AssetStatus
-from hashtags.services import attach_hashtags_to_post
+from assets.services import attach_assets
 from moderation.services import check_text
 from polls.models import Poll
 from polls.services import create_poll as _create_poll
-from search.services import index_post
 
 from .models import Post
 
@@ -20,68 +18,68 @@ def _max_attachments() -> int:
     return int(getattr(settings, "POST_LIMITS", {}).get("MAX_ATTACHMENTS", 10))
 
 
-@transaction.atomic
+def _after_commit(task, *args) -> None:
+    # 커밋 이후 비동기 단계 예약. CELERY_TASK_ALWAYS_EAGER=True(테스트/로컬)면 즉시 동기 실행.
+    if getattr(settings, "CELERY_TASK_ALWAYS_EAGER", False):
+        task.apply(args=args)
+        return
+    transaction.on_commit(lambda: task.delay(*args))
+
+
 def create_post(*, author, content: str, asset_ids: Sequence, poll_id: str | None, poll_options: Sequence[str] | None, allow_multiple: bool = False) -> Post:
+    """
+    트랜잭션에는 DB 쓰기(투표 확정, 자산 잠금/연결, 포스트 생성)만 둔다.
+    모더레이션/입력 검증은 트랜잭션 전에, 해시태그 연결·검색 색인·피드 적재는 커밋 이후 posts.tasks.process_created_post 에서 처리한다.
+    """
     # 1) 본문 검증(Serializer에서도 검증하지만 도메인 계약으로 한 번 더)
     content = (content or "").strip()
     if not content:
         raise ValidationError("Content must not be empty")
 
-    # 1.5) 모더레이션 사전 검증
+    # 1.5) 모더레이션 사전 검증(읽기 전용이라 트랜잭션 밖에서 수행)
     result = check_text(content)
     if not result.allowed and result.verdict == "block":
         # 테스트/일관성을 위해 기존 스타일대로 문자열 메시지 사용
         # (필드 지정이 필요하면 {"content": ["Content violates policies"]} 로도 변경 가능)
         raise ValidationError("Content violates policies")
 
-    # 2) Poll 결정(둘 다 주면 오류)
+    # 2) Poll 지정 방식 검증(둘 다 주면 오류)
     if poll_id and poll_options:
         raise ValidationError("Provide either poll_id or poll(options), not both")
 
-    poll_obj = None
-    if poll_id:
-        poll_obj = Poll.objects.select_for_update().filter(id=poll_id, owner=author).first()
-        if poll_obj is None:
-            raise ValidationError("Invalid poll_id")
-        # 이미 다른 포스트에 연결된 Poll 금지
-        if Post.objects.filter(poll=poll_obj).exists():
-            raise ValidationError("Poll is already attached to a post")
-    elif poll_options:
-        # 옵션으로 즉석 생성
-        created = _create_poll(owner=author, option_texts=poll_options, allow_multiple=allow_multiple)
-        poll_obj = created.poll
-
-    # 3) Asset 확보
+    # 3) 첨부 개수 검증
     asset_ids = list(dict.fromkeys(asset_ids or []))  # unique 유지 + 순서 보존
     if len(asset_ids) > _max_attachments():
         raise ValidationError(f"Too many attachments (>{_max_attachments()})")
 
-    # 잠금 + 조건 일치하는 것만
-    locked_assets = Asset.objects.select_for_update().filter(id__in=asset_ids, owner=author, status=AssetStatus.READY, post__isnull=True)
-
-    if len(asset_ids) != locked_assets.count():
-        # 어떤 자산은 소유자 불일치/미완료/이미 연결됨
-        raise ValidationError("Invalid attachments detected")
-
-    # 4) Post 생성
-    post = Post.objects.create(author=author, content=content, poll=poll_obj)
-
-    # 5) Hashtag 자동 추출 및 연결
-    tags = attach_hashtags_to_post(post.id, content)
-
-    # 6) 검색 색인
-    index_post(
-        post_id=post.id,
-        author_id=post.author_id,
-        author_nickname=getattr(getattr(post, "author", None), "nickname", "") or "",
-        content=post.content,
-        hashtags=tags,
-        created_at=post.created_at,
-        like_count=getattr(post, "like_count", 0),
-    )
-
-    # 7) 첨부 연결
-    if asset_ids:
-        Asset.objects.filter(id__in=asset_ids).update(post=post)
+    with transaction.atomic():
+        # 4) Poll 확정
+        poll_obj = None
+        if poll_id:
+            poll_obj = Poll.objects.select_for_update().filter(id=poll_id, owner=author).first()
+            if poll_obj is None:
+                raise ValidationError("Invalid poll_id")
+            # 이미 다른 포스트에 연결된 Poll 금지
+            if Post.objects.filter(poll=poll_obj).exists():
+                raise ValidationError("Poll is already attached to a post")
+        elif poll_options:
+            # 옵션으로 즉석 생성
+            created = _create_poll(owner=author, option_texts=poll_options, allow_multiple=allow_multiple)
+            poll_obj = created.poll
+
+        # 5) Post 생성
+        post = Post.objects.create(author=author, content=content, poll=poll_obj)
+
+        # 6) 첨부 연결: 자산 잠금 조회 1번 + UPDATE ... RETURNING 1번(assets.services, 댓글 첨부와 공용)
+        if asset_ids:
+            attached = attach_assets(owner=author, asset_ids=asset_ids, post=post)
+            if not attached.ok:
+                # 어떤 자산은 소유자 불일치/미완료/이미 연결됨 → 예외로 트랜잭션 전체 롤백
+                raise ValidationError("Invalid attachments detected")
+
+        # 7) 커밋 이후: 해시태그 → 검색 색인 → 피드 적재
+        from .tasks import process_created_post
+
+        _after_commit(process_created_post, str(post.id))
 
     return post
@@ -1,56 +1,64 @@
-from django.conf import settings
+from typing import Optional
+
 from django.contrib.auth import get_user_model
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from . import tasks
+from . import coalescing
 from .models import Post, PostLike, Repost
 
 User = get_user_model()
 
 
-def _spawn(task, *args, **kwargs):
-    # 테스트/로컬에서 CELERY_TASK_ALWAYS_EAGER=True 라면 즉시 동기 실행(.apply), 그 외 환경에서는 .delay 로 비동기 실행.
-    if getattr(settings, "CELERY_TASK_ALWAYS_EAGER", False):
-        return task.apply(args=args, kwargs=kwargs)
-    return task.delay(*args, **kwargs)
+def _cached_author_id(instance, field_name: str) -> Optional[str]:
+    # FK 대상 포스트가 이미 로드된 경우에만 author_id를 꺼낸다(지연 로딩 쿼리 방지). 나머지는 배치 태스크에서 한 번에 조회.
+    field = instance._meta.get_field(field_name)
+    if field.is_cached(instance):
+        return str(getattr(instance, field_name).author_id)
+    return None
 
 
 # --- Post ---
 @receiver(post_save, sender=Post)
-def on_post_created_or_updated(sender, instance, created: bool, **kwargs):
-    if created:
-        _spawn(tasks.on_post_created, str(instance.id), str(instance.author_id))
-    else:
-        _spawn(tasks.on_post_updated, str(instance.id), str(instance.author_id))
+def on_post_created_or_updated(sender, instance, created: bool, using, **kwargs):
+    coalescing.enqueue("created" if created else "updated", str(instance.id), author_id=str(instance.author_id), using=using)
 
 
 @receiver(post_delete, sender=Post)
-def on_post_deleted(sender, instance, **kwargs):
-    _spawn(tasks.on_post_deleted, str(instance.id), str(instance.author_id))
+def on_post_deleted(sender, instance, using, **kwargs):
+    coalescing.enqueue("deleted", str(instance.id), author_id=str(instance.author_id), using=using)
 
 
 # --- Like ---
 @receiver(post_save, sender=PostLike)
-def on_post_liked_created(sender, instance, created: bool, **kwargs):
+def on_post_liked_created(sender, instance, created: bool, using, **kwargs):
     if not created:
         return
-    _spawn(tasks.on_post_liked, str(instance.post_id), str(instance.user_id), str(instance.post.author_id))
+    coalescing.enqueue("liked", str(instance.post_id), actor_id=str(instance.user_id), author_id=_cached_author_id(instance, "post"), using=using)
 
 
 @receiver(post_delete, sender=PostLike)
-def on_post_unliked_deleted(sender, instance, **kwargs):
-    _spawn(tasks.on_post_unliked, str(instance.post_id), str(instance.user_id), str(instance.post.author_id))
+def on_post_unliked_deleted(sender, instance, using, **kwargs):
+    coalescing.enqueue("unliked", str(instance.post_id), actor_id=str(instance.user_id), author_id=_cached_author_id(instance, "post"), using=using)
 
 
 # --- Repost ---
 @receiver(post_save, sender=Repost)
-def on_post_reposted_created(sender, instance, created: bool, **kwargs):
+def on_post_reposted_created(sender, instance, created: bool, using, **kwargs):
     if not created:
         return
-    _spawn(tasks.on_post_reposted, str(instance.original_post_id), str(instance.user_id), str(instance.original_post.author_id), str(instance.id))
+    coalescing.enqueue(
+        "reposted", str(instance.original_post_id), actor_id=str(instance.user_id), author_id=_cached_author_id(instance, "original_post"), repost_id=str(instance.id), using=using
+    )
 
 
 @receiver(post_delete, sender=Repost)
-def on_post_unreposted_deleted(sender, instance, **kwargs):
-    _spawn(tasks.on_post_unreposted, str(instance.original_post_id), str(instance.user_id), str(instance.original_post.author_id), str(instance.id))
+def on_post_unreposted_deleted(sender, instance, using, **kwargs):
+    coalescing.enqueue(
+        "unreposted",
+        str(instance.original_post_id),
+        actor_id=str(instance.user_id),
+        author_id=_cached_author_id(instance, "original_post"),
+        repost_id=str(instance.id),
+        using=using,
+    )
@@ -1,6 +1,7 @@
 import json
 import logging
-from typing import Any, Dict, Optional
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
 
 from celery import shared_task
 from django.conf import settings
@@ -136,13 +137,8 @@ def on_post_liked(self, post_id: str, actor_id: str, author_id: str):
     """
     publish_event("PostLiked", {"post_id": post_id, "actor_id": actor_id, "author_id": author_id}, key="post.liked")
 
-    # 알림: 작성자에게 like 알림
-    try:
-        from notifications.tasks import single_user_push
-
-        single_user_push.delay(user_id=author_id, type_="like", title="New like", body="Your post got a like.", data={"post_id": post_id, "by": actor_id})
-    except Exception as e:
-        log.exception("single_user_push for like failed: %s", e)
+    # 알림: 작성자에게 like 알림(시간 창 단위로 1건에 집계)
+    _push_aggregated(author_id, post_id, [(actor_id, None)], kind="like")
 
 
 @shared_task(bind=True, name="posts.tasks.on_post_unliked", autoretry_for=(Exception,), retry_backoff=2, max_retries=5)
@@ -168,19 +164,7 @@ def on_post_reposted(self, post_id: str, actor_id: str, author_id: str, repost_i
         key="post.reposted",
     )
 
-    try:
-        from notifications.tasks import single_user_push
-
-        # 알림 타입은 기존 설정 키셋을 유지하기 위해 'post'로 매핑
-        single_user_push.delay(
-            user_id=author_id,
-            type_="post",
-            title="Reposted",
-            body="Your post was reposted.",
-            data={"post_id": post_id, "by": actor_id, "repost_id": repost_id or ""},
-        )
-    except Exception as e:
-        log.exception("single_user_push for repost failed: %s", e)
+    _push_aggregated(author_id, post_id, [(actor_id, repost_id or "")], kind="repost")
 
 
 @shared_task(bind=True, name="posts.tasks.on_post_unreposted", autoretry_for=(Exception,), retry_backoff=2, max_retries=5)
@@ -190,3 +174,192 @@ def on_post_unreposted(self, post_id: str, actor_id: str, author_id: str, repost
     - 버스 발행(알림은 일반적으로 발송하지 않음)
     """
     publish_event("PostUnreposted", {"post_id": post_id, "actor_id": actor_id, "author_id": author_id, "repost_id": repost_id}, key="post.unreposted")
+
+
+# ---- Celery 태스크: 포스트 작성 후처리(create_post 커밋 이후) ----
+@shared_task(bind=True, name="posts.tasks.process_created_post", autoretry_for=(Exception,), retry_backoff=2, max_retries=5)
+def process_created_post(self, post_id: str):
+    """
+    create_post 트랜잭션에서 빠진 단계들을 커밋 이후에 순서대로 수행한다(각 단계는 재실행해도 안전).
+    1) 해시태그 추출/연결 2) 검색 색인 3) 피드 적재(저장소/캐시 무효화/WS 알림)
+    """
+    from hashtags.services import attach_hashtags_to_post
+
+    from .models import Post
+
+    post = Post.objects.select_related("author").filter(id=post_id).first()
+    if post is None:
+        # 커밋 직후 삭제된 경우
+        return None
+
+    tags = attach_hashtags_to_post(post.id, post.content)
+
+    try:
+        from search.services import index_post
+
+        index_post(
+            post_id=post.id,
+            author_id=post.author_id,
+            author_nickname=getattr(post.author, "nickname", "") or "",
+            content=post.content,
+            hashtags=tags,
+            created_at=post.created_at,
+            like_count=post.like_count,
+        )
+    except Exception as e:
+        log.exception("search indexing for post %s failed: %s", post_id, e)
+
+    try:
+        from feed.tasks import consume_post_created
+
+        evt = {
+            "event": "PostCreated",
+            "payload": {"post_id": str(post.id), "author_id": str(post.author_id), "created_ms": int(post.created_at.timestamp() * 1000), "hashtags": tags},
+        }
+        consume_post_created.delay(evt)
+    except Exception as e:
+        log.exception("feed dispatch for post %s failed: %s", post_id, e)
+    return tags
+
+
+# ---- Celery 태스크: 코얼레싱된 이벤트 배치(posts.coalescing) ----
+def _resolve_author_ids(events: List[Dict[str, Any]]) -> None:
+    # 시그널 시점에 작성자를 몰랐던 이벤트는 한 번의 쿼리로 채운다(삭제된 포스트는 None 유지)
+    missing = {ev["post_id"] for ev in events if not ev.get("author_id")}
+    if not missing:
+        return
+    from .models import Post
+
+    authors = {str(pid): str(aid) for pid, aid in Post.objects.filter(id__in=missing).values_list("id", "author_id")}
+    for ev in events:
+        if not ev.get("author_id"):
+            ev["author_id"] = authors.get(ev["post_id"])
+
+
+def _push_aggregated(author_id: str, post_id: str, actors: List[tuple], *, kind: str) -> None:
+    # 같은 (작성자, 포스트)에 대한 반응은 시간 창마다 알림 1건으로 묶는다: "Alice and 1,203 others liked your post."
+    # 행 갱신/푸시 예약은 notifications.aggregation 이 담당(창마다 푸시 최대 1번)
+    actor_id, repost_id = actors[-1]
+    data = {"post_id": post_id, "by": actor_id}
+    if repost_id is not None:
+        data["repost_id"] = repost_id
+
+    try:
+        from notifications.aggregation import record
+
+        record(user_id=author_id, kind=kind, target=f"post:{post_id}", actor_ids=[a for a, _ in actors], data=data)
+    except Exception as e:
+        log.exception("aggregated %s notification failed: %s", kind, e)
+
+
+def _batch_progress_key(task_id: str) -> str:
+    return f"posts:engagement-batch:{task_id}"
+
+
+@shared_task(bind=True, name="posts.tasks.on_engagement_batch", autoretry_for=(Exception,), retry_backoff=2, max_retries=5)
+def on_engagement_batch(self, events: List[Dict[str, Any]]):
+    """
+    트랜잭션 단위로 모인 포스트 이벤트를 한 번에 처리한다.
+    - 버스 발행은 기존 계약대로 이벤트마다 수행
+    - 좋아요/리포스트 알림은 (작성자, 포스트) 단위로 집계해 1건만 발송
+    - 재시도(autoretry)는 같은 task id 로 다시 실행된다. 실패 시점까지의 진행(발행한 이벤트 수, 카운터 반영 여부,
+      알림 집계를 마친 대상)을 캐시에 남겨 두고, 재시도는 그 다음부터 이어서 한다(이미 한 부수효과는 반복하지 않음).
+    """
+    from django.core.cache import cache
+
+    key = _batch_progress_key(self.request.id) if self.request.id else None
+    progress = (cache.get(key) if key else None) or {"published": 0, "counted": False, "notified": []}
+    done = False
+    try:
+        _engagement_batch(events, progress)
+        done = True
+    finally:
+        if key and done:
+            cache.delete(key)
+        elif key:
+            cache.set(key, progress, getattr(settings, "POST_EVENT_BATCH_PROGRESS_TTL_SEC", 86400))
+    return len(events)
+
+
+def _engagement_batch(events: List[Dict[str, Any]], progress: Dict[str, Any]) -> None:
+    _resolve_author_ids(events)
+
+    likes: Dict[tuple, List[tuple]] = defaultdict(list)
+    reposts: Dict[tuple, List[tuple]] = defaultdict(list)
+    deltas: Dict[str, Counter] = defaultdict(Counter)
+    for i, ev in enumerate(events):
+        kind, post_id, actor_id, author_id = ev["kind"], ev["post_id"], ev.get("actor_id"), ev.get("author_id")
+        repost_id = ev.get("repost_id")
+        publish = i >= progress["published"]  # 재시도라면 이미 발행한 이벤트는 집계에만 쓴다
+
+        if kind == "created":
+            if publish:
+                on_post_created(post_id, author_id)
+        elif kind == "updated":
+            if publish:
+                on_post_updated(post_id, author_id)
+        elif kind == "deleted":
+            if publish:
+                on_post_deleted(post_id, author_id)
+        elif kind == "liked":
+            if publish:
+                publish_event("PostLiked", {"post_id": post_id, "actor_id": actor_id, "author_id": author_id}, key="post.liked")
+            deltas[post_id]["like_count"] += 1
+            if author_id:
+                likes[(author_id, post_id)].append((actor_id, None))
+        elif kind == "unliked":
+            if publish:
+                publish_event("PostUnliked", {"post_id": post_id, "actor_id": actor_id, "author_id": author_id}, key="post.unliked")
+            deltas[post_id]["like_count"] -= 1
+        elif kind == "reposted":
+            if publish:
+                publish_event("PostReposted", {"post_id": post_id, "actor_id": actor_id, "author_id": author_id, "repost_id": repost_id}, key="post.reposted")
+            deltas[post_id]["repost_count"] += 1
+            if author_id:
+                reposts[(author_id, post_id)].append((actor_id, repost_id or ""))
+        elif kind == "unreposted":
+            if publish:
+                publish_event("PostUnreposted", {"post_id": post_id, "actor_id": actor_id, "author_id": author_id, "repost_id": repost_id}, key="post.unreposted")
+            deltas[post_id]["repost_count"] -= 1
+        else:
+            log.warning("Unknown post event kind=%s; skipped.", kind)
+        progress["published"] = max(progress["published"], i + 1)
+
+    # 카운터 델타는 포스트별로 합산해 Redis 에 한 번에 누적(주기적으로 posts 컬럼에 반영)
+    if not progress["counted"]:
+        from .counters import record
+
+        record({pid: dict(d) for pid, d in deltas.items()})
+        progress["counted"] = True
+
+    for agg_kind, groups in (("like", likes), ("repost", reposts)):
+        for (author_id, post_id), actors in groups.items():
+            target = f"{agg_kind}:{author_id}:{post_id}"
+            if target in progress["notified"]:
+                continue
+            _push_aggregated(author_id, post_id, actors, kind=agg_kind)
+            progress["notified"].append(target)
+
+
+@shared_task(name="posts.tasks.flush_post_likes")
+def flush_post_likes(limit: int | None = None):
+    # celery beat 주기 작업(write-behind 모드): Redis 에 기록된 좋아요/취소를 PostLike 로 일괄 반영
+    from .like_buffer import flush
+
+    return flush(limit)
+
+
+@shared_task(name="posts.tasks.warm_post_likers")
+def warm_post_likers(post_id: str):
+    # write-behind 모드: 포스트의 좋아요를 Redis 집합으로 적재(끝날 때까지 좋아요/취소는 DB 경로)
+    from .like_buffer import warm
+
+    return warm(post_id)
+
+
+@shared_task(name="posts.tasks.flush_post_counters")
+def flush_post_counters(limit: int | None = None):
+    # celery beat 주기 작업: Redis 에 쌓인 카운터 델타를 posts 컬럼에 일괄 반영
+    from .counters import flush
+
+    return flush(limit)
@@ -0,0 +1,74 @@
+import pytest
+import redis
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+import posts.signals  # noqa: F401
+from comments.models import Comment
+from posts import counters
+from posts.models import Post, PostLike, Repost
+
+pytestmark = pytest.mark.django_db
+User = get_user_model()
+
+
+class TestPostCounters:
+    @pytest.fixture(autouse=True)
+    def _eager_and_fake_redis(self, settings, monkeypatch):
+        import fakeredis
+
+        settings.CELERY_TASK_ALWAYS_EAGER = True
+        settings.EVENT_BUS_BACKEND = "dummy"
+        settings.PUSH_PROVIDER = "dummy"
+
+        # 모듈 로드 시 생성된 버퍼를 fakeredis 기반으로 교체
+        buf = counters.PostCounterBuffer.__new__(counters.PostCounterBuffer)
+        buf.r = fakeredis.FakeRedis(decode_responses=True)
+        monkeypatch.setattr(counters, "_buffer", buf)
+        return buf
+
+    @pytest.fixture
+    def post(self):
+        return Post.objects.create(author=User.objects.create(), content="counting")
+
+    def test_deltas_are_buffered_then_flushed_in_batch(self, post, _eager_and_fake_redis):
+        u1, u2 = User.objects.create(), User.objects.create()
+        PostLike.objects.create(user=u1, post=post)
+        PostLike.objects.create(user=u2, post=post)
+        PostLike.objects.filter(user=u2).delete()
+        Repost.objects.create(user=u1, original_post=post)
+        Comment.objects.create(post=post, user=u2, content="hi")
+
+        # flush 전에는 Redis 에만 누적
+        post.refresh_from_db()
+        assert (post.like_count, post.comment_count, post.repost_count) == (0, 0, 0)
+        assert _eager_and_fake_redis.pending() == 1
+
+        assert counters.flush() == 1
+        post.refresh_from_db()
+        assert (post.like_count, post.comment_count, post.repost_count) == (1, 1, 1)
+        assert _eager_and_fake_redis.pending() == 0
+        assert counters.flush() == 0
+
+    def test_falls_back_to_direct_update_when_redis_is_down(self, post, monkeypatch):
+        def boom(deltas):
+            raise redis.ConnectionError("down")
+
+        monkeypatch.setattr(counters._buffer, "incr", boom)
+        PostLike.objects.create(user=User.objects.create(), post=post)
+
+        post.refresh_from_db()
+        assert post.like_count == 1
+
+    def test_reconcile_command_fixes_drift(self, post):
+        PostLike.objects.create(user=User.objects.create(), post=post)
+        counters.flush()
+        Post.objects.filter(id=post.id).update(like_count=42, repost_count=7)
+
+        call_command("reconcile_post_counters", "--dry-run")
+        post.refresh_from_db()
+        assert post.like_count == 42
+
+        call_command("reconcile_post_counters")
+        post.refresh_from_db()
+        assert (post.like_count, post.comment_count, post.repost_count) == (1, 0, 0)
@@ -172,3 +172,27 @@ class TestCreatePostValidation:
         client = APIClient()
         res = client.post(reverse("posts-list"), data={"content": "x"}, format="json")
         assert res.status_code in (401, 403)
+
+
+# ---------- Test: After-commit stages ----------
+class TestCreatePostAfterCommit:
+    def test_hashtags_and_index_run_after_commit(self, auth_client, settings, django_capture_on_commit_callbacks):
+        from hashtags.models import PostHashtag
+        from search.services import backend
+
+        settings.CELERY_TASK_ALWAYS_EAGER = False
+        with django_capture_on_commit_callbacks() as callbacks:
+            res = auth_client.post(reverse("posts-list"), data={"content": "커밋 이후 #later"}, format="json")
+        assert res.status_code == 201
+        post_id = res.json()["id"]
+
+        # 트랜잭션 안에서는 해시태그/검색 색인을 건드리지 않는다
+        assert not PostHashtag.objects.filter(post_id=post_id).exists()
+        assert post_id not in backend().posts
+
+        # 커밋 이후 단계 실행(동기 실행으로 검증)
+        settings.CELERY_TASK_ALWAYS_EAGER = True
+        for cb in callbacks:
+            cb()
+        assert PostHashtag.objects.filter(post_id=post_id, hashtag__name="later").exists()
+        assert backend().posts[post_id]["hashtags"] == ["later"]
@@ -0,0 +1,128 @@
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+import posts.signals  # noqa: F401
+from notifications.models import Notification, NotificationSetting
+from posts import like_buffer
+from posts.models import Post, PostLike
+
+pytestmark = pytest.mark.django_db
+User = get_user_model()
+
+
+class TestWriteBehindLikes:
+    @pytest.fixture(autouse=True)
+    def _write_behind(self, settings, monkeypatch):
+        import fakeredis
+
+        settings.POST_LIKE_WRITE_BEHIND = True
+        settings.CELERY_TASK_ALWAYS_EAGER = True
+        settings.EVENT_BUS_BACKEND = "dummy"
+        settings.PUSH_PROVIDER = "dummy"
+
+        buf = like_buffer.LikeBuffer.__new__(like_buffer.LikeBuffer)
+        buf.r = fakeredis.FakeRedis(decode_responses=True)
+        monkeypatch.setattr(like_buffer, "_buffer", buf)
+
+    @pytest.fixture
+    def ctx(self):
+        client = APIClient()
+        author, liker = User.objects.create(), User.objects.create()
+        post = Post.objects.create(author=author, content="viral")
+        client.force_authenticate(liker)
+        return client, author, liker, post
+
+    def test_like_is_acknowledged_then_flushed_in_bulk(self, ctx):
+        client, author, liker, post = ctx
+        NotificationSetting.objects.update_or_create(user=author, defaults={"like": True})
+        like_buffer.warm(post.id)
+
+        assert client.post(f"/api/v1/posts/{post.id}/like/").status_code == 204
+        res = client.post(f"/api/v1/posts/{post.id}/like/")
+        assert res.status_code == 400 and res.json()["detail"] == "Already liked"
+
+        # 응답 시점에는 DB 미반영
+        assert not PostLike.objects.filter(post=post).exists()
+        assert like_buffer.liked_among(liker.id, [post.id]) == {str(post.id): True}
+
+        assert like_buffer.flush() == 1
+        assert PostLike.objects.filter(post=post, user=liker).count() == 1
+        # bulk_create 경로에서도 포스트 이벤트/알림이 이어진다
+        assert Notification.objects.filter(user=author, type="like", payload__post_id=str(post.id)).exists()
+
+    def test_like_then_unlike_before_flush_leaves_no_row(self, ctx):
+        client, _, liker, post = ctx
+        client.post(f"/api/v1/posts/{post.id}/like/")
+        assert client.delete(f"/api/v1/posts/{post.id}/like/").status_code == 204
+        assert client.delete(f"/api/v1/posts/{post.id}/like/").status_code == 404
+
+        like_buffer.flush()
+        assert not PostLike.objects.filter(post=post).exists()
+
+    def test_existing_db_likes_are_warmed_for_idempotency(self, ctx):
+        client, _, liker, post = ctx
+        PostLike.objects.create(user=liker, post=post)
+
+        res = client.post(f"/api/v1/posts/{post.id}/like/")
+        assert res.status_code == 400
+
+        assert client.delete(f"/api/v1/posts/{post.id}/like/").status_code == 204
+        like_buffer.flush()
+        assert not PostLike.objects.filter(post=post).exists()
+
+    def test_unknown_post_returns_404(self, ctx):
+        client, _, _, _ = ctx
+        res = client.post("/api/v1/posts/00000000-0000-0000-0000-000000000000/like/")
+        assert res.status_code == 404
+
+    def test_cold_post_writes_db_until_warm_completes(self, ctx, monkeypatch):
+        from posts import tasks
+
+        client, author, liker, post = ctx
+        other = User.objects.create()
+        PostLike.objects.create(user=other, post=post)
+        scheduled = []
+        monkeypatch.setattr(tasks.warm_post_likers, "delay", lambda post_id: scheduled.append(post_id))
+
+        # 워밍 전: 요청 경로는 좋아요 전체를 읽지 않고 DB 에 바로 쓴다. 워밍은 한 번만 예약
+        assert client.post(f"/api/v1/posts/{post.id}/like/").status_code == 204
+        assert client.post(f"/api/v1/posts/{post.id}/like/").status_code == 400
+        assert PostLike.objects.filter(post=post, user=liker).exists()
+        assert like_buffer.unlike(post.id, other.id) is True
+        assert scheduled == [str(post.id)]
+        assert like_buffer.liked_among(liker.id, [post.id]) == {str(post.id): None}
+
+        # 워밍 스냅샷에는 워밍 전의 취소까지 반영되고, 이후 쓰기는 Redis 경로
+        assert like_buffer.warm(post.id) is True
+        assert like_buffer.liked_among(other.id, [post.id]) == {str(post.id): False}
+        assert like_buffer.unlike(post.id, liker.id) is True
+        assert PostLike.objects.filter(post=post, user=liker).exists()
+        assert like_buffer.flush() == 1
+        assert not PostLike.objects.filter(post=post).exists()
+
+    def test_flush_skips_rows_inserted_concurrently(self, ctx, monkeypatch):
+        from posts import coalescing
+
+        client, _, liker, post = ctx
+        events = []
+        monkeypatch.setattr(coalescing, "dispatch", events.extend)
+        like_buffer.warm(post.id)
+        assert client.post(f"/api/v1/posts/{post.id}/like/").status_code == 204
+        # flush 전에 다른 경로(_wait_durable 등)가 같은 행을 먼저 넣음 → 시그널로 이벤트 1회
+        PostLike.objects.get_or_create(post=post, user=liker)
+
+        assert like_buffer.flush() == 1
+        # 충돌로 건너뛴 행은 이벤트를 다시 적재하지 않는다(카운트/알림 중복 없음)
+        assert [e["kind"] for e in events] == ["liked"]
+        assert PostLike.objects.filter(post=post).count() == 1
+
+    def test_unknown_post_does_not_schedule_warm(self, monkeypatch):
+        from posts import tasks
+
+        scheduled = []
+        monkeypatch.setattr(tasks.warm_post_likers, "delay", lambda post_id: scheduled.append(post_id))
+        missing = "00000000-0000-0000-0000-000000000000"
+        assert like_buffer.like(missing, User.objects.create().id) is None
+        assert like_buffer.unlike(missing, User.objects.create().id) is None
+        assert scheduled == []
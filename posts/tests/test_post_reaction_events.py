@@ -1,4 +1,7 @@
+import uuid
+
 import pytest
+from celery.exceptions import Retry
 from django.contrib.auth import get_user_model
 
 import posts.signals  # noqa: F401
@@ -135,3 +138,123 @@ class TestRepostEvents(BaseEventTest):
         # 새 알림은 생기지 않아야 함
         after = Notification.objects.filter(user=author, type="post").count()
         assert after == before
+
+
+class TestCoalescedEngagementEvents(BaseEventTest):
+    def test_likes_in_one_transaction_flush_as_single_batch(self, users, post, settings, monkeypatch, django_capture_on_commit_callbacks):
+        author, actor, outsider = users
+        NotificationSetting.objects.update_or_create(user=author, defaults={"like": True})
+        third = User.objects.create()
+
+        captured = []
+        monkeypatch.setattr("posts.tasks.publish_event", lambda e, d, key=None: captured.append((e, d, key)))
+
+        # 비-eager 환경처럼 시그널은 트랜잭션 버퍼에 쌓이고 on_commit 콜백만 등록된다
+        settings.CELERY_TASK_ALWAYS_EAGER = False
+        with django_capture_on_commit_callbacks() as callbacks:
+            for u in (actor, outsider, third):
+                PostLike.objects.create(user=u, post=post)
+        assert captured == []
+
+        # 좋아요 3건 → on_commit 콜백 1개. 커밋 시점에 배치 태스크 한 번으로 처리(동기 실행)
+        assert len(callbacks) == 1
+        settings.CELERY_TASK_ALWAYS_EAGER = True
+        callbacks[0]()
+        assert [e for e, _, _ in captured] == ["PostLiked"] * 3
+
+        # 알림은 집계되어 1건만 생성
+        notes = Notification.objects.filter(user=author, type="like", payload__post_id=str(post.id))
+        assert notes.count() == 1
+        assert notes.get().count == 3
+
+    def test_rolled_back_savepoint_drops_its_events(self, users, post, settings, monkeypatch, django_capture_on_commit_callbacks):
+        from django.db import transaction
+
+        from posts import coalescing
+
+        author, actor, outsider = users
+        third, fourth = User.objects.create(), User.objects.create()
+        batches = []
+        monkeypatch.setattr(coalescing, "dispatch", lambda events: batches.append([(e["kind"], e["actor_id"]) for e in events]))
+
+        settings.CELERY_TASK_ALWAYS_EAGER = False
+        with django_capture_on_commit_callbacks() as callbacks:
+            PostLike.objects.create(user=actor, post=post)
+            with transaction.atomic():
+                PostLike.objects.create(user=outsider, post=post)
+            try:
+                with transaction.atomic():
+                    PostLike.objects.create(user=third, post=post)
+                    raise RuntimeError("rollback")
+            except RuntimeError:
+                pass
+            with transaction.atomic():
+                PostLike.objects.create(user=fourth, post=post)
+
+        # 롤백된 세이브포인트의 버퍼(콜백)는 사라지고, 살아남은 블록들의 이벤트는 커밋 후 한 배치로
+        assert len(callbacks) == 3
+        for cb in callbacks:
+            cb()
+        assert batches == [[("liked", str(actor.id)), ("liked", str(outsider.id)), ("liked", str(fourth.id))]]
+
+    def test_failed_commit_hook_does_not_leak_events_into_next_commit(self, users, post, settings, monkeypatch, django_capture_on_commit_callbacks):
+        from django.db import transaction
+
+        from posts import coalescing
+
+        _, actor, outsider = users
+        third = User.objects.create()
+        batches = []
+        monkeypatch.setattr(coalescing, "dispatch", lambda events: batches.append([e["actor_id"] for e in events]))
+
+        def boom():
+            raise RuntimeError("hook failed")
+
+        settings.CELERY_TASK_ALWAYS_EAGER = False
+        with django_capture_on_commit_callbacks() as callbacks:
+            PostLike.objects.create(user=actor, post=post)
+            transaction.on_commit(boom)
+            with transaction.atomic():
+                PostLike.objects.create(user=outsider, post=post)
+        # Django 처럼: 앞 훅이 예외를 던지면 뒤 콜백(마지막 버퍼)은 실행되지 않고 버려진다
+        callbacks[0]()
+        with pytest.raises(RuntimeError):
+            callbacks[1]()
+        callbacks.clear()
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            PostLike.objects.create(user=third, post=post)
+        for cb in callbacks:
+            cb()
+        # 커밋마다 따로: 먼저 실행된 버퍼가 같은 커밋의 이벤트를 모두 보냈고, 다음 커밋에는 섞이지 않는다
+        assert batches == [[str(actor.id), str(outsider.id)], [str(third.id)]]
+
+    def test_batch_retry_resumes_without_repeating_side_effects(self, users, post, monkeypatch):
+        from posts import counters, tasks
+
+        author, actor, outsider = users
+        NotificationSetting.objects.update_or_create(user=author, defaults={"like": True})
+        events = [{"kind": "liked", "post_id": str(post.id), "actor_id": str(u.id), "author_id": str(author.id)} for u in (actor, outsider)]
+
+        published, recorded, calls = [], [], {"n": 0}
+
+        def flaky_publish(event, payload, key=None):
+            calls["n"] += 1
+            if calls["n"] == 2:
+                raise ConnectionError("bus down")
+            published.append(payload["actor_id"])
+
+        monkeypatch.setattr(tasks, "publish_event", flaky_publish)
+        monkeypatch.setattr(counters, "record", lambda deltas: recorded.append(deltas))
+
+        # 두 번째 발행에서 실패 → autoretry. 재시도는 같은 task id 로 다시 실행된다
+        task_id = str(uuid.uuid4())
+        with pytest.raises((Retry, ConnectionError)):
+            tasks.on_engagement_batch.apply(args=(events,), task_id=task_id)
+        assert published == [str(actor.id)] and recorded == []
+        tasks.on_engagement_batch.apply(args=(events,), task_id=task_id)
+
+        assert published == [str(actor.id), str(outsider.id)]
+        assert recorded == [{str(post.id): {"like_count": 2}}]
+        note = Notification.objects.get(user=author, type="like", payload__post_id=str(post.id))
+        assert note.count == 2
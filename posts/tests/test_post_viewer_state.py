@@ -0,0 +1,71 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from posts.models import Bookmark, Post, PostLike, Repost
+from relations.models import Follow
+
+pytestmark = pytest.mark.django_db
+User = get_user_model()
+
+
+class TestViewerState:
+    @pytest.fixture
+    def ctx(self):
+        author, viewer = User.objects.create(), User.objects.create()
+        client = APIClient()
+        client.force_authenticate(viewer)
+        return client, author, viewer
+
+    def _make_posts(self, author, viewer, n):
+        posts = [Post.objects.create(author=author, content=f"p{i}") for i in range(n)]
+        for p in posts[::2]:
+            PostLike.objects.create(user=viewer, post=p)
+            Bookmark.objects.create(user=viewer, post=p)
+        Repost.objects.create(user=viewer, original_post=posts[-1])
+        return posts
+
+    def test_list_flags_match_viewer_actions(self, ctx):
+        client, author, viewer = ctx
+        posts = self._make_posts(author, viewer, 3)
+
+        res = client.get(f"/api/v1/posts/?author_id={author.id}")
+        assert res.status_code == 200
+        by_id = {item["id"]: item for item in res.json()["results"]}
+        for i, p in enumerate(posts):
+            item = by_id[str(p.id)]
+            assert item["my_liked"] is (i % 2 == 0)
+            assert item["my_bookmarked"] is (i % 2 == 0)
+            assert item["my_reposted"] is (p == posts[-1])
+
+        one = client.get(f"/api/v1/posts/{posts[0].id}/").json()
+        assert (one["my_liked"], one["my_bookmarked"], one["my_reposted"]) == (True, True, False)
+
+    def test_list_query_count_does_not_grow_with_page_size(self, ctx):
+        client, author, viewer = ctx
+        self._make_posts(author, viewer, 2)
+        with CaptureQueriesContext(connection) as small:
+            assert client.get(f"/api/v1/posts/?author_id={author.id}").status_code == 200
+
+        self._make_posts(author, viewer, 8)
+        with CaptureQueriesContext(connection) as large:
+            res = client.get(f"/api/v1/posts/?author_id={author.id}")
+        assert len(res.json()["results"]) == 10
+        assert len(large.captured_queries) == len(small.captured_queries)
+
+    def test_bookmarks_and_feed_carry_viewer_state(self, ctx):
+        client, author, viewer = ctx
+        posts = self._make_posts(author, viewer, 3)
+        Follow.objects.create(follower=viewer, following=author)
+
+        marks = client.get("/api/v1/bookmarks/").json()
+        marks = marks["results"] if isinstance(marks, dict) else marks
+        assert {m["post_id"] for m in marks} == {str(posts[0].id), str(posts[2].id)}
+        assert all(m["my_liked"] for m in marks)
+
+        feed = {item["post_id"]: item for item in client.get("/api/v1/feed/following/?page=0&size=10").json()}
+        assert feed[str(posts[0].id)]["my_liked"] is True
+        assert feed[str(posts[1].id)]["my_liked"] is False
+        assert feed[str(posts[2].id)]["my_reposted"] is True
@@ -0,0 +1,70 @@
+"""
+뷰어 상태(내가 좋아요/북마크/리포스트 했는지) 일괄 조회.
+
+한 페이지의 포스트 id 에 대해 IN 쿼리 3번으로 끝낸다(포스트 수와 무관 → N+1 없음).
+write-behind 좋아요 모드(posts.like_buffer)에서는 Redis 집합이 최신 상태이므로 좋아요 여부는 파이프라인 1회로 읽고,
+워밍 전이라 모르는 포스트만 DB 로 보완한다.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Set
+
+import redis
+
+from . import like_buffer
+from .models import Bookmark, PostLike, Repost
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ViewerState:
+    liked: bool = False
+    bookmarked: bool = False
+    reposted: bool = False
+
+
+def _liked_ids(user_id, post_ids: List[str]) -> Set[str]:
+    unknown = post_ids
+    liked: Set[str] = set()
+    if like_buffer.enabled():
+        try:
+            states = like_buffer.liked_among(user_id, post_ids)
+            liked = {pid for pid, state in states.items() if state}
+            unknown = [pid for pid, state in states.items() if state is None]
+        except redis.RedisError as e:
+            log.warning("like buffer unavailable, resolving likes from DB: %s", e)
+    if unknown:
+        liked |= {str(pid) for pid in PostLike.objects.filter(user_id=user_id, post_id__in=unknown).values_list("post_id", flat=True)}
+    return liked
+
+
+def resolve(user, post_ids: Iterable) -> Dict[str, ViewerState]:
+    post_ids = list(dict.fromkeys(str(p) for p in post_ids))
+    if not post_ids or not getattr(user, "is_authenticated", False):
+        return {pid: ViewerState() for pid in post_ids}
+
+    liked = _liked_ids(user.id, post_ids)
+    bookmarked = {str(pid) for pid in Bookmark.objects.filter(user_id=user.id, post_id__in=post_ids).values_list("post_id", flat=True)}
+    reposted = {str(pid) for pid in Repost.objects.filter(user_id=user.id, original_post_id__in=post_ids).values_list("original_post_id", flat=True)}
+    return {pid: ViewerState(liked=pid in liked, bookmarked=pid in bookmarked, reposted=pid in reposted) for pid in post_ids}
+
+
+def attach(posts: Iterable, user) -> None:
+    """Post 인스턴스에 my_liked / my_bookmarked / my_reposted 속성을 붙인다(직렬화기에서 그대로 사용)."""
+    posts = list(posts)
+    states = resolve(user, (p.id for p in posts))
+    for p in posts:
+        s = states[str(p.id)]
+        p.my_liked, p.my_bookmarked, p.my_reposted = s.liked, s.bookmarked, s.reposted
+
+
+def annotate_rows(rows: List[Dict], user) -> List[Dict]:
+    """피드 행(dict, post_id 키)에 my_* 플래그를 덧붙인 새 리스트를 반환한다."""
+    states = resolve(user, (r["post_id"] for r in rows))
+    out = []
+    for r in rows:
+        s = states[str(r["post_id"])]
+        out.append({**r, "my_liked": s.liked, "my_bookmarked": s.bookmarked, "my_reposted": s.reposted})
+    return out
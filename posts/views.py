@@ -1,5 +1,7 @@
+import logging
 from uuid import UUID
 
+import redis
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import IntegrityError, transaction
 from django.db.models import Prefetch
@@ -16,11 +18,14 @@ from audits.services import write_audit_log
 from common.schema import ErrorOut
 from polls.models import Vote
 
+from . import like_buffer, viewer_state
 from .models import Bookmark, Post, PostLike, Repost
 from .paginations import PostCursorPagination
 from .serializers import BookmarkOut, PostCreateIn, PostDetailOut, PostOut, RepostOut
 from .services import create_post
 
+log = logging.getLogger(__name__)
+
 
 @extend_schema_view(
     create=extend_schema(
@@ -71,6 +76,27 @@ class PostViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.Lis
         """
         write_audit_log(action=action, user=self.request.user, target_type="post", target_id=str(post.id), request=self.request, extra=extra or {})
 
+    def _buffered_like(self, pk, like: bool):
+        """
+        POST_LIKE_WRITE_BEHIND 모드: Redis 집합만 갱신하고 즉시 응답(DB 반영은 posts.tasks.flush_post_likes).
+        Redis 장애 시 None 을 돌려 기존 DB 경로로 처리한다.
+        """
+        try:
+            changed = like_buffer.like(pk, self.request.user.id) if like else like_buffer.unlike(pk, self.request.user.id)
+        except redis.RedisError as e:
+            log.warning("like buffer unavailable, falling back to DB path: %s", e)
+            return None
+        if changed is None:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        if not changed:
+            if like:
+                return Response({"detail": "Already liked"}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({"detail": "Not liked"}, status=status.HTTP_404_NOT_FOUND)
+        write_audit_log(
+            action=AuditAction.CREATE_POST, user=self.request.user, target_type="post", target_id=str(pk), request=self.request, extra={"endpoint": "POST /api/v1/posts"}
+        )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     def _with_related(self, base_qs):
         qs = base_qs.select_related("poll").prefetch_related("assets", "poll__options")
         # 인증 사용자 기준으로 내 표만 붙여서 my_option_id 도출(비인증은 스킵)
@@ -120,6 +146,7 @@ class PostViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.Lis
 
     def retrieve(self, request, pk=None):
         post = get_object_or_404(self._with_related(self.get_queryset()), pk=pk)
+        viewer_state.attach([post], request.user)
         return Response(PostDetailOut(post).data, status=status.HTTP_200_OK)
 
     # ----- 타임라인(기본: 내 글, ?author_id=... 지원) -----
@@ -136,6 +163,8 @@ class PostViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.Lis
             qs = qs.filter(author_id=request.user.id)
 
         page = self.paginate_queryset(self._with_related(qs))
+        # 좋아요/북마크/리포스트 여부는 페이지 단위 IN 쿼리 3번으로 일괄 조회
+        viewer_state.attach(page, request.user)
         ser = PostDetailOut(page, many=True)
         return self.get_paginated_response(ser.data)
 
@@ -154,6 +183,10 @@ class PostViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.Lis
     )
     @action(detail=True, methods=["post"], url_path="like", permission_classes=[IsAuthenticated])
     def like(self, request, pk=None):
+        if like_buffer.enabled():
+            res = self._buffered_like(pk, like=True)
+            if res is not None:
+                return res
         post = get_object_or_404(Post, pk=pk)
         with transaction.atomic():
             try:
@@ -179,6 +212,10 @@ class PostViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.Lis
     )
     @like.mapping.delete
     def unlike(self, request, pk=None):
+        if like_buffer.enabled():
+            res = self._buffered_like(pk, like=False)
+            if res is not None:
+                return res
         post = get_object_or_404(Post, pk=pk)
         deleted, _ = PostLike.objects.filter(user=request.user, post=post).delete()
         if deleted == 0:
@@ -289,3 +326,11 @@ class BookmarkViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
 
     def get_queryset(self):
         return Bookmark.objects.filter(user=self.request.user).select_related("post").order_by("-created_at")
+
+    def list(self, request, *args, **kwargs):
+        qs = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(qs)
+        items = page if page is not None else list(qs)
+        viewer_state.attach([b.post for b in items], request.user)
+        ser = self.get_serializer(items, many=True)
+        return self.get_paginated_response(ser.data) if page is not None else Response(ser.data)
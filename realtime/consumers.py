@@ -1,3 +1,4 @@
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 
 from .groups import user_feed_group
@@ -11,6 +12,10 @@ class FeedConsumer(AsyncJsonWebsocketConsumer):
             f"user_feed_group(user_id)",
             {"type": "feed.update", "payload": {...}}
         )
+    같은 소켓에 인앱 알림도 다중화한다(notifications.broadcast):
+        서버→클라이언트 {"event": "notification.new", "data": {"items": [...], "cursor": "..."}}
+        재연결 후 클라이언트→서버 {"type": "notifications.resume", "cursor": "<마지막 cursor>"}
+            → 그 이후 변경분을 같은 이벤트로(data.has_more 가 true 면 받은 cursor 로 다시 요청)
     """
 
     async def connect(self):
@@ -30,7 +35,19 @@ class FeedConsumer(AsyncJsonWebsocketConsumer):
     async def receive_json(self, content, **kwargs):
         if content and content.get("type") == "ping":
             await self.send_json({"event": "pong"})
+        elif content and content.get("type") == "notifications.resume":
+            data = await self._notifications_since(content.get("cursor"))
+            await self.send_json({"event": "notification.new", "data": data})
+
+    @database_sync_to_async
+    def _notifications_since(self, cursor):
+        from notifications.broadcast import since
+
+        return since(self.user_id, cursor)
 
     async def feed_update(self, event):
         payload = event.get("payload") or {}
         await self.send_json({"event": "feed_update", "data": payload})
+
+    async def notification_new(self, event):
+        await self.send_json({"event": "notification.new", "data": event.get("payload") or {}})
@@ -0,0 +1,72 @@
+import pytest
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.tokens import AccessToken
+
+from notifications.models import Notification
+from veilgram.asgi import application
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.mark.asyncio
+class TestNotificationWebSocket:
+    @pytest.fixture(autouse=True)
+    def in_memory_channel_layer(self, settings):
+        settings.CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+        settings.PUSH_PROVIDER = "dummy"
+        settings.CELERY_TASK_ALWAYS_EAGER = True
+
+    @pytest.fixture
+    def user(self):
+        return get_user_model().objects.create()
+
+    async def _connect(self, user):
+        t = AccessToken()
+        t["user_id"] = str(user.id)
+        t["sub"] = str(user.id)
+        comm = WebsocketCommunicator(application, f"/ws/feed/?token={t}")
+        connected, _ = await comm.connect()
+        assert connected is True
+        return comm
+
+    async def test_new_notifications_arrive_batched_per_user(self, user):
+        from notifications.tasks import multi_user_push
+
+        comm = await self._connect(user)
+        items = [{"user_id": str(user.id), "type": "like", "title": "T", "body": f"B{i}", "data": {"i": i}} for i in range(2)]
+        await database_sync_to_async(multi_user_push)(items)
+
+        msg = await comm.receive_json_from(timeout=1)
+        assert msg["event"] == "notification.new"
+        assert sorted(item["payload"]["i"] for item in msg["data"]["items"]) == [0, 1]
+        assert msg["data"]["cursor"]
+        # 사용자당 메시지 1개
+        assert await comm.receive_nothing(timeout=0.1)
+        await comm.disconnect()
+
+    async def test_resume_from_cursor(self, user):
+        from notifications.tasks import single_user_push
+
+        comm = await self._connect(user)
+        await database_sync_to_async(single_user_push)(str(user.id), "like", "T", "B", {"i": 0})
+        first = await comm.receive_json_from(timeout=1)
+        await comm.disconnect()
+
+        # 끊겨 있는 동안 생긴 알림
+        for i in (1, 2):
+            await database_sync_to_async(single_user_push)(str(user.id), "like", "T", "B", {"i": i})
+
+        comm = await self._connect(user)
+        await comm.send_json_to({"type": "notifications.resume", "cursor": first["data"]["cursor"]})
+        msg = await comm.receive_json_from(timeout=1)
+        assert msg["event"] == "notification.new"
+        assert [item["payload"]["i"] for item in msg["data"]["items"]] == [1, 2]
+        assert msg["data"]["has_more"] is False
+
+        await comm.send_json_to({"type": "notifications.resume", "cursor": msg["data"]["cursor"]})
+        empty = await comm.receive_json_from(timeout=1)
+        assert empty["data"]["items"] == [] and empty["data"]["cursor"] == msg["data"]["cursor"]
+        assert await database_sync_to_async(Notification.objects.filter(user=user).count)() == 3
+        await comm.disconnect()
@@ -25,6 +25,8 @@ class RealtimeDocViewSet(viewsets.ViewSet):
             "핵심 규약은 `feed/consumers.py`에 근거합니다:\n"
             "- 연결 성공 조건: ASGI `scope['user_id']`가 있어야 합니다. 없으면 서버가 4401 코드로 바로 종료합니다.\n"
             "- 서버→클라이언트 이벤트: `feed_update` (payload는 `data` 필드에 그대로 전달)\n"
+            "- 서버→클라이언트 이벤트: `notification.new` (`data.items` 알림 목록, `data.cursor` 재연결용 위치)\n"
+            '- 클라이언트→서버 메시지: `{"type":"notifications.resume","cursor":"..."}` → cursor 이후 알림을 `notification.new` 로 응답\n'
             '- 클라이언트→서버 메시지: `{"type":"ping"}` 전송 시 `{"event":"pong"}` 응답\n'
         ),
         operation_id="realtime_feed_capabilities",
@@ -69,6 +71,13 @@ class RealtimeDocViewSet(viewsets.ViewSet):
                     "desc": "새 피드 항목 브로드캐스트",
                     "example": {"event": "feed_update", "data": {"post_id": "uuid", "author_id": "uuid"}},
                 },
+                {
+                    "type": "notification.new",
+                    "direction": "server->client",
+                    "desc": "새로 생기거나 갱신된 인앱 알림(사용자별 묶음)",
+                    "example": {"event": "notification.new", "data": {"items": [{"id": "uuid", "type": "like", "count": 3}], "cursor": "<cursor>"}},
+                },
+                {"type": "notifications.resume", "direction": "client->server", "example": {"type": "notifications.resume", "cursor": "<cursor>"}},
                 {"type": "ping", "direction": "client->server", "example": {"type": "ping"}},
                 {"type": "pong", "direction": "server->client", "example": {"event": "pong"}},
             ],
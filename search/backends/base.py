@@ -1,4 +1,13 @@
-from typing import Any, Dict, Iterable
+from typing import Any, Dict, Iterable, List
+
+# 종류별 검색 필드와 가중치: OpenSearch match boost 와 InMemory BM25 가 같은 값을 쓴다
+SEARCH_FIELDS: Dict[str, Dict[str, float]] = {
+    "user": {"nickname": 2.0, "status_message": 1.0},
+    "post": {"content": 2.5, "author_nickname": 1.0},
+    "hashtag": {"name": 3.0},
+}
+# edge 분석기(edge_ngram 필터) 최대 길이
+EDGE_NGRAM_MAX = 20
 
 
 class SearchBackend:
@@ -28,6 +37,14 @@ class SearchBackend:
         """Ensure indices exist (stub)."""
         ...
 
+    def bulk_write(self, ops: List[Dict[str, Any]], refresh: bool = False) -> List[Dict[str, Any]]:
+        """Apply buffered index/delete ops (search.indexing) in one bulk request; return ops to retry (stub)."""
+        ...
+
+    def update_post_counts(self, counts: Dict[str, Dict[str, int]]) -> None:
+        """Partially update engagement counters of indexed posts (stub)."""
+        ...
+
     # Searching
     def search_users(self, q: str, page: int, size: int) -> Dict[str, Any]:
         """Ensure indices exist (stub)."""
@@ -1,61 +1,275 @@
-from typing import Any, Dict, Iterable
+"""
+OpenSearch 가 꺼져 있거나 장애일 때 쓰는 프로세스 메모리 검색 엔진.
+
+- 토크나이저: 유니코드 단어 문자(한글 음절/영문/숫자/밑줄)의 연속을 토큰으로, 소문자화(standard + lowercase 근사).
+- 필드별 역색인: 토큰 → 포스팅(문서 번호 array('I'), 빈도 array('H')). 문서 번호는 색인 순서대로 붙는 정수.
+- 접두어: OpenSearch edge 분석기(edge_ngram 1~EDGE_NGRAM_MAX)는 토큰의 모든 접두어를 색인한다.
+  여기서는 접두어를 따로 저장하지 않고 정렬된 어휘 목록에서 이분 탐색으로 그 접두어로 시작하는 토큰들을 찾아
+  포스팅을 합친다(같은 매칭 결과, 메모리는 토큰 포스팅만큼). 질의어는 토큰 단위(EDGE_NGRAM_MAX 자까지)로 쓴다.
+  어휘 목록은 첫 검색 때 한 번 정렬하고, 이후 새 토큰은 작은 정렬 보조 목록에 넣었다가 VOCAB_MERGE 개가 쌓이면
+  본 목록에 병합한다(쓰기와 검색이 섞여도 검색마다 전체 어휘를 다시 정렬하지 않는다).
+- 점수: BM25(k1=1.2, b=0.75) 를 필드마다 계산해 SEARCH_FIELDS 가중치를 곱해 더한다(OpenSearch bool/should + match boost 와 같은 구성).
+- 삭제/재색인: 문서 번호를 죽은 것으로 표시하고 검색 때 건너뛴다. 죽은 문서가 산 문서보다 많아지면 포스팅을 다시 만든다.
+"""
+
+import heapq
+import math
+import re
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+from .base import EDGE_NGRAM_MAX, SEARCH_FIELDS
+
+TOKEN_RE = re.compile(r"\w+")
+K1, B = 1.2, 0.75
+COMPACT_MIN_DEAD = 1024
+VOCAB_MERGE = 4096  # 어휘 보조 목록이 이만큼 쌓이면 본 목록에 병합
+
+
+def tokenize(text: Any) -> List[str]:
+    if not text:
+        return []
+    if isinstance(text, (list, tuple)):
+        text = " ".join(map(str, text))
+    return TOKEN_RE.findall(str(text).lower())
+
+
+class FieldIndex:
+    """한 필드의 역색인. 문서 번호는 _Index 가 관리한다."""
+
+    def __init__(self):
+        self.postings: Dict[str, tuple] = {}  # token → (array('I') 문서 번호, array('H') 빈도)
+        self.lengths = array("H")  # 문서 번호 → 토큰 수
+        self.total_len = 0  # 산 문서의 토큰 수 합(avgdl)
+        self._vocab: Optional[List[str]] = None  # 정렬된 어휘(첫 검색 때 만듦)
+        self._fresh: List[str] = []  # 어휘를 만든 뒤 생긴 새 토큰(정렬 유지)
+
+    def add(self, doc: int, text: Any) -> None:
+        tokens = tokenize(text)
+        self.lengths.append(min(len(tokens), 0xFFFF))
+        self.total_len += len(tokens)
+        for token, tf in Counter(tokens).items():
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = (array("I"), array("H"))
+                if self._vocab is not None:
+                    insort(self._fresh, token)
+            posting[0].append(doc)
+            posting[1].append(min(tf, 0xFFFF))
+
+    def forget(self, doc: int) -> None:
+        # 포스팅은 그대로 두고(검색 때 live 로 거름) 길이 합만 뺀다
+        self.total_len -= self.lengths[doc]
+
+    def _merge(self) -> None:
+        # 정렬된 두 목록 병합: 보조 목록 토큰마다 자리를 이분 탐색하고 그 사이 구간은 슬라이스로 복사
+        vocab, out, prev = self._vocab, [], 0
+        for token in self._fresh:
+            i = bisect_left(vocab, token, prev)
+            out += vocab[prev:i]
+            out.append(token)
+            prev = i
+        out += vocab[prev:]
+        self._vocab, self._fresh = out, []
+
+    def expand(self, prefix: str) -> List[str]:
+        if self._vocab is None:
+            self._vocab = sorted(self.postings)
+        elif len(self._fresh) >= VOCAB_MERGE:
+            self._merge()
+        out = []
+        for vocab in (self._vocab, self._fresh):
+            for i in range(bisect_left(vocab, prefix), len(vocab)):
+                if not vocab[i].startswith(prefix):
+                    break
+                out.append(vocab[i])
+        return out
+
+    def term_freqs(self, prefix: str, live: Optional[bytearray]) -> Dict[int, int]:
+        """prefix 로 시작하는 토큰들의 문서별 빈도 합(= edge_ngram 토큰 prefix 의 빈도). live 가 None 이면 죽은 문서 없음."""
+        tokens = self.expand(prefix)
+        if len(tokens) == 1 and live is None:
+            docs, tfs = self.postings[tokens[0]]
+            return dict(zip(docs, tfs, strict=True))
+        acc: Dict[int, int] = {}
+        get = acc.get
+        for token in tokens:
+            docs, tfs = self.postings[token]
+            if live is None:
+                for d, tf in zip(docs, tfs, strict=True):
+                    acc[d] = get(d, 0) + tf
+            else:
+                for d, tf in zip(docs, tfs, strict=True):
+                    if live[d]:
+                        acc[d] = get(d, 0) + tf
+        return acc
+
+
+class _Index:
+    def __init__(self, key: str, boosts: Dict[str, float]):
+        self.key = key
+        self.boosts = boosts
+        self.clear()
+
+    def clear(self) -> None:
+        self.sources: List[Optional[Dict[str, Any]]] = []
+        self.ids: Dict[str, int] = {}
+        self.live = bytearray()
+        self.dead = 0
+        self.fields = {f: FieldIndex() for f in self.boosts}
+
+    # 이전 dict 저장소와 같은 조회 인터페이스(len / in / [key])
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, key: str) -> bool:
+        return str(key) in self.ids
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        return self.sources[self.ids[str(key)]]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        doc = self.ids.get(key)
+        return None if doc is None else self.sources[doc]
+
+    def put(self, source: Dict[str, Any]) -> None:
+        key = str(source[self.key])
+        self.remove(key)
+        doc = len(self.sources)
+        self.sources.append(source)
+        self.live.append(1)
+        self.ids[key] = doc
+        for f, fi in self.fields.items():
+            fi.add(doc, source.get(f))
+
+    def remove(self, key: str) -> None:
+        doc = self.ids.pop(str(key), None)
+        if doc is None:
+            return
+        self.live[doc] = 0
+        self.sources[doc] = None
+        self.dead += 1
+        for fi in self.fields.values():
+            fi.forget(doc)
+        if self.dead > max(COMPACT_MIN_DEAD, len(self.ids)):
+            self._compact()
+
+    def _compact(self) -> None:
+        sources = [s for s in self.sources if s is not None]
+        self.clear()
+        for s in sources:
+            self.put(s)
+
+    def search(self, q: str, page: int, size: int) -> Dict[str, Any]:
+        terms = list(dict.fromkeys(t[:EDGE_NGRAM_MAX] for t in tokenize(q)))
+        n = len(self.ids)
+        live = self.live if self.dead else None
+        scores: Dict[int, float] = {}
+        for f, boost in self.boosts.items():
+            fi = self.fields[f]
+            avgdl = fi.total_len / n if n else 0.0
+            lengths = fi.lengths
+            for term in terms:
+                tfs = fi.term_freqs(term, live)
+                if not tfs:
+                    continue
+                df = len(tfs)
+                idf = boost * math.log(1 + (n - df + 0.5) / (df + 0.5))
+                for d, tf in tfs.items():
+                    norm = K1 * (1 - B + B * lengths[d] / avgdl) if avgdl else K1
+                    scores[d] = scores.get(d, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+
+        start = (page - 1) * size
+        # 점수 내림차순, 같으면 먼저 색인된 문서 먼저
+        top = heapq.nsmallest(start + size, scores.items(), key=lambda kv: (-kv[1], kv[0]))[start:]
+        return {"hits": {"total": {"value": len(scores)}, "hits": [{"_source": self.sources[d], "_score": s} for d, s in top]}}
 
 
 class InMemoryBackend:
     def __init__(self):
-        self.users, self.posts, self.tags = {}, {}, {}
+        self._lock = threading.RLock()
+        self.users = _Index("id", SEARCH_FIELDS["user"])
+        self.posts = _Index("id", SEARCH_FIELDS["post"])
+        self.tags = _Index("name", SEARCH_FIELDS["hashtag"])
 
     def ensure_indices(self) -> None:
         """Ensure indices exist (stub)."""
         ...
 
     def drop_indices(self):
-        self.users.clear()
-        self.posts.clear()
-        self.tags.clear()
+        with self._lock:
+            self.users.clear()
+            self.posts.clear()
+            self.tags.clear()
 
     # Indexing
     def index_user(self, doc: Dict[str, Any]) -> None:
-        self.users[doc["id"]] = doc
+        with self._lock:
+            self.users.put(doc)
 
     def index_post(self, doc: Dict[str, Any]) -> None:
-        self.posts[doc["id"]] = doc
+        with self._lock:
+            self.posts.put(doc)
 
     def index_hashtag(self, doc: Dict[str, Any]) -> None:
-        self.tags[doc["name"]] = doc
+        with self._lock:
+            self.tags.put(doc)
 
     def bulk_index(self, kind: str, docs: Iterable[Dict[str, Any]]) -> None:
-        for d in docs:
-            if kind == "user":
-                self.index_user(d)
-            elif kind == "post":
-                self.index_post(d)
-            else:
-                self.index_hashtag(d)
+        index = {"user": self.users, "post": self.posts}.get(kind, self.tags)
+        with self._lock:
+            for d in docs:
+                index.put(d)
 
-    # Searching
-    def _find(self, store, q, page, size, keys):
-        ql = (q or "").lower()
-        rows = [v for v in store.values() if any(ql in str(v.get(k, "")).lower() for k in keys)]
-        total = len(rows)
-        start = (page - 1) * size
-        end = start + size
-        return {"hits": {"total": {"value": total}, "hits": [{"_source": s} for s in rows[start:end]]}}
+    def bulk_write(self, ops: List[Dict[str, Any]], refresh: bool = False) -> List[Dict[str, Any]]:
+        # 메모리 색인은 즉시 보이므로 refresh 는 의미 없음, 실패(재시도 대상)도 없다
+        indexes = {"user": self.users, "post": self.posts, "hashtag": self.tags}
+        with self._lock:
+            for op in ops:
+                index = indexes[op["kind"]]
+                if op["op"] == "delete":
+                    index.remove(op["key"])
+                elif op["op"] == "update":
+                    # 카운터 같은 비검색 필드만 부분 갱신(없는 문서는 무시)
+                    doc = index.get(op["key"])
+                    if doc is not None:
+                        doc.update(op["doc"])
+                else:
+                    index.put(op["doc"])
+        return []
 
+    def update_post_counts(self, counts: Dict[str, Dict[str, int]]) -> None:
+        # 카운터는 검색 필드가 아니므로 원본만 갱신(재색인 없음)
+        with self._lock:
+            for post_id, fields in counts.items():
+                doc = self.posts.get(post_id)
+                if doc is not None:
+                    doc.update(fields)
+
+    # Searching
     def search_users(self, q, page, size):
-        return self._find(self.users, q, page, size, ["nickname", "status_message"])
+        with self._lock:
+            return self.users.search(q, page, size)
 
     def search_posts(self, q, page, size):
-        return self._find(self.posts, q, page, size, ["content", "author_nickname", "hashtags"])
+        with self._lock:
+            return self.posts.search(q, page, size)
 
     def search_hashtags(self, q, page, size):
-        return self._find(self.tags, q, page, size, ["name"])
+        with self._lock:
+            return self.tags.search(q, page, size)
 
     def delete_user(self, user_id: str) -> None:
-        self.users.pop(user_id, None)
+        with self._lock:
+            self.users.remove(user_id)
 
     def delete_post(self, post_id: str) -> None:
-        self.posts.pop(post_id, None)
+        with self._lock:
+            self.posts.remove(post_id)
 
     def delete_hashtag(self, name: str) -> None:
-        self.tags.pop(name, None)
+        with self._lock:
+            self.tags.remove(name)
@@ -1,7 +1,12 @@
-from typing import Any, Dict, Iterable
+import logging
+from typing import Any, Dict, Iterable, List
 
 from django.conf import settings
 
+from .base import EDGE_NGRAM_MAX, SEARCH_FIELDS
+
+log = logging.getLogger(__name__)
+
 
 class OpenSearchBackend:
     def __init__(self):
@@ -14,6 +19,10 @@ class OpenSearchBackend:
         self.client = OpenSearch(hosts=conf["HOSTS"], http_auth=auth, timeout=conf["TIMEOUT"], retries=2)
         self.prefix = conf["INDEX_PREFIX"]
         self.use_nori = conf["USE_NORI"]
+        # 색인 반영은 refresh_interval 에 맡긴다(요청마다 refresh=wait_for 를 걸지 않음)
+        self.refresh_interval = conf.get("REFRESH_INTERVAL", "1s")
+        self.bulk_chunk = conf.get("BULK_CHUNK_SIZE", 500)
+        self.bulk_threads = conf.get("BULK_THREADS", 1)
 
     # index names
     @property
@@ -32,19 +41,21 @@ class OpenSearchBackend:
         # nori 사용 시 토글 (운영 클러스터 플러그인 상태와 일치시켜야 함)
         if self.use_nori:
             return {
+                "refresh_interval": self.refresh_interval,
                 "analysis": {
                     "analyzer": {
                         "kr": {"type": "custom", "tokenizer": "nori_tokenizer"},
                         "edge": {"type": "custom", "tokenizer": "standard", "filter": ["lowercase", "edge_ngram"]},
                     },
-                    "filter": {"edge_ngram": {"type": "edge_ngram", "min_gram": 1, "max_gram": 20}},
-                }
+                    "filter": {"edge_ngram": {"type": "edge_ngram", "min_gram": 1, "max_gram": EDGE_NGRAM_MAX}},
+                },
             }
         return {
+            "refresh_interval": self.refresh_interval,
             "analysis": {
                 "analyzer": {"edge": {"type": "custom", "tokenizer": "standard", "filter": ["lowercase", "edge_ngram"]}},
-                "filter": {"edge_ngram": {"type": "edge_ngram", "min_gram": 1, "max_gram": 20}},
-            }
+                "filter": {"edge_ngram": {"type": "edge_ngram", "min_gram": 1, "max_gram": EDGE_NGRAM_MAX}},
+            },
         }
 
     def _create_index(self, name: str, body: Dict[str, Any]):
@@ -79,6 +90,8 @@ class OpenSearchBackend:
                         "hashtags": {"type": "keyword"},
                         "created_at": {"type": "date"},
                         "like_count": {"type": "integer"},
+                        "comment_count": {"type": "integer"},
+                        "repost_count": {"type": "integer"},
                     }
                 },
             },
@@ -93,44 +106,96 @@ class OpenSearchBackend:
                 self.client.indices.delete(index=idx)
 
     # Indexing
-    def index_user(self, doc: Dict[str, Any]) -> None:
-        self.client.index(index=self.idx_users, id=doc["id"], body=doc, refresh="wait_for")
+    # refresh=True: 검색에 보일 때까지 기다린다(read-your-writes). 기본은 refresh_interval 에 맡김
+    def _refresh(self, refresh: bool):
+        return "wait_for" if refresh else False
+
+    def _index_of(self, kind: str) -> str:
+        return {"user": self.idx_users, "post": self.idx_posts, "hashtag": self.idx_tags}[kind]
+
+    def index_user(self, doc: Dict[str, Any], refresh: bool = False) -> None:
+        self.client.index(index=self.idx_users, id=doc["id"], body=doc, refresh=self._refresh(refresh))
+
+    def index_post(self, doc: Dict[str, Any], refresh: bool = False) -> None:
+        self.client.index(index=self.idx_posts, id=doc["id"], body=doc, refresh=self._refresh(refresh))
 
-    def index_post(self, doc: Dict[str, Any]) -> None:
-        self.client.index(index=self.idx_posts, id=doc["id"], body=doc, refresh="wait_for")
+    def index_hashtag(self, doc: Dict[str, Any], refresh: bool = False) -> None:
+        self.client.index(index=self.idx_tags, id=doc["name"], body=doc, refresh=self._refresh(refresh))
 
-    def index_hashtag(self, doc: Dict[str, Any]) -> None:
-        self.client.index(index=self.idx_tags, id=doc["name"], body=doc, refresh="wait_for")
+    def _stream(self, actions, **kwargs):
+        # (ok, item) 을 액션 순서대로. BULK_THREADS > 1 이면 청크를 여러 스레드로 동시에 보낸다
+        if self.bulk_threads > 1:
+            return self._helpers.parallel_bulk(self.client, actions, thread_count=self.bulk_threads, chunk_size=self.bulk_chunk, raise_on_error=False, **kwargs)
+        return self._helpers.streaming_bulk(self.client, actions, chunk_size=self.bulk_chunk, raise_on_error=False, **kwargs)
 
     def bulk_index(self, kind: str, docs: Iterable[Dict[str, Any]]) -> None:
-        idx = {"user": self.idx_users, "post": self.idx_posts, "hashtag": self.idx_tags}[kind]
+        # 재색인: 청크마다 refresh 를 기다리지 않고 끝에 한 번만 refresh
+        idx = self._index_of(kind)
         actions = ({"_op_type": "index", "_index": idx, "_id": d.get("id") or d.get("name"), "_source": d} for d in docs)
-        self._helpers.bulk(self.client, actions, refresh="wait_for")
+        for ok, item in self._stream(actions):
+            if not ok:
+                raise RuntimeError(f"bulk index into {idx} failed: {item}")
+        self.client.indices.refresh(index=idx)
+
+    def bulk_write(self, ops: List[Dict[str, Any]], refresh: bool = False) -> List[Dict[str, Any]]:
+        """
+        search.indexing 버퍼의 색인/부분 갱신/삭제 연산을 bulk 로 보낸다(한 bulk 안에서 같은 문서 연산은 1개).
+        반환값: 다시 시도할 연산(429/5xx). 없는 문서의 삭제/부분 갱신(404)은 성공으로, 그 밖의 실패(매핑 오류 등)는 로그만 남기고 버린다.
+        """
+        by_target = {}
+        actions = []
+        for op in ops:
+            idx = self._index_of(op["kind"])
+            by_target[(idx, op["key"])] = op
+            if op["op"] == "delete":
+                actions.append({"_op_type": "delete", "_index": idx, "_id": op["key"]})
+            elif op["op"] == "update":
+                actions.append({"_op_type": "update", "_index": idx, "_id": op["key"], "doc": op["doc"]})
+            else:
+                actions.append({"_op_type": "index", "_index": idx, "_id": op["key"], "_source": op["doc"]})
+        retry = []
+        kwargs = {"refresh": "wait_for"} if refresh else {}
+        for ok, item in self._stream(actions, **kwargs):
+            if ok:
+                continue
+            ((op_type, info),) = item.items()
+            status = info.get("status", 0)
+            if op_type in ("delete", "update") and status == 404:
+                continue
+            if status == 429 or status >= 500:
+                retry.append(by_target[(info.get("_index"), str(info.get("_id")))])
+            else:
+                log.error("search bulk %s %s/%s dropped: %s", op_type, info.get("_index"), info.get("_id"), info.get("error"))
+        return retry
+
+    def update_post_counts(self, counts: Dict[str, Dict[str, int]]) -> None:
+        # 카운터만 부분 갱신(doc update). 아직 색인되지 않은 문서(404)는 무시하고, 검색 노출용이라 refresh 는 기다리지 않는다.
+        # 서비스 경로는 search.indexing 버퍼를 거친다(대기 중인 색인 연산과 순서를 맞추기 위해)
+        self.bulk_write([{"op": "update", "kind": "post", "key": pid, "doc": fields} for pid, fields in counts.items()])
 
     # Searching
-    def _search(self, index: str, q: str, page: int, size: int, fields: list, boosts=None):
-        boosts = boosts or {}
+    def _search(self, index: str, q: str, page: int, size: int, boosts: Dict[str, float]):
         body = {
-            "query": {"bool": {"should": [{"match": {f: {"query": q, "boost": boosts.get(f, 1.0)}}} for f in fields], "minimum_should_match": 1}},
+            "query": {"bool": {"should": [{"match": {f: {"query": q, "boost": boost}}} for f, boost in boosts.items()], "minimum_should_match": 1}},
             "from": (page - 1) * size,
             "size": size,
         }
         return self.client.search(index=index, body=body)
 
     def search_users(self, q, page, size):
-        return self._search(self.idx_users, q, page, size, ["nickname", "status_message"], {"nickname": 2.0})
+        return self._search(self.idx_users, q, page, size, SEARCH_FIELDS["user"])
 
     def search_posts(self, q, page, size):
-        return self._search(self.idx_posts, q, page, size, ["content", "author_nickname"], {"content": 2.5})
+        return self._search(self.idx_posts, q, page, size, SEARCH_FIELDS["post"])
 
     def search_hashtags(self, q, page, size):
-        return self._search(self.idx_tags, q, page, size, ["name"], {"name": 3.0})
+        return self._search(self.idx_tags, q, page, size, SEARCH_FIELDS["hashtag"])
 
-    def delete_user(self, user_id: str) -> None:
-        self.client.delete(index=self.idx_users, id=user_id, ignore=[404], refresh="wait_for")
+    def delete_user(self, user_id: str, refresh: bool = False) -> None:
+        self.client.delete(index=self.idx_users, id=user_id, ignore=[404], refresh=self._refresh(refresh))
 
-    def delete_post(self, post_id: str) -> None:
-        self.client.delete(index=self.idx_posts, id=post_id, ignore=[404], refresh="wait_for")
+    def delete_post(self, post_id: str, refresh: bool = False) -> None:
+        self.client.delete(index=self.idx_posts, id=post_id, ignore=[404], refresh=self._refresh(refresh))
 
-    def delete_hashtag(self, name: str) -> None:
-        self.client.delete(index=self.idx_tags, id=name, ignore=[404], refresh="wait_for")
+    def delete_hashtag(self, name: str, refresh: bool = False) -> None:
+        self.client.delete(index=self.idx_tags, id=name, ignore=[404], refresh=self._refresh(refresh))
@@ -36,9 +36,7 @@ def dispatch(evt: Dict[str, Any]) -> None:
 
     elif t == "HashtagsExtracted":
         # 여러 태그가 올 수도 있음
-        tags = _list(p.get("hashtags", []))
-        for name in tags:
-            services.index_hashtag(name=name, post_count=int(p.get("post_count", 0)))
+        services.index_hashtags(_list(p.get("hashtags", [])), post_count=int(p.get("post_count", 0)))
 
     elif t in ("UserCreated", "UserUpdated"):
         services.index_user(
@@ -0,0 +1,301 @@
+"""
+검색 색인 쓰기 버퍼(문서 하나마다 refresh=wait_for 요청 → 모아서 bulk 한 번).
+
+- 쓰기: services.index_* / delete_* 는 연산을 Redis 해시 search:index:ops 에 "kind|key" → JSON 으로 넣고
+  dirty 집합에 키를 남긴다. 같은 문서의 연산은 마지막 것만 남는다(색인 후 삭제 → 삭제 1건).
+- 카운터: services.update_post_counts 도 같은 버퍼를 거친다. 값(절대값)은 별도 해시 search:index:counts 에 두고
+  꺼낼 때 대기 중인 색인 연산의 문서에 합치거나(색인 시점의 like_count=0 이 최신 카운트를 덮지 않게),
+  색인 연산이 없으면 부분 갱신(update)으로 보낸다. 삭제 연산이 있으면 버린다.
+- 반영: flush() 가 주기적으로(SEARCH_INDEX_FLUSH_SEC) 또는 대기 문서가 SEARCH_INDEX_FLUSH_SIZE 를 넘으면
+  dirty 키를 꺼내 backend.bulk_write 로 한 번에 보낸다. refresh 는 인덱스의 refresh_interval 에 맡긴다.
+  꺼내기부터 bulk 전송까지 Redis 락(search:index:flush-lock)을 잡아 flush 는 한 번에 하나만 돈다
+  → 같은 문서의 이전 연산이 나중 연산 뒤에 도착하지 않는다. 락을 못 잡은 flush 는 그냥 끝난다(다음 주기에 이어감).
+- 일시 오류(429/5xx, 연결 실패)는 다시 버퍼에 넣는다. 그 사이 들어온 새 연산이 있으면 새 연산을 남긴다(HSETNX).
+- read-your-writes: refresh=True 로 호출하면 같은 락을 잡고(진행 중인 flush 가 끝나기를 기다림) 바로 쓰고 refresh 까지 기다린다.
+  쓰기 전에 대기 중이던 같은 문서의 연산은 쓰기가 끝난 뒤 버린다(그 사이 새로 들어온 연산은 남김).
+  쓰기가 실패하거나 일시 오류로 돌아온 연산은 버퍼에 되돌린다. 락을 SEARCH_INDEX_FLUSH_LOCK_WAIT_SEC 안에 못 잡으면 버퍼에 넣는다(순서 우선).
+- SEARCH_INDEX_BUFFERED=False(기본: OpenSearch 꺼짐) 이거나 Redis 장애 시에는 바로 쓴다(refresh 없이).
+  실패한 연산은 버퍼에 넣고 flush 작업을 예약한다(버퍼도 못 쓰면 오류를 그대로 올린다).
+"""
+
+import json
+import logging
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import redis
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+log = logging.getLogger(__name__)
+
+KEY_FIELDS = {"user": "id", "post": "id", "hashtag": "name"}
+
+Op = Dict[str, Any]  # {"op": "index"|"update"|"delete", "kind": "post", "key": "...", "doc": {...}}
+
+
+def index_op(kind: str, doc: Dict[str, Any]) -> Op:
+    return {"op": "index", "kind": kind, "key": str(doc[KEY_FIELDS[kind]]), "doc": doc}
+
+
+def update_op(kind: str, key, fields: Dict[str, Any]) -> Op:
+    return {"op": "update", "kind": kind, "key": str(key), "doc": fields}
+
+
+def delete_op(kind: str, key) -> Op:
+    return {"op": "delete", "kind": kind, "key": str(key)}
+
+
+def _field(op: Op) -> str:
+    return f"{op['kind']}|{op['key']}"
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, cls=DjangoJSONEncoder)
+
+
+class IndexBuffer:
+    OPS = "search:index:ops"
+    COUNTS = "search:index:counts"
+    DIRTY = "search:index:dirty"
+    SCHEDULED = "search:index:flush-scheduled"
+    LOCK = "search:index:flush-lock"
+
+    def __init__(self, url: str):
+        self.r = redis.Redis.from_url(url, decode_responses=True)
+
+    def _store(self, pipe, op: Op, nx: bool = False) -> None:
+        # update 는 필드 값만 counts 해시에, 나머지는 연산 전체를 ops 해시에
+        name, value = (self.COUNTS, _dumps(op["doc"])) if op["op"] == "update" else (self.OPS, _dumps(op))
+        (pipe.hsetnx if nx else pipe.hset)(name, _field(op), value)
+        pipe.sadd(self.DIRTY, _field(op))
+
+    def push(self, ops: List[Op]) -> int:
+        """연산을 넣고 대기 문서 수를 돌려준다."""
+        pipe = self.r.pipeline(transaction=False)
+        for op in ops:
+            self._store(pipe, op)
+        pipe.scard(self.DIRTY)
+        return int(pipe.execute()[-1])
+
+    def requeue(self, ops: List[Op]) -> None:
+        # 실패한 연산을 되돌린다. 같은 문서에 새 연산이 이미 들어와 있으면 그쪽이 이긴다
+        pipe = self.r.pipeline(transaction=False)
+        for op in ops:
+            self._store(pipe, op, nx=True)
+        pipe.execute()
+
+    def peek(self, ops: List[Op]) -> List[Optional[str]]:
+        # 같은 문서의 대기 중인 색인/삭제 연산(원문). 나중에 discard 에서 그대로인지 비교한다
+        return self.r.hmget(self.OPS, [_field(op) for op in ops])
+
+    def discard(self, ops: List[Op], seen: List[Optional[str]]) -> None:
+        """
+        peek 로 본 대기 색인/삭제 연산 중 아직 그대로인 것만 버린다(그 사이 들어온 새 연산은 남김).
+        카운터는 남겨 다음 flush 에서 부분 갱신으로 나간다.
+        """
+        fields = [_field(op) for op, raw in zip(ops, seen, strict=True) if raw is not None]
+        expected = [raw for raw in seen if raw is not None]
+        if not fields:
+            return
+        with self.r.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(self.OPS)
+                    current = pipe.hmget(self.OPS, fields)
+                    stale = [f for f, now, raw in zip(fields, current, expected, strict=True) if now == raw]
+                    pipe.multi()
+                    if stale:
+                        pipe.hdel(self.OPS, *stale)
+                    pipe.execute()
+                    return
+                except redis.WatchError:
+                    continue
+
+    def drain(self, limit: int) -> List[Op]:
+        fields = self.r.spop(self.DIRTY, limit) or []
+        if not fields:
+            return []
+        # HMGET + HDEL 을 MULTI 로 묶는다. SPOP 이후 같은 문서에 들어온 연산은 여기서 함께 읽히거나
+        # (dirty 재등록 → 다음 drain 에서 빈 값으로 건너뜀) 해시에 남아 다음 drain 에서 나간다.
+        pipe = self.r.pipeline(transaction=True)
+        pipe.hmget(self.OPS, fields)
+        pipe.hmget(self.COUNTS, fields)
+        pipe.hdel(self.OPS, *fields)
+        pipe.hdel(self.COUNTS, *fields)
+        raw_ops, raw_counts, _, _ = pipe.execute()
+        out: List[Op] = []
+        for field, raw_op, raw_count in zip(fields, raw_ops, raw_counts, strict=True):
+            op = json.loads(raw_op) if raw_op else None
+            counts = json.loads(raw_count) if raw_count else None
+            if op is None and counts is not None:
+                kind, key = field.split("|", 1)
+                op = update_op(kind, key, counts)
+            elif op is not None and op["op"] == "index" and counts:
+                op["doc"].update(counts)
+            if op is not None:
+                out.append(op)
+        return out
+
+    def pending(self) -> int:
+        return int(self.r.scard(self.DIRTY))
+
+    def acquire(self, wait: float = 0) -> Optional[str]:
+        """
+        꺼내기 ~ bulk 전송을 감싸는 락(SET NX PX + 토큰). wait 초까지 재시도, 못 잡으면 None.
+        보유 시간(SEARCH_INDEX_FLUSH_LOCK_SEC)은 bulk 최대 소요보다 넉넉히 잡는다.
+        """
+        token = uuid.uuid4().hex
+        ttl_ms = int(getattr(settings, "SEARCH_INDEX_FLUSH_LOCK_SEC", 60) * 1000)
+        deadline = time.monotonic() + wait
+        while True:
+            if self.r.set(self.LOCK, token, nx=True, px=ttl_ms):
+                return token
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.05)
+
+    def release(self, token: str) -> bool:
+        # 내가 잡은 락일 때만 지운다(만료 후 다른 flush 가 잡은 락은 두고)
+        with self.r.pipeline() as pipe:
+            try:
+                pipe.watch(self.LOCK)
+                if pipe.get(self.LOCK) != token:
+                    pipe.unwatch()
+                    return False
+                pipe.multi()
+                pipe.delete(self.LOCK)
+                pipe.execute()
+                return True
+            except redis.WatchError:
+                return False
+
+    def schedule_once(self, ttl: float) -> bool:
+        # 크기 초과로 flush 를 예약하는 것은 flush 한 번이 시작될 때까지 1번만
+        return bool(self.r.set(self.SCHEDULED, 1, nx=True, px=max(1, int(ttl * 1000))))
+
+    def clear_scheduled(self) -> None:
+        self.r.delete(self.SCHEDULED)
+
+
+_buffer = IndexBuffer(settings.REDIS_URL)
+
+
+def _backend():
+    from .services import backend
+
+    return backend()
+
+
+def _write(ops: List[Op], refresh: bool = False) -> None:
+    # 버퍼를 거치지 않는 직접 쓰기. 실패한 연산은 버퍼에 넣고 flush 작업이 다시 시도하게 한다
+    try:
+        failed = _backend().bulk_write(ops, refresh=refresh)
+    except Exception as e:
+        log.warning("search bulk write of %s ops failed: %s", len(ops), e)
+        _park(ops, e)
+        return
+    if failed:
+        log.warning("search bulk write: %s of %s ops failed", len(failed), len(ops))
+        _park(failed)
+
+
+def _park(ops: List[Op], error: Optional[Exception] = None) -> None:
+    try:
+        _buffer.requeue(ops)
+    except redis.RedisError as e:
+        log.error("search index buffer unavailable, dropping %s failed ops: %s", len(ops), e)
+        if error is not None:
+            raise error from e
+        return
+    from .tasks import flush_search_index
+
+    flush_search_index.delay()
+
+
+def _release(token: str) -> None:
+    if not _buffer.release(token):
+        # 보유 시간 초과로 이미 풀림(다른 flush 가 잡았을 수 있음)
+        log.warning("search index flush lock expired before release")
+
+
+def _push(ops: List[Op]) -> None:
+    pending = _buffer.push(ops)
+    if pending >= getattr(settings, "SEARCH_INDEX_FLUSH_SIZE", 500) and _buffer.schedule_once(getattr(settings, "SEARCH_INDEX_FLUSH_SEC", 1.0)):
+        from .tasks import flush_search_index
+
+        flush_search_index.delay()
+
+
+def _write_through(ops: List[Op]) -> None:
+    token = _buffer.acquire(wait=getattr(settings, "SEARCH_INDEX_FLUSH_LOCK_WAIT_SEC", 5))
+    if token is None:
+        log.warning("search index flush lock busy, buffering %s refresh ops", len(ops))
+        _push(ops)
+        return
+    try:
+        seen = _buffer.peek(ops)
+        retry = ops
+        try:
+            retry = _backend().bulk_write(ops, refresh=True)
+        except Exception as e:
+            log.warning("search refresh write of %s ops failed, buffering: %s", len(ops), e)
+        # 쓰기 전에 대기 중이던 연산은 이번 연산이 대신한다. 실패한 연산은 버퍼로(그 사이 들어온 새 연산이 이긴다)
+        _buffer.discard(ops, seen)
+        if retry:
+            if retry is not ops:
+                log.warning("search bulk write: requeue %s of %s refresh ops", len(retry), len(ops))
+            _buffer.requeue(retry)
+    finally:
+        _release(token)
+
+
+def submit(ops: List[Op], *, refresh: bool = False) -> None:
+    if not ops:
+        return
+    if getattr(settings, "SEARCH_INDEX_BUFFERED", False):
+        try:
+            if refresh:
+                _write_through(ops)
+            else:
+                _push(ops)
+            return
+        except redis.RedisError as e:
+            log.warning("search index buffer unavailable, writing directly: %s", e)
+    _write(ops, refresh=refresh)
+
+
+def flush(limit: Optional[int] = None, max_batches: Optional[int] = None) -> int:
+    """
+    대기 연산을 limit 개씩 bulk 로 보낸다. 버퍼가 비거나 max_batches 번 보내면 멈춘다.
+    다른 flush(또는 refresh 쓰기)가 락을 잡고 있으면 아무것도 하지 않는다.
+    반환값: 보낸 연산 수
+    """
+    limit = max(1, limit or getattr(settings, "SEARCH_INDEX_FLUSH_SIZE", 500))
+    max_batches = max_batches or getattr(settings, "SEARCH_INDEX_FLUSH_MAX_BATCHES", 20)
+    _buffer.clear_scheduled()
+    token = _buffer.acquire()
+    if token is None:
+        return 0
+    sent = 0
+    try:
+        for _ in range(max_batches):
+            ops = _buffer.drain(limit)
+            if not ops:
+                break
+            try:
+                retry = _backend().bulk_write(ops)
+            except Exception:
+                # 전송 자체가 실패하면 배치 전체를 되돌리고 다음 주기에 재시도
+                _buffer.requeue(ops)
+                raise
+            if retry:
+                log.warning("search bulk write: requeue %s of %s ops", len(retry), len(ops))
+                _buffer.requeue(retry)
+            sent += len(ops) - len(retry)
+            if len(ops) < limit or retry:
+                break
+    finally:
+        _release(token)
+    return sent
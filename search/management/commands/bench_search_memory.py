@@ -0,0 +1,103 @@
+import random
+import resource
+import statistics
+import time
+import uuid
+from typing import Any, Dict, List
+
+from django.core.management.base import BaseCommand
+
+from search.backends.memory_backend import InMemoryBackend
+
+KO_WORDS = "검색 장고 게시물 사진 여행 맛집 커피 개발 서버 알림 친구 주말 운동 음악 영화 공부 회사 고양이 강아지 날씨 바다 산책 요리 독서".split()
+KO_SUFFIXES = ["", "", "을", "를", "이", "가", "은", "는", "에서", "으로", "하고"]
+EN_WORDS = "search django python photo travel coffee server backend notes weekend music movie study team release deploy cache index query stream".split()
+
+
+def _synthetic_posts(n: int, seed: int, vocab: int):
+    # 한/영 혼합 문장. 공통 단어 + 드문 단어(word{k}, Zipf 분포)로 어휘 크기와 포스팅 길이 분포를 흉내낸다
+    rng = random.Random(seed)
+    rare = [f"word{k}" for k in range(vocab)]
+    cum, total = [], 0.0
+    for k in range(vocab):
+        total += 1.0 / (k + 1)
+        cum.append(total)
+    for _ in range(n):
+        words = [rng.choice(KO_WORDS) + rng.choice(KO_SUFFIXES) for _ in range(rng.randint(2, 6))]
+        words += [rng.choice(EN_WORDS) for _ in range(rng.randint(1, 5))]
+        words += rng.choices(rare, cum_weights=cum, k=rng.randint(1, 4))
+        rng.shuffle(words)
+        yield {"id": uuid.UUID(int=rng.getrandbits(128)).hex, "author_id": "a", "author_nickname": f"user{rng.randrange(50000)}", "content": " ".join(words), "hashtags": []}
+
+
+def _legacy_find(docs: List[Dict[str, Any]], q: str, keys) -> int:
+    # 이전 구현: 문서마다 필드별 lower() 부분 문자열 검사
+    ql = q.lower()
+    return sum(1 for v in docs if any(ql in str(v.get(k, "")).lower() for k in keys))
+
+
+def _rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+class Command(BaseCommand):
+    help = "Benchmark the in-memory search backend (inverted index + BM25) on synthetic posts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--docs", type=int, default=1_000_000)
+        parser.add_argument("--vocab", type=int, default=200_000, help="Number of rare words (Zipf-distributed).")
+        parser.add_argument("--queries", type=int, default=50, help="Repetitions per query.")
+        parser.add_argument("--writes", type=int, default=500, help="Interleaved write+search rounds, each write adding new tokens (0 to skip).")
+        parser.add_argument("--legacy-docs", type=int, default=100_000, help="Docs for the linear-scan baseline (0 to skip).")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **opts):
+        queries = ["검색", "커피", "python", "se", "word1", "word12345", "장고 django", "주말 여행 coffee"]
+
+        rss0 = _rss_mb()
+        backend = InMemoryBackend()
+        t0 = time.perf_counter()
+        backend.bulk_index("post", _synthetic_posts(opts["docs"], opts["seed"], opts["vocab"]))
+        took = time.perf_counter() - t0
+        fields = backend.posts.fields
+        postings = sum(len(d) for fi in fields.values() for d, _ in fi.postings.values())
+        vocab = sum(len(fi.postings) for fi in fields.values())
+        self.stdout.write(
+            f"indexed {opts['docs']:,} posts in {took:.1f}s ({opts['docs'] / took:,.0f} docs/s); "
+            f"vocab={vocab:,} postings={postings:,} (~{postings * 6 / 2**20:.0f} MiB arrays); max RSS +{_rss_mb() - rss0:,.0f} MiB"
+        )
+
+        for q in queries:
+            backend.search_posts(q, 1, 20)  # 어휘 정렬 등 첫 호출 비용 제외
+            lat = []
+            for _ in range(opts["queries"]):
+                t = time.perf_counter()
+                res = backend.search_posts(q, 1, 20)
+                lat.append((time.perf_counter() - t) * 1000)
+            lat.sort()
+            p95 = lat[int(len(lat) * 0.95) - 1]
+            self.stdout.write(f"  q={q!r:<22} hits={res['hits']['total']['value']:>9,}  p50={statistics.median(lat):8.2f}ms  p95={p95:8.2f}ms")
+
+        if opts["writes"]:
+            # 실시간 쓰기(OpenSearch 장애 중 대체 엔진) 흉내: 새 토큰을 만드는 색인 직후의 검색 지연
+            rng = random.Random(opts["seed"] + 1)
+            for q in ("coffee", "fresh"):
+                lat = []
+                for i in range(opts["writes"]):
+                    backend.index_post(
+                        {"id": uuid.uuid4().hex, "author_id": "a", "author_nickname": f"new{q}{i}", "content": f"fresh{q}{i} {rng.choice(EN_WORDS)}", "hashtags": []}
+                    )
+                    t = time.perf_counter()
+                    res = backend.search_posts(q, 1, 20)
+                    lat.append((time.perf_counter() - t) * 1000)
+                lat.sort()
+                p95 = lat[int(len(lat) * 0.95) - 1]
+                hits = res["hits"]["total"]["value"]
+                self.stdout.write(f"  write+search x{opts['writes']} q={q!r:<10} hits={hits:>9,}  p50={statistics.median(lat):8.2f}ms  p95={p95:8.2f}ms  max={lat[-1]:8.2f}ms")
+
+        if opts["legacy_docs"]:
+            docs = list(_synthetic_posts(opts["legacy_docs"], opts["seed"], opts["vocab"]))
+            for q in ("검색", "word12345"):
+                t = time.perf_counter()
+                _legacy_find(docs, q, ["content", "author_nickname", "hashtags"])
+                self.stdout.write(f"  legacy linear scan on {len(docs):,} docs q={q!r}: {(time.perf_counter() - t) * 1000:.0f}ms")
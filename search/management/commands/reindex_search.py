@@ -40,7 +40,9 @@ class Command(BaseCommand):
                     "content": p.content or "",
                     "hashtags": tag_map.get(p.id, []),
                     "created_at": p.created_at,
-                    "like_count": getattr(p, "like_count", 0),
+                    "like_count": p.like_count,
+                    "comment_count": p.comment_count,
+                    "repost_count": p.repost_count,
                 }
                 for p in Post.objects.all()
             ),
@@ -22,6 +22,8 @@ class PostHit(serializers.Serializer):
     hashtags = serializers.ListField(child=serializers.CharField(), allow_empty=True)
     created_at = serializers.DateTimeField()
     like_count = serializers.IntegerField()
+    comment_count = serializers.IntegerField(default=0)
+    repost_count = serializers.IntegerField(default=0)
 
 
 class HashtagHit(serializers.Serializer):
@@ -1,5 +1,7 @@
 from django.conf import settings
 
+from .indexing import delete_op, index_op, submit, update_op
+
 _backend = None
 
 
@@ -29,26 +31,43 @@ def backend():
 
 
 # Convenience wrappers
-def index_user(user_id, nickname, status_message, created_at):
-    backend().index_user({"id": str(user_id), "nickname": nickname, "status_message": status_message or "", "created_at": created_at})
-
-
-def index_post(post_id, author_id, author_nickname, content, hashtags, created_at, like_count=0):
-    backend().index_post(
-        {
-            "id": str(post_id),
-            "author_id": str(author_id),
-            "author_nickname": author_nickname or "",
-            "content": content or "",
-            "hashtags": hashtags or [],
-            "created_at": created_at,
-            "like_count": like_count,
-        }
+# 색인/삭제는 indexing 버퍼를 거쳐 bulk 로 나간다. refresh=True 면 바로 쓰고 검색에 보일 때까지 기다린다(read-your-writes).
+def index_user(user_id, nickname, status_message, created_at, *, refresh=False):
+    submit([index_op("user", {"id": str(user_id), "nickname": nickname, "status_message": status_message or "", "created_at": created_at})], refresh=refresh)
+
+
+def index_post(post_id, author_id, author_nickname, content, hashtags, created_at, like_count=0, *, refresh=False):
+    submit(
+        [
+            index_op(
+                "post",
+                {
+                    "id": str(post_id),
+                    "author_id": str(author_id),
+                    "author_nickname": author_nickname or "",
+                    "content": content or "",
+                    "hashtags": hashtags or [],
+                    "created_at": created_at,
+                    "like_count": like_count,
+                },
+            )
+        ],
+        refresh=refresh,
     )
 
 
-def index_hashtag(name, post_count=0):
-    backend().index_hashtag({"name": name, "post_count": post_count})
+def update_post_counts(counts):
+    # counts = {post_id: {"like_count": int, "comment_count": int, "repost_count": int}}
+    # 색인과 같은 버퍼를 거친다 → 아직 색인되지 않은(버퍼에 있는) 포스트의 카운트도 색인 문서에 합쳐진다
+    submit([update_op("post", pid, fields) for pid, fields in counts.items()])
+
+
+def index_hashtags(names, post_count=0, *, refresh=False):
+    submit([index_op("hashtag", {"name": name, "post_count": post_count}) for name in names], refresh=refresh)
+
+
+def index_hashtag(name, post_count=0, *, refresh=False):
+    index_hashtags([name], post_count, refresh=refresh)
 
 
 def search_users(q, page, size):
@@ -63,13 +82,13 @@ def search_hashtags(q, page, size):
     return backend().search_hashtags(q, page, size)
 
 
-def delete_user(user_id):
-    backend().delete_user(str(user_id))
+def delete_user(user_id, *, refresh=False):
+    submit([delete_op("user", user_id)], refresh=refresh)
 
 
-def delete_post(post_id):
-    backend().delete_post(str(post_id))
+def delete_post(post_id, *, refresh=False):
+    submit([delete_op("post", post_id)], refresh=refresh)
 
 
-def delete_hashtag(name):
-    backend().delete_hashtag(name)
+def delete_hashtag(name, *, refresh=False):
+    submit([delete_op("hashtag", name)], refresh=refresh)
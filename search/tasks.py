@@ -0,0 +1,9 @@
+from celery import shared_task
+
+
+@shared_task(name="search.tasks.flush_search_index")
+def flush_search_index(limit: int | None = None):
+    # celery beat 주기 작업 + 버퍼 크기 초과 시: Redis 에 쌓인 색인 연산을 bulk 로 반영
+    from .indexing import flush
+
+    return flush(limit)
@@ -124,3 +124,267 @@ class TestSearchAPI:
         r2 = authenticated_user.get("/api/v1/search/posts/", {"q": "p", "page": 2, "size": 1})
         assert r1.status_code == 200 and r2.status_code == 200
         assert r1.json()["results"] != r2.json()["results"]
+
+
+class TestInMemoryEngine:
+    # OpenSearch 대체 엔진: 역색인 + edge_ngram 접두어 매칭 + BM25
+    def _backend(self):
+        from search.backends.memory_backend import InMemoryBackend
+
+        return InMemoryBackend()
+
+    def _post(self, content, nickname="x", **extra):
+        return {"id": str(uuid.uuid4()), "author_id": "a", "author_nickname": nickname, "content": content, "hashtags": [], **extra}
+
+    def test_prefix_matching_like_edge_analyzer(self):
+        b = self._backend()
+        b.bulk_index("post", [self._post("장고로 검색을 만들자"), self._post("Hello OpenSearch"), self._post("research notes")])
+
+        def contents(q):
+            return [h["_source"]["content"] for h in b.search_posts(q, 1, 10)["hits"]["hits"]]
+
+        assert contents("검색") == ["장고로 검색을 만들자"]
+        assert contents("OPEN") == ["Hello OpenSearch"]
+        # 토큰 중간 부분 문자열은 edge_ngram 과 같이 매칭하지 않는다
+        assert contents("search") == []
+        assert contents("*") == []
+
+    def test_bm25_uses_field_boosts(self):
+        b = self._backend()
+        b.bulk_index("user", [{"id": "u1", "nickname": "coder", "status_message": "neo fan"}, {"id": "u2", "nickname": "neo", "status_message": "hi"}])
+        hits = b.search_users("neo", 1, 10)["hits"]["hits"]
+        # nickname 가중치(2.0)가 status_message(1.0)보다 크다
+        assert [h["_source"]["id"] for h in hits] == ["u2", "u1"]
+        assert hits[0]["_score"] > hits[1]["_score"] > 0
+
+    def test_new_tokens_searchable_without_resorting_vocab(self, monkeypatch):
+        from search.backends import memory_backend
+
+        monkeypatch.setattr(memory_backend, "VOCAB_MERGE", 3)
+        b = self._backend()
+        b.bulk_index("post", [self._post("apple banana")])
+        assert b.search_posts("ap", 1, 10)["hits"]["total"]["value"] == 1
+        content = b.posts.fields["content"]
+        vocab = content._vocab
+
+        # 검색 뒤 생긴 토큰은 보조 목록으로(본 목록은 그대로)
+        b.index_post(self._post("apricot cherry"))
+        assert content._vocab is vocab and content._fresh == ["apricot", "cherry"]
+        assert b.search_posts("ap", 1, 10)["hits"]["total"]["value"] == 2
+
+        # VOCAB_MERGE 개가 쌓이면 정렬을 유지한 채 본 목록에 병합
+        b.index_post(self._post("avocado"))
+        assert b.search_posts("a", 1, 10)["hits"]["total"]["value"] == 3
+        assert content._vocab == ["apple", "apricot", "avocado", "banana", "cherry"] and content._fresh == []
+
+    def test_reindex_delete_and_compaction(self, monkeypatch):
+        from search.backends import memory_backend
+
+        monkeypatch.setattr(memory_backend, "COMPACT_MIN_DEAD", 2)
+        b = self._backend()
+        docs = [self._post(f"alpha {i}") for i in range(4)]
+        b.bulk_index("post", docs)
+        b.index_post({**docs[0], "content": "beta"})
+        for d in docs[1:]:
+            b.delete_post(d["id"])
+
+        assert b.search_posts("alpha", 1, 10)["hits"]["total"]["value"] == 0
+        assert [h["_source"]["id"] for h in b.search_posts("beta", 1, 10)["hits"]["hits"]] == [docs[0]["id"]]
+        # 세 번째 삭제에서 죽은 문서(3) > 산 문서(2) → 포스팅 재구성, 이후 삭제 1건만 남음
+        assert len(b.posts.sources) == 2 and b.posts.dead == 1
+
+
+@pytest.fixture
+def fake_index_buffer(settings, monkeypatch):
+    import fakeredis
+
+    from search import indexing
+
+    buf = indexing.IndexBuffer.__new__(indexing.IndexBuffer)
+    buf.r = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(indexing, "_buffer", buf)
+    settings.SEARCH_INDEX_BUFFERED = True
+    settings.SEARCH_INDEX_FLUSH_SIZE = 100
+    return buf
+
+
+@pytest.mark.usefixtures("fake_index_buffer")
+class TestSearchIndexBuffer:
+    # 색인 쓰기 버퍼: Redis 에 모았다가 bulk_write 한 번으로 반영
+    def _post(self, post_id, content):
+        services.index_post(post_id=post_id, author_id="a", author_nickname="n", content=content, hashtags=[], created_at=timezone.now())
+
+    def _ids(self, q):
+        return [h["_source"]["id"] for h in services.search_posts(q, 1, 10)["hits"]["hits"]]
+
+    def test_writes_are_buffered_coalesced_and_flushed_in_one_bulk(self, fake_index_buffer, monkeypatch):
+        from search import indexing
+
+        for i in range(3):
+            self._post(f"p{i}", f"buffered {i}")
+        self._post("p0", "buffered again")
+        services.delete_post("p2")
+        assert self._ids("buffered") == [] and fake_index_buffer.pending() == 3
+
+        calls = []
+        b = services.backend()
+        orig = b.bulk_write
+        monkeypatch.setattr(b, "bulk_write", lambda ops, refresh=False: calls.append(ops) or orig(ops, refresh))
+        assert indexing.flush() == 3
+        # 문서별 마지막 연산만 한 번의 bulk 로
+        assert len(calls) == 1 and sorted((op["key"], op["op"]) for op in calls[0]) == [("p0", "index"), ("p1", "index"), ("p2", "delete")]
+        assert sorted(self._ids("buffered")) == ["p0", "p1"]
+        assert services.backend().posts["p0"]["content"] == "buffered again"
+        assert indexing.flush() == 0
+
+    def test_refresh_writes_through_and_drops_pending_op(self, fake_index_buffer):
+        from search import indexing
+
+        self._post("p1", "stale")
+        services.index_post(post_id="p1", author_id="a", author_nickname="n", content="fresh", hashtags=[], created_at=timezone.now(), refresh=True)
+        assert self._ids("fresh") == ["p1"]
+        assert indexing.flush() == 0
+        assert self._ids("stale") == []
+
+    def test_failed_refresh_write_is_requeued(self, fake_index_buffer, monkeypatch):
+        from search import indexing
+
+        b = services.backend()
+        orig = b.bulk_write
+        self._post("p1", "stale")
+        # 연결 실패: 새 연산이 버퍼로 돌아가 대기 연산(stale)을 대신한다
+        monkeypatch.setattr(b, "bulk_write", lambda ops, refresh=False: (_ for _ in ()).throw(ConnectionError("down")))
+        services.index_post(post_id="p1", author_id="a", author_nickname="n", content="fresh", hashtags=[], created_at=timezone.now(), refresh=True)
+        # 일시 오류(429/5xx)로 돌아온 연산도 버퍼로
+        monkeypatch.setattr(b, "bulk_write", lambda ops, refresh=False: list(ops))
+        services.index_post(post_id="p2", author_id="a", author_nickname="n", content="retried", hashtags=[], created_at=timezone.now(), refresh=True)
+        assert fake_index_buffer.pending() == 2
+
+        monkeypatch.setattr(b, "bulk_write", orig)
+        assert indexing.flush() == 2
+        assert self._ids("fresh") == ["p1"] and self._ids("stale") == [] and self._ids("retried") == ["p2"]
+
+    def test_refresh_write_keeps_ops_queued_during_write(self, fake_index_buffer, monkeypatch):
+        from search import indexing
+
+        b = services.backend()
+        orig = b.bulk_write
+
+        def write(ops, refresh=False):
+            # 쓰기 도중 같은 문서에 새 연산이 들어옴 → 쓰기 뒤에도 버리지 않는다
+            indexing._push([indexing.index_op("post", {**ops[0]["doc"], "content": "newest"})])
+            return orig(ops, refresh)
+
+        self._post("p1", "stale")
+        monkeypatch.setattr(b, "bulk_write", write)
+        services.index_post(post_id="p1", author_id="a", author_nickname="n", content="fresh", hashtags=[], created_at=timezone.now(), refresh=True)
+        monkeypatch.setattr(b, "bulk_write", orig)
+        assert indexing.flush() == 1
+        assert self._ids("newest") == ["p1"]
+
+    def test_unbuffered_failed_write_is_parked_for_flush(self, settings, fake_index_buffer, monkeypatch):
+        from search import indexing, tasks
+
+        settings.SEARCH_INDEX_BUFFERED = False
+        scheduled = []
+        monkeypatch.setattr(tasks.flush_search_index, "delay", lambda *a, **k: scheduled.append(1))
+        b = services.backend()
+        orig = b.bulk_write
+        monkeypatch.setattr(b, "bulk_write", lambda ops, refresh=False: list(ops))
+        self._post("p1", "parked")
+        assert fake_index_buffer.pending() == 1 and scheduled == [1]
+
+        monkeypatch.setattr(b, "bulk_write", orig)
+        assert indexing.flush() == 1
+        assert self._ids("parked") == ["p1"]
+
+    def test_failed_bulk_is_requeued_without_overwriting_newer_ops(self, fake_index_buffer, monkeypatch):
+        from search import indexing
+
+        self._post("p1", "first")
+        ops = fake_index_buffer.drain(10)
+        self._post("p1", "second")  # 실패한 bulk 가 도는 사이 들어온 새 연산
+        fake_index_buffer.requeue(ops)
+        indexing.flush()
+        assert services.backend().posts["p1"]["content"] == "second"
+
+        self._post("p2", "third")
+        monkeypatch.setattr(services.backend(), "bulk_write", lambda ops, refresh=False: (_ for _ in ()).throw(ConnectionError("down")))
+        with pytest.raises(ConnectionError):
+            indexing.flush()
+        assert fake_index_buffer.pending() == 1
+
+    def test_counter_updates_merge_into_pending_index_op(self, fake_index_buffer):
+        from search import indexing
+
+        self._post("p1", "new post")  # like_count=0 으로 대기 중
+        services.update_post_counts({"p1": {"like_count": 7, "comment_count": 2, "repost_count": 0}})
+        self._post("p2", "gone")
+        services.delete_post("p2")
+        services.update_post_counts({"p2": {"like_count": 1, "comment_count": 0, "repost_count": 0}})
+        assert sorted((op["key"], op["op"]) for op in fake_index_buffer.drain(10)) == [("p1", "index"), ("p2", "delete")]
+
+        self._post("p1", "new post")
+        services.update_post_counts({"p1": {"like_count": 7, "comment_count": 2, "repost_count": 0}})
+        indexing.flush()
+        assert services.backend().posts["p1"]["like_count"] == 7
+        # 이미 색인된 문서는 부분 갱신만
+        services.update_post_counts({"p1": {"like_count": 9, "comment_count": 2, "repost_count": 0}})
+        assert [op["op"] for op in fake_index_buffer.drain(10)] == ["update"]
+
+    def test_flushes_and_refresh_writes_are_serialized(self, settings, fake_index_buffer):
+        from search import indexing
+
+        settings.SEARCH_INDEX_FLUSH_LOCK_WAIT_SEC = 0.01
+        self._post("p1", "queued")
+        held = fake_index_buffer.acquire()
+        assert held and fake_index_buffer.acquire() is None
+        # 다른 flush 가 도는 동안: flush 는 건너뛰고, refresh 쓰기는 순서를 지키려 버퍼로 간다
+        assert indexing.flush() == 0
+        services.index_post(post_id="p1", author_id="a", author_nickname="n", content="latest", hashtags=[], created_at=timezone.now(), refresh=True)
+        assert self._ids("latest") == [] and fake_index_buffer.pending() == 1
+        fake_index_buffer.release(held)
+
+        assert indexing.flush() == 1
+        assert self._ids("latest") == ["p1"] and self._ids("queued") == []
+
+    def test_size_threshold_schedules_one_flush(self, settings, monkeypatch):
+        from search import tasks
+
+        settings.SEARCH_INDEX_FLUSH_SIZE = 2
+        scheduled = []
+        monkeypatch.setattr(tasks.flush_search_index, "delay", lambda *a, **k: scheduled.append(1))
+        for i in range(4):
+            self._post(f"p{i}", "x")
+        assert len(scheduled) == 1
+
+
+class TestOpenSearchBulkWrite:
+    # bulk 응답 분류: 없는 문서 삭제(404)=성공, 429/5xx=재시도, 그 밖=버림
+    def test_bulk_write_classifies_item_errors(self):
+        from search.backends.opensearch_backend import OpenSearchBackend
+        from search.indexing import delete_op, index_op
+
+        b = OpenSearchBackend.__new__(OpenSearchBackend)
+        b.prefix, b.bulk_chunk, b.bulk_threads = "t", 500, 1
+        sent = {}
+
+        class _Helpers:
+            @staticmethod
+            def streaming_bulk(client, actions, **kwargs):
+                sent["actions"], sent["kwargs"] = list(actions), kwargs
+                results = [
+                    (True, {"index": {"_index": "t-posts", "_id": "ok", "status": 201}}),
+                    (False, {"delete": {"_index": "t-posts", "_id": "gone", "status": 404}}),
+                    (False, {"index": {"_index": "t-users", "_id": "busy", "status": 429}}),
+                    (False, {"index": {"_index": "t-hashtags", "_id": "bad", "status": 400, "error": "mapper_parsing_exception"}}),
+                ]
+                yield from results[: len(sent["actions"])]
+
+        b._helpers, b.client = _Helpers, None
+        ops = [index_op("post", {"id": "ok"}), delete_op("post", "gone"), index_op("user", {"id": "busy"}), index_op("hashtag", {"name": "bad"})]
+        assert b.bulk_write(ops) == [ops[2]]
+        assert [a["_op_type"] for a in sent["actions"]] == ["index", "delete", "index", "index"]
+        assert "refresh" not in sent["kwargs"]
+        b.bulk_write(ops[:1], refresh=True)
+        assert sent["kwargs"]["refresh"] == "wait_for"
@@ -150,8 +150,55 @@ CELERY_TASK_TIME_LIMIT = 30
 CELERY_TASK_SOFT_TIME_LIMIT = 25
 CELERY_ACKS_LATE = True
 CELERY_WORKER_PREFETCH_MULTIPLIER = 10
+# 주기 작업(celery beat): 각 기능 설정 블록에서 항목을 등록
+CELERY_BEAT_SCHEDULE = {}
 
 PUSH_PROVIDER = env.str("PUSH_PROVIDER", default="dummy")  # apns | fcm | dummy
+# 푸시 전송 엔진(notifications.providers): 동시 전송 수, 공급자별 HTTP 연결 풀 크기, 요청 타임아웃(초)
+PUSH_CONCURRENCY = env.int("PUSH_CONCURRENCY", default=32)
+PUSH_POOL_SIZE = env.int("PUSH_POOL_SIZE", default=4)
+PUSH_TIMEOUT_SEC = env.float("PUSH_TIMEOUT_SEC", default=10.0)
+# APNs token 인증(.p8 키). APNS_ENDPOINT 를 주면 그 주소로 전송(로컬 가짜 서버 벤치마크 등)
+APNS_AUTH_KEY_PATH = env.str("APNS_AUTH_KEY_PATH", default="")
+APNS_KEY_ID = env.str("APNS_KEY_ID", default="")
+APNS_TEAM_ID = env.str("APNS_TEAM_ID", default="")
+APNS_TOPIC = env.str("APNS_TOPIC", default="")
+APNS_USE_SANDBOX = env.bool("APNS_USE_SANDBOX", default=False)
+APNS_ENDPOINT = env.str("APNS_ENDPOINT", default="")
+# FCM HTTP v1: 프로젝트(비우면 firebase_admin 앱의 project_id). FCM_ENDPOINT 를 주면 인증 없이 그 주소로 전송(로컬 가짜 서버)
+FCM_PROJECT_ID = env.str("FCM_PROJECT_ID", default="")
+FCM_ENDPOINT = env.str("FCM_ENDPOINT", default="")
+# 팔로워 팬아웃(notifications.tasks.fanout_post_created): 청크당 팔로워 수, 조정자 1회 실행당 예약할 최대 청크 수,
+# Notification bulk insert 크기, 진행 상황 키 TTL(초)
+NOTIFICATION_FANOUT_CHUNK = env.int("NOTIFICATION_FANOUT_CHUNK", default=1000)
+NOTIFICATION_FANOUT_MAX_CHUNKS_PER_RUN = env.int("NOTIFICATION_FANOUT_MAX_CHUNKS_PER_RUN", default=200)
+NOTIFICATION_FANOUT_INSERT_BATCH = env.int("NOTIFICATION_FANOUT_INSERT_BATCH", default=500)
+NOTIFICATION_FANOUT_PROGRESS_TTL_SEC = env.int("NOTIFICATION_FANOUT_PROGRESS_TTL_SEC", default=86400)
+# 사용자별 알림 설정 캐시(notifications.preferences) TTL(초). 설정 변경 시 즉시 무효화
+NOTIFICATION_SETTINGS_CACHE_TTL_SEC = env.int("NOTIFICATION_SETTINGS_CACHE_TTL_SEC", default=3600)
+# 사용자별 디바이스 토큰 캐시(notifications.devices) TTL(초). 등록/비활성화 시 즉시 무효화
+NOTIFICATION_DEVICE_CACHE_TTL_SEC = env.int("NOTIFICATION_DEVICE_CACHE_TTL_SEC", default=86400)
+# 알림 집계(notifications.aggregation): 같은 (수신자, 종류, 대상) 이벤트를 묶는 시간 창(초), 창의 첫 이벤트 후 푸시까지 지연(초),
+# 행에 보관할 행위자 표본 수("Alice and 1,203 others ...")
+NOTIFICATION_AGGREGATE_WINDOW_SEC = env.int("NOTIFICATION_AGGREGATE_WINDOW_SEC", default=600)
+NOTIFICATION_AGGREGATE_PUSH_DELAY_SEC = env.int("NOTIFICATION_AGGREGATE_PUSH_DELAY_SEC", default=30)
+NOTIFICATION_AGGREGATE_SAMPLE = env.int("NOTIFICATION_AGGREGATE_SAMPLE", default=3)
+# 안 읽은 알림 수 카운터(notifications.unread): Redis 키 TTL(초), DB 기준 보정 주기(초)/1회 보정 최대 사용자 수
+NOTIFICATION_UNREAD_TTL_SEC = env.int("NOTIFICATION_UNREAD_TTL_SEC", default=86400)
+NOTIFICATION_UNREAD_RECONCILE_SEC = env.int("NOTIFICATION_UNREAD_RECONCILE_SEC", default=300)
+NOTIFICATION_UNREAD_RECONCILE_BATCH = env.int("NOTIFICATION_UNREAD_RECONCILE_BATCH", default=1000)
+CELERY_BEAT_SCHEDULE["notifications.reconcile_unread_counters"] = {"task": "notifications.tasks.reconcile_unread_counters", "schedule": NOTIFICATION_UNREAD_RECONCILE_SEC}
+# 알림 보존(notifications.retention): 보존 일수, 삭제 배치 크기, 스윕 주기(초)/1회 실행당 최대 배치 수,
+# 삭제 배치마다 월별 gzip JSON Lines 로 내보낼 디렉터리(빈 값이면 아카이브 없이 삭제)
+NOTIFICATION_RETENTION_DAYS = env.int("NOTIFICATION_RETENTION_DAYS", default=90)
+NOTIFICATION_RETENTION_BATCH = env.int("NOTIFICATION_RETENTION_BATCH", default=5000)
+NOTIFICATION_RETENTION_SWEEP_SEC = env.int("NOTIFICATION_RETENTION_SWEEP_SEC", default=3600)
+NOTIFICATION_RETENTION_MAX_BATCHES_PER_RUN = env.int("NOTIFICATION_RETENTION_MAX_BATCHES_PER_RUN", default=200)
+NOTIFICATION_ARCHIVE_DIR = env.str("NOTIFICATION_ARCHIVE_DIR", default="")
+# 인앱 알림 WebSocket 전달(notifications.broadcast): 사용 여부, notifications.resume 한 번에 돌려줄 최대 알림 수
+NOTIFICATION_WS_ENABLED = env.bool("NOTIFICATION_WS_ENABLED", default=True)
+NOTIFICATION_WS_RESUME_LIMIT = env.int("NOTIFICATION_WS_RESUME_LIMIT", default=100)
+CELERY_BEAT_SCHEDULE["notifications.sweep_expired_notifications"] = {"task": "notifications.tasks.sweep_expired_notifications", "schedule": NOTIFICATION_RETENTION_SWEEP_SEC}
 EVENT_BUS_BACKEND = env.str("EVENT_BUS_BACKEND", default="dummy")  # dummy | kafka | rabbitmq
 
 # Channels
@@ -300,11 +347,72 @@ POST_LIMITS = {
     "MAX_ATTACHMENTS": 10,
 }
 
+# 트랜잭션 단위로 모은 포스트 이벤트(좋아요/리포스트 등)를 배치 태스크 하나에 싣는 최대 개수
+POST_EVENT_BATCH_SIZE = env.int("POST_EVENT_BATCH_SIZE", default=500)
+# 배치 태스크 재시도 시 이어서 처리하기 위한 진행 기록 보관 시간(초, 재시도 백오프 전체보다 길게)
+POST_EVENT_BATCH_PROGRESS_TTL_SEC = env.int("POST_EVENT_BATCH_PROGRESS_TTL_SEC", default=86400)
+# 댓글 생성/삭제 태스크 재시도 시 comment_count 델타 중복 반영 방지 표시의 보관 시간(초)
+COMMENT_COUNT_DEDUP_TTL_SEC = env.int("COMMENT_COUNT_DEDUP_TTL_SEC", default=86400)
+
+# 포스트 카운터(posts.counters): Redis 델타를 posts 컬럼에 반영하는 주기(초)와 1회 반영 최대 포스트 수
+POST_COUNTER_FLUSH_SEC = env.int("POST_COUNTER_FLUSH_SEC", default=5)
+POST_COUNTER_FLUSH_BATCH = env.int("POST_COUNTER_FLUSH_BATCH", default=1000)
+CELERY_BEAT_SCHEDULE["posts.flush_post_counters"] = {"task": "posts.tasks.flush_post_counters", "schedule": POST_COUNTER_FLUSH_SEC}
+
+# 좋아요 write-behind(posts.like_buffer): 켜면 좋아요/취소는 Redis 에만 기록 후 즉시 응답하고 주기적으로 PostLike 에 일괄 반영
+POST_LIKE_WRITE_BEHIND = env.bool("POST_LIKE_WRITE_BEHIND", default=False)
+POST_LIKE_FLUSH_SEC = env.float("POST_LIKE_FLUSH_SEC", default=1.0)
+POST_LIKE_FLUSH_BATCH = env.int("POST_LIKE_FLUSH_BATCH", default=1000)
+# 좋아요 집합 TTL(쓰기마다 갱신). flush 주기보다 충분히 길어야 한다.
+POST_LIKE_SET_TTL_SEC = env.int("POST_LIKE_SET_TTL_SEC", default=86400)
+# 내구성: 0이면 Redis 기록만으로 응답. N>0 이면 Redis WAIT 로 N개 복제 확인, 실패 시 DB 에 동기 기록
+POST_LIKE_WAIT_REPLICAS = env.int("POST_LIKE_WAIT_REPLICAS", default=0)
+POST_LIKE_WAIT_TIMEOUT_MS = env.int("POST_LIKE_WAIT_TIMEOUT_MS", default=50)
+# 좋아요 집합 워밍 예약 표시 TTL(초): 워밍 태스크가 실패하면 이 시간 뒤 다음 좋아요/취소가 다시 예약
+POST_LIKE_WARM_LOCK_SEC = env.int("POST_LIKE_WARM_LOCK_SEC", default=60)
+if POST_LIKE_WRITE_BEHIND:
+    CELERY_BEAT_SCHEDULE["posts.flush_post_likes"] = {"task": "posts.tasks.flush_post_likes", "schedule": POST_LIKE_FLUSH_SEC}
+
+# 투표 집계 캐시(polls.tally): 폴별 Redis 해시 TTL 과 DB 기준 보정 주기(초)/1회 보정 최대 폴 수
+POLL_TALLY_TTL_SEC = env.int("POLL_TALLY_TTL_SEC", default=86400)
+POLL_TALLY_RECONCILE_SEC = env.int("POLL_TALLY_RECONCILE_SEC", default=60)
+POLL_TALLY_RECONCILE_BATCH = env.int("POLL_TALLY_RECONCILE_BATCH", default=1000)
+CELERY_BEAT_SCHEDULE["polls.reconcile_poll_tallies"] = {"task": "polls.tasks.reconcile_poll_tallies", "schedule": POLL_TALLY_RECONCILE_SEC}
+# 집계 쓰기를 나눌 Redis 해시 샤드 수(바이럴 폴의 핫 키 분산)
+POLL_TALLY_SHARDS = env.int("POLL_TALLY_SHARDS", default=1)
+# 득표 write-behind: 켜면 투표는 poll_votes 만 쓰고 옵션 카운터는 Redis 델타로 모아 주기적으로 일괄 반영
+POLL_COUNTER_WRITE_BEHIND = env.bool("POLL_COUNTER_WRITE_BEHIND", default=False)
+POLL_COUNTER_FLUSH_SEC = env.float("POLL_COUNTER_FLUSH_SEC", default=2.0)
+POLL_COUNTER_FLUSH_BATCH = env.int("POLL_COUNTER_FLUSH_BATCH", default=1000)
+# poll_votes GROUP BY 기반 전체 재계산 주기(초)
+POLL_TALLY_REBUILD_SEC = env.int("POLL_TALLY_REBUILD_SEC", default=3600)
+if POLL_COUNTER_WRITE_BEHIND:
+    CELERY_BEAT_SCHEDULE["polls.flush_poll_counters"] = {"task": "polls.tasks.flush_poll_counters", "schedule": POLL_COUNTER_FLUSH_SEC}
+    CELERY_BEAT_SCHEDULE["polls.rebuild_poll_tallies"] = {"task": "polls.tasks.rebuild_poll_tallies", "schedule": POLL_TALLY_REBUILD_SEC}
+
+
+# Comments settings
+
+# 댓글 목록에서 최상위 댓글마다 함께 내려주는 대댓글 미리보기 개수(나머지는 /comments/{id}/replies)
+COMMENT_REPLY_PREVIEW = env.int("COMMENT_REPLY_PREVIEW", default=3)
+
 
 # Moderation settings
 
 MODERATION_ENABLED = True
 MODERATION_BLOCKED_WORDS = {"spam", "abuse", "badword"}
+# 검사 결과 캐시(moderation.verdicts): 프로세스 LRU 크기와 Redis TTL(초). 규칙 버전이 바뀌면 즉시 무효
+MODERATION_VERDICT_LOCAL_SIZE = env.int("MODERATION_VERDICT_LOCAL_SIZE", default=10000)
+MODERATION_VERDICT_TTL_SEC = env.int("MODERATION_VERDICT_TTL_SEC", default=3600)
+# ML 스코어러(moderation.scoring): keyword(기본, ML 없음) | http | dotted path
+MODERATION_SCORER = env.str("MODERATION_SCORER", default="keyword")
+MODERATION_SCORER_URL = env.str("MODERATION_SCORER_URL", default="")
+MODERATION_SCORER_HTTP_TIMEOUT_SEC = env.float("MODERATION_SCORER_HTTP_TIMEOUT_SEC", default=2.0)
+# 마이크로 배칭: 최대 묶음 크기와 첫 요청 이후 기다리는 시간(ms)
+MODERATION_SCORER_MAX_BATCH = env.int("MODERATION_SCORER_MAX_BATCH", default=32)
+MODERATION_SCORER_MAX_WAIT_MS = env.int("MODERATION_SCORER_MAX_WAIT_MS", default=5)
+# 요청 경로에서 ML 점수를 기다리는 최대 시간(ms). 넘기면 금칙어 점수로 대체
+MODERATION_SCORER_DEADLINE_MS = env.int("MODERATION_SCORER_DEADLINE_MS", default=50)
 NSFW_CHECK_ENABLED = True
 
 
@@ -329,8 +437,25 @@ OPENSEARCH = {
     "USE_NORI": env.bool("OPENSEARCH_USE_NORI", default=False),
     # 클라이언트 타임아웃
     "TIMEOUT": env.int("OPENSEARCH_TIMEOUT", default=3),
+    # 인덱스 refresh 주기(새 문서가 검색에 보이기까지). 쓰기 요청은 refresh 를 기다리지 않는다
+    "REFRESH_INTERVAL": env.str("OPENSEARCH_REFRESH_INTERVAL", default="1s"),
+    # bulk 요청 1번에 실을 연산 수, 동시에 보낼 스레드 수(1이면 streaming_bulk, 2 이상이면 parallel_bulk)
+    "BULK_CHUNK_SIZE": env.int("OPENSEARCH_BULK_CHUNK_SIZE", default=500),
+    "BULK_THREADS": env.int("OPENSEARCH_BULK_THREADS", default=1),
 }
 
+# 검색 색인 쓰기 버퍼(search.indexing): 켜면 색인/삭제를 Redis 에 모아 bulk 로 반영한다(기본: OpenSearch 사용 시)
+SEARCH_INDEX_BUFFERED = env.bool("SEARCH_INDEX_BUFFERED", default=OPENSEARCH["ENABLED"])
+# 반영 주기(초), 이만큼 쌓이면 주기를 기다리지 않고 반영(= bulk 1회 크기), 1회 실행 최대 bulk 수
+SEARCH_INDEX_FLUSH_SEC = env.float("SEARCH_INDEX_FLUSH_SEC", default=1.0)
+SEARCH_INDEX_FLUSH_SIZE = env.int("SEARCH_INDEX_FLUSH_SIZE", default=500)
+SEARCH_INDEX_FLUSH_MAX_BATCHES = env.int("SEARCH_INDEX_FLUSH_MAX_BATCHES", default=20)
+# flush 직렬화 락 보유 시간(초, bulk 최대 소요보다 길게)과 refresh=True 쓰기가 그 락을 기다리는 최대 시간(초)
+SEARCH_INDEX_FLUSH_LOCK_SEC = env.int("SEARCH_INDEX_FLUSH_LOCK_SEC", default=60)
+SEARCH_INDEX_FLUSH_LOCK_WAIT_SEC = env.float("SEARCH_INDEX_FLUSH_LOCK_WAIT_SEC", default=5.0)
+if SEARCH_INDEX_BUFFERED:
+    CELERY_BEAT_SCHEDULE["search.flush_search_index"] = {"task": "search.tasks.flush_search_index", "schedule": SEARCH_INDEX_FLUSH_SEC}
+
 
 # Feed settings
 